@@ -1,9 +1,34 @@
 import argparse
+import atexit
+import concurrent.futures
+import contextlib
+import datetime
+import functools
+import gc
+import http.server
+import io
+import multiprocessing
 import pandas as pd
 import numpy as np
 import unicodedata
 import yaml
+
+try:
+    import pyarrow  # noqa: F401  (enables Parquet snapshots)
+except ImportError:
+    pyarrow = None
 import os
+import sys
+import time
+import json
+import hashlib
+import pickle
+import socketserver
+import tempfile
+import tracemalloc
+from collections import Counter
+from collections.abc import MutableMapping
+from stat import S_ISSOCK
 
 # === PARK FACTORS AND TEAM/PARK MAPPING ===
 PARK_FACTORS_2025 = {
@@ -41,15 +66,27 @@ PARK_FACTORS_2025 = {
 }
 
 TEAM_TO_PARK = {
-    'ARI': 'Chase Field','ATL': 'Truist Park','BAL': 'Oriole Park at Camden Yards','BOS': 'Fenway Park','CHC': 'Wrigley Field','CWS': 'Guaranteed Rate Field','CHW': 'Guaranteed Rate Field','CIN': 'Great American Ball Park','CLE': 'Progressive Field','COL': 'Coors Field','DET': 'Comerica Park','HOU': 'Minute Maid Park','KC': 'Kauffman Stadium','KCR': 'Kauffman Stadium','LAA': 'Angel Stadium','LAD': 'Dodger Stadium','MIA': 'loanDepot park','MIL': 'American Family Field','MIN': 'Target Field','NYM': 'Citi Field','NYY': 'Yankee Stadium','OAK': 'Sutter Health Park','PHI': 'Citizens Bank Park','PIT': 'PNC Park','SD': 'Petco Park','SDP': 'San Diego Padres','SF': 'Oracle Park','SFG': 'Oracle Park','SEA': 'T-Mobile Park','STL': 'Busch Stadium','TB': 'Steinbrenner Field','TBR': 'Steinbrenner Field','TEX': 'Globe Life Field','TOR': 'Rogers Centre','WSH': 'Nationals Park','WAS': 'Nationals Park',
+    'ARI': 'Chase Field','ATL': 'Truist Park','BAL': 'Oriole Park at Camden Yards','BOS': 'Fenway Park','CHC': 'Wrigley Field','CWS': 'Guaranteed Rate Field','CHW': 'Guaranteed Rate Field','CIN': 'Great American Ball Park','CLE': 'Progressive Field','COL': 'Coors Field','DET': 'Comerica Park','HOU': 'Minute Maid Park','KC': 'Kauffman Stadium','KCR': 'Kauffman Stadium','LAA': 'Angel Stadium','LAD': 'Dodger Stadium','MIA': 'loanDepot park','MIL': 'American Family Field','MIN': 'Target Field','NYM': 'Citi Field','NYY': 'Yankee Stadium','OAK': 'Sutter Health Park','PHI': 'Citizens Bank Park','PIT': 'PNC Park','SD': 'Petco Park','SDP': 'Petco Park','SF': 'Oracle Park','SFG': 'Oracle Park','SEA': 'T-Mobile Park','STL': 'Busch Stadium','TB': 'Steinbrenner Field','TBR': 'Steinbrenner Field','TEX': 'Globe Life Field','TOR': 'Rogers Centre','WSH': 'Nationals Park','WAS': 'Nationals Park',
 }
 
 TEAM_ABBR_TO_NAME = {
     'ARI': 'Arizona Diamondbacks','ATL': 'Atlanta Braves','BAL': 'Baltimore Orioles','BOS': 'Boston Red Sox','CHC': 'Chicago Cubs','CWS': 'Chicago White Sox','CHW': 'Chicago White Sox','CIN': 'Cincinnati Reds','CLE': 'Cleveland Guardians','COL': 'Colorado Rockies','DET': 'Detroit Tigers','HOU': 'Houston Astros','KC': 'Kansas City Royals','KCR': 'Kansas City Royals','LAA': 'Los Angeles Angels','LAD': 'Los Angeles Dodgers','MIA': 'Miami Marlins','MIL': 'Milwaukee Brewers','MIN': 'Minnesota Twins','NYM': 'New York Mets','NYY': 'New York Yankees','OAK': 'Oakland Athletics','PHI': 'Philadelphia Phillies','PIT': 'Pittsburgh Pirates','SD': 'San Diego Padres','SDP': 'San Diego Padres','SF': 'San Francisco Giants','SFG': 'San Francisco Giants','SEA': 'Seattle Mariners','STL': 'St. Louis Cardinals','TB': 'Tampa Bay Rays','TBR': 'Tampa Bay Rays','TEX': 'Texas Rangers','TOR': 'Toronto Blue Jays','WSH': 'Washington Nationals','WAS': 'Washington Nationals',
 }
 
+# Full team name to its first abbreviation in TEAM_ABBR_TO_NAME.
+TEAM_NAME_TO_ABBR = {name: abbr for abbr, name in reversed(TEAM_ABBR_TO_NAME.items())}
+
+NEUTRAL_PARK_FACTORS = {'runs': 1.0, 'hr': 1.0, 'woba': 1.0}
+# Park factors by team. Built eagerly so a TEAM_TO_PARK entry naming a park
+# PARK_FACTORS_2025 does not have fails at import rather than reading neutral.
+TEAM_PARK_FACTORS = {team: PARK_FACTORS_2025[park] for team, park in TEAM_TO_PARK.items()}
+
 # === CSV LOADING ===
-csv_files = {}
+DATA_DIR = os.environ.get('MLB_DATA_DIR', '.')
+# Parsed/cleaned frames are snapshotted here; set MLB_CACHE_DIR='' to disable.
+CACHE_DIR = os.environ.get('MLB_CACHE_DIR', os.path.join(DATA_DIR, '.mlb_cache'))
+# Bump when reading/cleaning logic changes so old snapshots are rebuilt.
+SNAPSHOT_VERSION = 4
 
 classic_csvs = {
     "cum_pitching": "Player_Cumulative_Pitching.cvs",
@@ -100,44 +137,660 @@ advanced_csvs = {
     "swing_take": "swing-take.csv",
 }
 
-for key, fname in classic_csvs.items():
-    if os.path.isfile(fname):
+other_csvs = {
+    "last3dayspitching": "last3dayspitching.csv",
+    # Written by --ingest-pitching; see PitchingLogStore.
+    "pitching_log": "pitching_log.csv",
+    # Optional Statcast pitch-level export (one row per pitch); streamed, see
+    # PitchAggregator.
+    "statcast_pitches": "statcast_pitches.csv",
+}
+
+# Columns read by the getters for each dataset. Datasets that are not listed
+# here are loaded with every column.
+PLAYER_NAME_COLUMNS = ['Player', 'Name', 'player_name', 'Pitcher', 'pitcher_name']
+TEAM_COLUMNS = ['Team', 'Tm', 'team', 'TEAM']
+TEAM_OPS_COLUMNS = ['Date', 'Team', 'OBP', 'SLG', 'H', 'BB', 'AB', 'TB']
+
+DATASET_COLUMNS = {
+    'std_pitching': ['Player', 'ERA', 'WHIP', 'IP', 'SO9', 'BB9', 'HR9'],
+    'homeandawatbatter': ['Player', 'OPS', 'HR', 'AVG', 'OBP', 'SLG'],
+    'pitcher_splits_lhb': ['Player', 'ERA', 'WHIP', 'OPS', 'SO/9', 'HR.1'],
+    'pitcher_splits_rhb': ['Player', 'ERA', 'WHIP', 'OPS', 'SO/9', 'HR.1'],
+    'team_relievers': TEAM_COLUMNS + ['ERA', 'WHIP'],
+    'pitching_pitches': PLAYER_NAME_COLUMNS + ['Year', 'Date', 'FBv', 'pitch_type', 'release_speed', 'release_spin_rate', 'pfx_x', 'pfx_z', 'game_year', 'game_date'],
+    'statcast_pitches': PLAYER_NAME_COLUMNS + ['pitch_type', 'release_speed', 'release_spin_rate', 'pfx_x', 'pfx_z', 'game_year', 'game_date'],
+    'last3dayspitching': PLAYER_NAME_COLUMNS + ['Date', 'Team', 'IP'],
+    'percentile_rankings': ['player_name', 'year', 'k_percent', 'xwoba', 'brl_percent', 'fb_velocity', 'fb_spin', 'hard_hit_percent', 'xera'],
+    'expected_stats': ['last_name, first_name', 'year', 'est_woba', 'xera'],
+    'bat_tracking': ['name', 'year', 'avg_bat_speed', 'swing_length'],
+    'bat_tracking_last30': ['name', 'year', 'avg_bat_speed', 'swing_length'],
+    'swing_take': ['last_name, first_name', 'year', 'runs_all', 'runs_heart', 'runs_shadow', 'runs_chase', 'runs_waste'],
+    'pitch_movement': ['last_name, first_name', 'year', 'pitch_type', 'pitcher_break_z_induced', 'pitcher_break_x', 'pitch_per', 'spin_rate'],
+    'pitcher_running_game': ['player_name', 'year', 'runs_prevented_on_running_attr', 'rate_sbx', 'n_sb', 'n_cs'],
+    'active_spin': ['entity_name', 'year', 'active_spin_fourseam', 'active_spin_curve', 'active_spin_slider'],
+    'pitcher_arm_angles': ['pitcher_name', 'year', 'ball_angle', 'release_ball_z', 'relative_release_ball_x', 'shoulder_z', 'relative_shoulder_x'],
+    'exit_velocity': ['last_name, first_name', 'year', 'avg_hit_speed', 'max_hit_speed', 'brl_percent'],
+    'spin_direction_pitches': ['last_name, first_name', 'year', 'pitch_type', 'spin_direction', 'spin_axis'],
+    'homeruns': ['player', 'year', 'no_doubters'],
+    'battingagaisnthomeaway': TEAM_OPS_COLUMNS,
+}
+
+# Name, team and category columns are always read as strings; everything
+# else is left to the parser.
+STRING_COLUMNS = set(PLAYER_NAME_COLUMNS + TEAM_COLUMNS + [
+    'last_name, first_name', 'name', 'entity_name', 'player', 'pitch_type',
+])
+
+def clean_last3dayspitching(df):
+    df = df[df['Date'].astype(str).str[:10].str.match(r'\d{4}-\d{2}-\d{2}', na=False)].copy()
+    df['Date'] = pd.to_datetime(df['Date'].astype(str).str[:10])
+    return df
+
+# Pitch-level files (one row per pitch, or per outing) are streamed in chunks
+# of this many rows and kept only as aggregates; see PitchAggregator.
+PITCH_CHUNK_ROWS = 250_000
+# Aggregate columns and the export columns they come from.
+PITCH_KEY_ALIASES = {'Year': ['Year', 'game_year'], 'Date': ['Date', 'game_date']}
+PITCH_FEATURE_ALIASES = {
+    'velo': ['FBv', 'release_speed'],
+    'spin': ['release_spin_rate', 'spin_rate'],
+    'hmov': ['pfx_x', 'pitcher_break_x'],
+    'vmov': ['pfx_z', 'pitcher_break_z_induced'],
+}
+
+class PitchAggregator:
+    """Running per-pitcher, per-outing, per-pitch-type sums of a pitch file.
+
+    add() folds one chunk into sums and counts keyed by the player column
+    plus whichever of Team, Year, Date and pitch_type the file has, so
+    memory grows with the number of outings and pitch types, not pitches.
+    frame() gives one row per key: rows (source rows), the mean velo, spin,
+    hmov and vmov the file has, and <feature>_n, the rows each mean is
+    over. Keys keep first-seen order.
+    """
+
+    def __init__(self):
+        self.keys = None
+        self.renames = None
+        self.features = None
+        self.totals = None
+
+    def _columns(self, chunk):
+        player = next((c for c in PLAYER_NAME_COLUMNS if c in chunk.columns), None)
+        if player is None:
+            raise ValueError("no player name column")
+        self.renames = {}
+        for name, aliases in {**PITCH_KEY_ALIASES, **PITCH_FEATURE_ALIASES}.items():
+            source = next((c for c in aliases if c in chunk.columns), None)
+            if source is not None:
+                self.renames[source] = name
+        self.keys = [player] + [c for c in ('Team', 'Year', 'Date', 'pitch_type') if c in chunk.columns or c in self.renames.values()]
+        self.features = [c for c in PITCH_FEATURE_ALIASES if c in self.renames.values()]
+
+    def add(self, chunk):
+        if self.keys is None:
+            self._columns(chunk)
+        chunk = chunk.rename(columns=self.renames)
+        values = chunk[self.features].apply(pd.to_numeric, errors='coerce')
+        part = pd.concat([values.fillna(0.0), values.notna().add_suffix('_n')], axis=1)
+        part['rows'] = 1
+        grouped = part.groupby([chunk[k] for k in self.keys], sort=False, dropna=False)
+        part = grouped.sum()
+        if self.totals is not None:
+            part = pd.concat([self.totals, part]).groupby(level=self.keys, sort=False, dropna=False).sum()
+        self.totals = part
+
+    def frame(self):
+        if self.totals is None:
+            return pd.DataFrame()
+        totals = self.totals
+        out = pd.DataFrame({'rows': totals['rows']}, index=totals.index)
+        for feature in self.features:
+            n = totals[f"{feature}_n"]
+            out[feature] = totals[feature] / n.where(n > 0)
+            out[f"{feature}_n"] = n
+        return out.reset_index()
+
+def read_pitch_aggregates(path, **read_kwargs):
+    # DATASET_READERS entry: stream the file through a PitchAggregator.
+    aggregator = PitchAggregator()
+    for chunk in pd.read_csv(path, chunksize=PITCH_CHUNK_ROWS, **read_kwargs):
+        aggregator.add(chunk)
+    return aggregator.frame()
+
+# String columns with at most this share of distinct values (names, teams,
+# pitch types, dates) are stored as categoricals.
+CATEGORY_MAX_UNIQUE_RATIO = 0.5
+
+def compact_frame(df):
+    """Smaller dtypes for a freshly loaded frame, without changing any value.
+
+    Repeated strings become categoricals; int64 columns shrink to int32 when
+    they fit (no narrower, so adding two columns cannot overflow) and
+    float64 columns to float32 only when every value survives the round trip.
+    """
+    for col in df.columns:
+        values = df[col]
+        if pd.api.types.is_string_dtype(values.dtype) or values.dtype == object:
+            if len(values) and values.nunique() <= len(values) * CATEGORY_MAX_UNIQUE_RATIO:
+                df[col] = values.astype('category')
+        elif pd.api.types.is_integer_dtype(values.dtype) and values.dtype.itemsize > 4:
+            info = np.iinfo(np.int32)
+            if len(values) == 0 or (values.min() >= info.min and values.max() <= info.max):
+                df[col] = values.astype(np.int32)
+        elif pd.api.types.is_float_dtype(values.dtype) and values.dtype.itemsize > 4:
+            narrow = values.to_numpy().astype(np.float32)
+            if np.array_equal(narrow.astype(np.float64), values.to_numpy(), equal_nan=True):
+                df[col] = narrow
+    return df
+
+def parse_innings(values):
+    # Box-score innings ("5.1" = 5 1/3, "6.2" = 6 2/3) to (innings, outs),
+    # vectorized. Missing or unparseable values come back as NaN.
+    text = values.astype(str).str.strip().where(values.notna())
+    parts = text.str.partition('.')
+    whole = pd.to_numeric(parts[0], errors='coerce')
+    thirds = pd.Series(np.select([parts[2] == '1', parts[2] == '2'], [1, 2], 0), index=values.index)
+    return whole + thirds / 3, whole * 3 + thirds
+
+def is_innings_column(name, values):
+    if not (name == 'IP' or name.endswith((' IP', '_IP'))):
+        return False
+    frac = values.dropna().astype(str).str.strip().str.partition('.')[2]
+    return bool(frac.isin(['', '0', '1', '2']).all())
+
+def add_innings_columns(df):
+    # Adds <col>_float (true innings) and <col>_outs next to every IP-style
+    # column, so consumers never re-parse the box-score notation.
+    for col in [c for c in df.columns if isinstance(c, str)]:
+        if f"{col}_float" in df.columns or not is_innings_column(col, df[col]):
+            continue
+        innings, outs = parse_innings(df[col])
+        df[f"{col}_float"] = innings
+        df[f"{col}_outs"] = outs
+    return df
+
+DATASET_CLEANERS = {
+    'last3dayspitching': clean_last3dayspitching,
+    'pitching_log': clean_last3dayspitching,
+}
+# Datasets read by a function taking read_csv's arguments instead of read_csv.
+DATASET_READERS = {
+    'pitching_pitches': read_pitch_aggregates,
+    'statcast_pitches': read_pitch_aggregates,
+}
+# Datasets whose headers carry stray whitespace.
+STRIP_HEADER_DATASETS = {'last3dayspitching'}
+
+def file_hash(path):
+    h = hashlib.sha1()
+    with open(path, 'rb') as f:
+        for chunk in iter(lambda: f.read(1 << 20), b''):
+            h.update(chunk)
+    return h.hexdigest()
+
+def file_stat(path):
+    stat = os.stat(path)
+    return stat.st_size, stat.st_mtime_ns
+
+def snapshot_signature(key):
+    # Anything that changes what load() produces for the same source file.
+    return {
+        'version': SNAPSHOT_VERSION,
+        'columns': DATASET_COLUMNS.get(key),
+        'cleaner': getattr(DATASET_CLEANERS.get(key), '__name__', None),
+        'reader': getattr(DATASET_READERS.get(key), '__name__', None),
+    }
+
+def read_snapshot(cache_dir, key, fname):
+    meta_path = os.path.join(cache_dir, f"{key}.json")
+    if not os.path.isfile(meta_path):
+        return None
+    try:
+        with open(meta_path) as f:
+            meta = json.load(f)
+        if meta.get('signature') != snapshot_signature(key) or meta.get('source') != os.path.abspath(fname):
+            return None
+        stat = os.stat(fname)
+        if meta['size'] != stat.st_size:
+            return None
+        if meta['mtime_ns'] != stat.st_mtime_ns:
+            # Touched or re-exported: only trust the snapshot if the bytes match.
+            if meta['sha1'] != file_hash(fname):
+                return None
+            meta['mtime_ns'] = stat.st_mtime_ns
+            with open(meta_path, 'w') as f:
+                json.dump(meta, f)
+        data_path = os.path.join(cache_dir, meta['file'])
+        if meta['format'] == 'parquet':
+            return pd.read_parquet(data_path)
+        with open(data_path, 'rb') as f:
+            return pickle.load(f)
+    except Exception as e:
+        print(f"Warning: Ignoring snapshot for {key}: {e}")
+        return None
+
+def snapshot_meta(cache_dir, key):
+    try:
+        with open(os.path.join(cache_dir, f"{key}.json")) as f:
+            return json.load(f)
+    except (OSError, ValueError):
+        return {}
+
+def write_snapshot(cache_dir, key, fname, df, extra=None):
+    try:
+        os.makedirs(cache_dir, exist_ok=True)
+        fmt = 'pickle'
+        if pyarrow is not None:
+            try:
+                df.to_parquet(os.path.join(cache_dir, f"{key}.parquet"))
+                fmt = 'parquet'
+            except Exception:
+                pass
+        if fmt == 'pickle':
+            with open(os.path.join(cache_dir, f"{key}.pkl"), 'wb') as f:
+                pickle.dump(df, f, protocol=pickle.HIGHEST_PROTOCOL)
+        stat = os.stat(fname)
+        meta = {
+            'source': os.path.abspath(fname),
+            'size': stat.st_size,
+            'mtime_ns': stat.st_mtime_ns,
+            'sha1': file_hash(fname),
+            'signature': snapshot_signature(key),
+            'format': fmt,
+            'file': f"{key}.parquet" if fmt == 'parquet' else f"{key}.pkl",
+            **(extra or {}),
+        }
+        with open(os.path.join(cache_dir, f"{key}.json"), 'w') as f:
+            json.dump(meta, f)
+    except Exception as e:
+        print(f"Warning: Could not write snapshot for {key}: {e}")
+
+class CSVRegistry(MutableMapping):
+    """Dict-like view of the datasets that loads each CSV on first access."""
+
+    def __init__(self, files, data_dir='.', cache_dir=None):
+        self.files = dict(files)
+        self.data_dir = data_dir
+        self.cache_dir = cache_dir
+        self.frames = {}
+        # File each loaded frame came from, its (size, mtime) at load time,
+        # and sha1s already computed.
+        self.sources = {}
+        self.stats = {}
+        self.hashes = {}
+        self.headers = {}
+        self.parsed_headers = {}
+        self.failed = set()
+        self.load_log = {}
+        self.on_load = []
+        # Bumped whenever frames are replaced or dropped, so derived caches
+        # can tell they are stale.
+        self.generation = 0
+
+    def path(self, key):
+        return os.path.join(self.data_dir, self.files[key])
+
+    def available(self, key):
+        if key in self.frames:
+            return True
+        return key in self.files and key not in self.failed and os.path.isfile(self.path(key))
+
+    def header(self, key):
+        # Raw header of the file, cached so picking columns costs one read.
+        # Parsed once per distinct header line, so the same file in another
+        # day's drop costs a readline.
+        if key not in self.headers:
+            with open(self.path(key), 'rb') as f:
+                line = f.readline()
+            if line not in self.parsed_headers:
+                self.parsed_headers[line] = list(pd.read_csv(self.path(key), nrows=0).columns)
+            self.headers[key] = self.parsed_headers[line]
+        return self.headers[key]
+
+    def selected_columns(self, key):
+        strip = key in STRIP_HEADER_DATASETS
+        wanted = DATASET_COLUMNS.get(key)
+        columns = self.header(key)
+        if wanted is not None:
+            wanted = set(wanted) | set(TEAM_OPS_COLUMNS)
+            columns = [c for c in columns if (c.strip() if strip else c) in wanted]
+        return columns
+
+    def read_kwargs(self, key):
+        strip = key in STRIP_HEADER_DATASETS
+        usecols = self.selected_columns(key)
+        return {
+            'usecols': usecols if key in DATASET_COLUMNS else None,
+            'dtype': {c: str for c in usecols if (c.strip() if strip else c) in STRING_COLUMNS},
+        }
+
+    def columns(self, key):
+        # Columns the dataset will have once loaded, without loading it.
+        if key in self.frames:
+            return list(self.frames[key].columns)
+        if not self.available(key):
+            return []
+        columns = self.selected_columns(key)
+        if key in STRIP_HEADER_DATASETS:
+            columns = [c.strip() for c in columns]
+        return columns
+
+    def load(self, key):
+        if key in self.frames:
+            return self.frames[key]
+        if key not in self.files or key in self.failed:
+            return None
+        if not os.path.isfile(self.path(key)):
+            return self._commit(key, None, self._missing(key))
+        return self._commit(key, *self._read(key))
+
+    def load_many(self, keys, workers=None):
+        """Load several datasets, parsing the files on a thread pool.
+
+        Most of a load is file I/O and the C parser, which overlap across
+        threads. Results are committed in the order of `keys` whatever
+        finishes first, so frames, crosswalk IDs and warnings match a serial
+        load. Returns {key: error} for datasets that could not be loaded;
+        per-file timings are in load_log.
+        """
+        keys = [k for k in dict.fromkeys(keys) if k in self.files and k not in self.frames and k not in self.failed]
+        present = [k for k in keys if os.path.isfile(self.path(k))]
+        if workers == 1 or len(present) <= 1:
+            reads = {k: self._read(k) for k in present}
+        else:
+            with concurrent.futures.ThreadPoolExecutor(max_workers=workers) as pool:
+                futures = {k: pool.submit(self._read, k) for k in present}
+                reads = {k: f.result() for k, f in futures.items()}
+        errors = {}
+        for key in keys:
+            df, entry = reads.get(key) or (None, self._missing(key))
+            self._commit(key, df, entry)
+            if 'error' in entry:
+                errors[key] = entry['error']
+        return errors
+
+    def _missing(self, key):
+        return {'file': self.path(key), 'seconds': 0.0, 'error': 'not found'}
+
+    def _read(self, key):
+        # Read (or restore from snapshot) and clean one file. Touches no
+        # registry state beyond the header cache, so it is safe on a worker
+        # thread. Returns (frame or None, load_log entry).
+        fname = self.path(key)
+        start = time.perf_counter()
+        source = 'snapshot'
         try:
-            csv_files[key] = pd.read_csv(fname)
+            stat = file_stat(fname)
+            df = read_snapshot(self.cache_dir, key, fname) if self.cache_dir else None
+            if df is None:
+                source = 'csv'
+                df = DATASET_READERS.get(key, pd.read_csv)(fname, **self.read_kwargs(key))
+                if key in STRIP_HEADER_DATASETS:
+                    df.columns = df.columns.str.strip()
+                cleaner = DATASET_CLEANERS.get(key)
+                if cleaner is not None:
+                    df = cleaner(df)
+                df = add_innings_columns(df)
+                bytes_before = int(df.memory_usage(deep=True).sum())
+                df = compact_frame(df)
+                if self.cache_dir:
+                    write_snapshot(self.cache_dir, key, fname, df, {'bytes_before': bytes_before})
+            else:
+                bytes_before = snapshot_meta(self.cache_dir, key).get('bytes_before')
         except Exception as e:
-            print(f"Warning: Could not load {fname}: {e}")
-    else:
-        print(f"Warning: File {fname} not found. Skipping.")
+            return None, {'file': fname, 'seconds': time.perf_counter() - start, 'error': str(e)}
+        return df, {
+            'file': fname,
+            'source': source,
+            'seconds': time.perf_counter() - start,
+            'rows': len(df),
+            'columns': len(df.columns),
+            'bytes_before': bytes_before,
+            'bytes': int(df.memory_usage(deep=True).sum()),
+            'stat': stat,
+        }
 
-for key, fname in advanced_csvs.items():
-    if os.path.isfile(fname):
+    def _commit(self, key, df, entry):
+        fname = entry['file']
+        if df is None:
+            if entry['error'] == 'not found':
+                print(f"Warning: File {fname} not found. Skipping.")
+            else:
+                print(f"Warning: Could not load {fname}: {entry['error']}")
+            self.failed.add(key)
+            self.load_log[key] = entry
+            return None
+        self.frames[key] = df
+        self.sources[key] = fname
+        self.stats[key] = entry.pop('stat')
+        self.load_log[key] = entry
+        for hook in self.on_load:
+            hook(key, df)
+        return df
+
+    def file_hash(self, path):
+        if path not in self.hashes:
+            self.hashes[path] = file_hash(path)
+        return self.hashes[path]
+
+    def switch_data_dir(self, data_dir, cache_dir=None):
+        """Point at another data drop (e.g. the next day's), keeping what we can.
+
+        Loaded frames whose file in the new drop is byte-identical, or which
+        the new drop lacks, are kept along with everything derived from
+        them; the rest are dropped and load lazily from the new drop.
+        Returns the keys that were dropped.
+        """
+        dropped = []
+        for key in list(self.frames):
+            old = self.sources.get(key)
+            if old is None:
+                continue
+            new = os.path.join(data_dir, self.files[key])
+            if not os.path.isfile(new) or os.path.abspath(old) == os.path.abspath(new):
+                continue
+            if os.path.getsize(old) != os.path.getsize(new) or self.file_hash(old) != self.file_hash(new):
+                self._drop(key)
+                dropped.append(key)
+            else:
+                self.sources[key] = new
+                self.stats[key] = file_stat(new)
+        self.data_dir = data_dir
+        self.cache_dir = cache_dir
+        self.headers.clear()
+        self.failed.clear()
+        if dropped:
+            self.generation += 1
+        return dropped
+
+    def refresh(self):
+        """Pick up files changed on disk since they were loaded.
+
+        Frames whose file was modified or removed are dropped and load
+        lazily again; files that were missing or unreadable are retried.
+        Returns the keys that were dropped.
+        """
+        dropped = []
+        for key in list(self.frames):
+            fname = self.sources.get(key)
+            if fname is None:
+                continue
+            if not os.path.isfile(fname) or file_stat(fname) != self.stats.get(key):
+                self._drop(key)
+                dropped.append(key)
+        appeared = [key for key in self.failed if os.path.isfile(self.path(key))]
+        self.headers.clear()
+        self.failed.clear()
+        if dropped or appeared:
+            self.generation += 1
+        return dropped
+
+    def _drop(self, key):
+        del self.frames[key]
+        self.sources.pop(key, None)
+        self.stats.pop(key, None)
+        self.load_log.pop(key, None)
+
+    def reload(self):
+        self.generation += 1
+        self.frames.clear()
+        self.sources.clear()
+        self.stats.clear()
+        self.headers.clear()
+        self.failed.clear()
+        self.load_log.clear()
+
+    def __getitem__(self, key):
+        df = self.load(key)
+        if df is None:
+            raise KeyError(key)
+        return df
+
+    def __setitem__(self, key, df):
+        self.generation += 1
+        self.frames[key] = df
+        self.sources.pop(key, None)
+        self.stats.pop(key, None)
+        self.failed.discard(key)
+
+    def __delitem__(self, key):
+        self.generation += 1
+        del self.frames[key]
+        self.sources.pop(key, None)
+        self.stats.pop(key, None)
+
+    def __contains__(self, key):
+        return self.available(key)
+
+    def __iter__(self):
+        seen = set()
+        for key in list(self.files) + list(self.frames):
+            if key not in seen and self.available(key):
+                seen.add(key)
+                yield key
+
+    def __len__(self):
+        return sum(1 for _ in self)
+
+csv_files = CSVRegistry({**classic_csvs, **advanced_csvs, **other_csvs}, data_dir=DATA_DIR, cache_dir=CACHE_DIR)
+
+# === PROFILING ===
+
+# Full passes over a dataset, keyed by (function, dataset). Incremented where
+# a whole frame is walked (index builds, table builds, per-call filters), so
+# indexed lookups that hit a cached index cost nothing here.
+scan_counts = Counter()
+
+def count_scan(source, dataset):
+    scan_counts[(source, dataset)] += 1
+
+class StageProfiler:
+    """Wall time and peak traced memory per named stage (--profile).
+
+    Stages may repeat (one 'pitcher analysis' per game) and accumulate.
+    Disabled by default, in which case stage() only yields.
+    """
+    def __init__(self):
+        self.enabled = False
+        self.stages = {}
+        self.stack = []
+        self.started = None
+        self.peak = 0
+
+    def start(self):
+        self.enabled = True
+        self.started = time.perf_counter()
+        tracemalloc.start()
+
+    @contextlib.contextmanager
+    def stage(self, name):
+        if not self.enabled:
+            yield
+            return
+        # tracemalloc has a single peak counter: remember the enclosing
+        # stage's peak before resetting it for this one.
+        outer_peak = tracemalloc.get_traced_memory()[1]
+        if self.stack:
+            self.stack[-1][1] = max(self.stack[-1][1], outer_peak)
+        tracemalloc.reset_peak()
+        base = tracemalloc.get_traced_memory()[0]
+        frame = [name, 0]
+        self.stack.append(frame)
+        start = time.perf_counter()
         try:
-            csv_files[key] = pd.read_csv(fname)
-        except Exception as e:
-            print(f"Warning: Could not load {fname}: {e}")
-    else:
-        print(f"Warning: File {fname} not found. Skipping.")
+            yield
+        finally:
+            elapsed = time.perf_counter() - start
+            self.stack.pop()
+            peak = max(tracemalloc.get_traced_memory()[1], frame[1])
+            if self.stack:
+                self.stack[-1][1] = max(self.stack[-1][1], peak)
+            self.peak = max(self.peak, peak)
+            entry = self.stages.setdefault(name, {'calls': 0, 'seconds': 0.0, 'peak_bytes': 0, 'peak_delta_bytes': 0})
+            entry['calls'] += 1
+            entry['seconds'] += elapsed
+            entry['peak_bytes'] = max(entry['peak_bytes'], peak)
+            entry['peak_delta_bytes'] = max(entry['peak_delta_bytes'], peak - base)
 
-if os.path.isfile("last3dayspitching.csv"):
-    df = pd.read_csv("last3dayspitching.csv")
-    df.columns = df.columns.str.strip()
-    df = df[df['Date'].astype(str).str[:10].str.match(r'\d{4}-\d{2}-\d{2}', na=False)]
-    df['Date'] = pd.to_datetime(df['Date'].astype(str).str[:10])
-    csv_files['last3dayspitching'] = df
-else:
-    print("Warning: last3dayspitching.csv not found.")
+    def summary(self):
+        current, peak = tracemalloc.get_traced_memory() if tracemalloc.is_tracing() else (0, 0)
+        return {
+            'total_seconds': time.perf_counter() - self.started if self.started else None,
+            'traced_bytes': current,
+            'traced_peak_bytes': max(peak, self.peak),
+            'stages': self.stages,
+            'scans': [
+                {'function': source, 'dataset': dataset, 'scans': n}
+                for (source, dataset), n in sorted(scan_counts.items())
+            ],
+            'loads': csv_files.load_log,
+        }
+
+    def report(self, json_path=None, out=None):
+        out = out or sys.stderr
+        summary = self.summary()
+        mb = 1024 * 1024
+        print("\n=== PROFILE ===", file=out)
+        print(f"{'Stage':<20} {'Calls':>6} {'Seconds':>9} {'Peak MB':>9} {'+MB':>8}", file=out)
+        for name, entry in summary['stages'].items():
+            print(f"{name:<20} {entry['calls']:>6} {entry['seconds']:>9.3f} "
+                  f"{entry['peak_bytes'] / mb:>9.1f} {entry['peak_delta_bytes'] / mb:>8.1f}", file=out)
+        print(f"{'total':<20} {'':>6} {summary['total_seconds'] or 0:>9.3f} {summary['traced_peak_bytes'] / mb:>9.1f}", file=out)
+        print(f"\n{'Full scans':<52} {'Count':>6}", file=out)
+        for scan in summary['scans']:
+            print(f"{scan['function'] + '(' + scan['dataset'] + ')':<52} {scan['scans']:>6}", file=out)
+        print(f"\n{'Loads':<32} {'Source':<9} {'Seconds':>9} {'Rows':>8} {'KB before':>10} {'KB after':>9}", file=out)
+        for key, entry in sorted(summary['loads'].items(), key=lambda item: -item[1]['seconds']):
+            if 'error' in entry:
+                detail = f"  {entry['error']}"
+            else:
+                before = f"{entry['bytes_before'] / 1024:.0f}" if entry.get('bytes_before') is not None else '-'
+                detail = f"{entry['rows']:>8} {before:>10} {entry['bytes'] / 1024:>9.0f}"
+            print(f"{key:<32} {entry.get('source', '-'):<9} {entry['seconds']:>9.3f}{detail}", file=out)
+        if json_path:
+            with open(json_path, 'w') as f:
+                json.dump(summary, f, indent=2, default=str)
+            print(f"\nProfile written to {json_path}", file=out)
+
+profiler = StageProfiler()
 
 # === UTILITY FUNCTIONS ===
 
-def normalize_name(name):
-    if not isinstance(name, str):
-        return ""
+@functools.lru_cache(maxsize=None)
+def _normalize_str(name):
     name = name.replace('*', '').replace(',', '')
     return ''.join(
         c for c in unicodedata.normalize('NFD', name)
         if unicodedata.category(c) != 'Mn'
     ).replace('.', '').replace('-', '').replace("'", '').replace(' ', '').lower()
 
+def normalize_name(name):
+    if not isinstance(name, str):
+        return ""
+    return _normalize_str(name)
+
 def all_name_variants(name):
     name = name.strip()
     parts = [p.strip() for p in name.replace(',', '').split()]
@@ -150,36 +803,200 @@ def all_name_variants(name):
     variants.append(name)
     return set(normalize_name(v) for v in variants)
 
+ADVANCED_CSV_PLAYER_COLUMNS = {
+    'expected_stats': 'last_name, first_name',
+    'percentile_rankings': 'player_name',
+    'bat_tracking': 'name',
+    'bat_tracking_last30': 'name',
+    'swing_take': 'last_name, first_name',
+    'pitch_movement': 'last_name, first_name',
+    'pitcher_running_game': 'player_name',
+    'active_spin': 'entity_name',
+    'pitcher_arm_angles': 'pitcher_name',
+    'exit_velocity': 'last_name, first_name',
+    'spin_direction_pitches': 'last_name, first_name',
+    'homeruns': 'player',
+}
+
+# Classic (Baseball-Reference style) tables are matched on 'Player' only.
+CLASSIC_CSV_PLAYER_COLUMNS = {
+    'std_pitching': 'Player',
+    'homeandawatbatter': 'Player',
+    'pitcher_splits_lhb': 'Player',
+    'pitcher_splits_rhb': 'Player',
+}
+
+# === PLAYER CROSSWALK ===
+
+# Tokens dropped before matching, so "Ronald Acuna Jr." and "Ronald Acuña"
+# get the same ID.
+NAME_SUFFIXES = {'jr', 'sr', 'ii', 'iii', 'iv', 'v'}
+
+# First-name nicknames folded to one form before matching.
+NICKNAMES = {
+    'mike': 'michael', 'matt': 'matthew', 'chris': 'christopher', 'alex': 'alexander',
+    'nick': 'nicholas', 'zach': 'zachary', 'josh': 'joshua', 'dan': 'daniel',
+    'danny': 'daniel', 'will': 'william', 'bill': 'william', 'tom': 'thomas',
+    'tony': 'anthony', 'joe': 'joseph', 'jake': 'jacob', 'ben': 'benjamin',
+    'sam': 'samuel', 'andy': 'andrew', 'nate': 'nathan', 'rob': 'robert',
+    'bob': 'robert', 'jon': 'jonathan', 'cam': 'cameron', 'greg': 'gregory',
+    'jeff': 'jeffrey', 'steve': 'steven', 'ed': 'edward', 'eddie': 'edward',
+}
+
+# Minimum trigram (Dice) similarity for a fuzzy match.
+FUZZY_MATCH_THRESHOLD = 0.85
+
+@functools.lru_cache(maxsize=None)
+def crosswalk_key(name):
+    # "Last, First" -> "First Last", suffixes dropped, first-name nickname
+    # folded, then normalized.
+    if ',' in name:
+        last, _, first = name.partition(',')
+        name = f"{first.strip()} {last.strip()}"
+    tokens = [t for t in name.split() if normalize_name(t) not in NAME_SUFFIXES]
+    if tokens:
+        tokens[0] = NICKNAMES.get(normalize_name(tokens[0]), tokens[0])
+    return normalize_name(' '.join(tokens) if tokens else name)
+
+def _trigrams(key):
+    padded = f"  {key} "
+    return {padded[i:i + 3] for i in range(len(padded) - 2)}
+
+class PlayerCrosswalk:
+    """One player ID across every dataset, whatever its name column and format.
+
+    Datasets register their names when they load; each gets an index from
+    player ID to row positions (file order, so the first position is the row
+    a top-down scan would find). Query names resolve exactly, then through
+    the swapped-name variants, then through a trigram index for near misses.
+    """
+
+    def __init__(self):
+        self.ids = {}
+        self.names = []
+        self.ngrams = {}
+        self.ngram_counts = []
+        self.resolved = {}
+        self.dataset_indexes = {}
+
+    def add(self, name):
+        if not isinstance(name, str):
+            return None
+        key = crosswalk_key(name)
+        if not key:
+            return None
+        player_id = self.ids.get(key)
+        if player_id is None:
+            player_id = len(self.names)
+            self.ids[key] = player_id
+            self.names.append(name)
+            grams = _trigrams(key)
+            self.ngram_counts.append(len(grams))
+            for gram in grams:
+                self.ngrams.setdefault(gram, []).append(player_id)
+            # A name that missed before may match now.
+            self.resolved.clear()
+        return player_id
+
+    def add_names(self, names):
+        # Vectorized over the distinct names: returns a Series of IDs.
+        unique = pd.unique(names.to_numpy())
+        mapping = {name: self.add(name) for name in unique}
+        return names.map(mapping).astype('Int64')
+
+    def fuzzy(self, key):
+        grams = _trigrams(key)
+        shared = {}
+        for gram in grams:
+            for player_id in self.ngrams.get(gram, ()):
+                shared[player_id] = shared.get(player_id, 0) + 1
+        best, best_score = None, 0.0
+        for player_id, count in shared.items():
+            score = 2 * count / (len(grams) + self.ngram_counts[player_id])
+            if score > best_score:
+                best, best_score = player_id, score
+        return best if best_score >= FUZZY_MATCH_THRESHOLD else None
+
+    def resolve(self, name):
+        if not isinstance(name, str):
+            return None
+        if name in self.resolved:
+            return self.resolved[name]
+        player_id = self.ids.get(crosswalk_key(name))
+        if player_id is None:
+            for variant in sorted(all_name_variants(name)):
+                player_id = self.ids.get(variant)
+                if player_id is not None:
+                    break
+        if player_id is None and crosswalk_key(name):
+            player_id = self.fuzzy(crosswalk_key(name))
+        self.resolved[name] = player_id
+        return player_id
+
+    def dataset_index(self, csv_key, df, name_column):
+        cached = self.dataset_indexes.get((csv_key, name_column))
+        if cached is None or cached[0] is not df:
+            count_scan('dataset_index', csv_key)
+            ids = self.add_names(df[name_column]).tolist()
+            years = df['year'].astype(str).tolist() if 'year' in df.columns else None
+            index = {}
+            for pos, player_id in enumerate(ids):
+                if player_id is pd.NA:
+                    continue
+                index.setdefault(player_id, []).append(pos)
+                if years is not None:
+                    index.setdefault((player_id, years[pos]), []).append(pos)
+            cached = (df, index)
+            self.dataset_indexes[(csv_key, name_column)] = cached
+        return cached[1]
+
+    def first_position(self, csv_key, df, name_column, player_name, year=None):
+        index = self.dataset_index(csv_key, df, name_column)
+        player_id = self.resolve(player_name)
+        if player_id is None:
+            return None
+        use_year = year is not None and 'year' in df.columns
+        hits = index.get((player_id, str(year)) if use_year else player_id)
+        return hits[0] if hits else None
+
+player_crosswalk = PlayerCrosswalk()
+
+def player_name_column(key, df=None):
+    name_column = ADVANCED_CSV_PLAYER_COLUMNS.get(key) or CLASSIC_CSV_PLAYER_COLUMNS.get(key)
+    if name_column is None and df is not None:
+        name_column = next((c for c in PLAYER_NAME_COLUMNS if c in df.columns), None)
+    return name_column
+
+def index_loaded_dataset(key, df):
+    name_column = player_name_column(key, df)
+    if name_column is not None and name_column in df.columns:
+        player_crosswalk.dataset_index(key, df, name_column)
+
+csv_files.on_load.append(index_loaded_dataset)
+
+def player_ids(df, name_column):
+    return player_crosswalk.add_names(df[name_column])
+
+def row_at(df, pos):
+    # Same row object df.iterrows() would yield (Python scalars, not numpy).
+    return next(df.iloc[pos:pos + 1].iterrows())[1]
+
 def advanced_csv_lookup(player_name, df, csv_key=None, year=None):
-    ADVANCED_CSV_PLAYER_COLUMNS = {
-        'expected_stats': 'last_name, first_name',
-        'percentile_rankings': 'player_name',
-        'bat_tracking': 'name',
-        'bat_tracking_last30': 'name',
-        'swing_take': 'last_name, first_name',
-        'pitch_movement': 'last_name, first_name',
-        'pitcher_running_game': 'player_name',
-        'active_spin': 'entity_name',
-        'pitcher_arm_angles': 'pitcher_name',
-        'exit_velocity': 'last_name, first_name',
-        'spin_direction_pitches': 'last_name, first_name',
-        'homeruns': 'player',
-    }
     if csv_key is not None and csv_key in ADVANCED_CSV_PLAYER_COLUMNS:
         name_column = ADVANCED_CSV_PLAYER_COLUMNS[csv_key]
     else:
         name_column = 'last_name, first_name'
     if name_column not in df.columns:
         raise KeyError(f"Column '{name_column}' not found in DataFrame for {csv_key}")
-    norm_variants = all_name_variants(player_name)
-    for idx, row in df.iterrows():
-        csv_name = row[name_column]
-        norm_csv_name = normalize_name(csv_name)
-        if norm_csv_name in norm_variants:
-            if year is not None and 'year' in row and str(row['year']) != str(year):
-                continue
-            return row
-    return None
+    pos = player_crosswalk.first_position(csv_key, df, name_column, player_name, year=year)
+    return None if pos is None else row_at(df, pos)
+
+def classic_csv_lookup(player_name, df, csv_key):
+    name_column = CLASSIC_CSV_PLAYER_COLUMNS.get(csv_key, 'Player')
+    if name_column not in df.columns:
+        return None
+    pos = player_crosswalk.first_position(csv_key, df, name_column, player_name)
+    return None if pos is None else row_at(df, pos)
 
 def get_percentile(player_name, stat):
     stat_map = {
@@ -217,16 +1034,16 @@ def get_classic_pitcher_stats(player_name):
     df = csv_files.get('std_pitching')
     if df is None:
         return {}
-    for idx, row in df.iterrows():
-        if normalize_name(row.get('Player', '')) == normalize_name(player_name):
-            return {
-                'ERA': row.get('ERA', None),
-                'WHIP': row.get('WHIP', None),
-                'IP': row.get('IP', None),
-                'K/9': row.get('SO9', None),
-                'BB/9': row.get('BB9', None),
-                'HR/9': row.get('HR9', None),
-            }
+    row = classic_csv_lookup(player_name, df, 'std_pitching')
+    if row is not None:
+        return {
+            'ERA': row.get('ERA', None),
+            'WHIP': row.get('WHIP', None),
+            'IP': row.get('IP', None),
+            'K/9': row.get('SO9', None),
+            'BB/9': row.get('BB9', None),
+            'HR/9': row.get('HR9', None),
+        }
     return {}
 def get_pitcher_arm_angle(player_name):
     df = csv_files.get('pitcher_arm_angles')
@@ -274,15 +1091,15 @@ def get_classic_hitter_stats(player_name):
     df = csv_files.get('homeandawatbatter')
     if df is None:
         return {}
-    for idx, row in df.iterrows():
-        if normalize_name(row.get('Player', '')) == normalize_name(player_name):
-            return {
-                'OPS': row.get('OPS', None),
-                'HR': row.get('HR', None),
-                'AVG': row.get('AVG', None),
-                'OBP': row.get('OBP', None),
-                'SLG': row.get('SLG', None),
-            }
+    row = classic_csv_lookup(player_name, df, 'homeandawatbatter')
+    if row is not None:
+        return {
+            'OPS': row.get('OPS', None),
+            'HR': row.get('HR', None),
+            'AVG': row.get('AVG', None),
+            'OBP': row.get('OBP', None),
+            'SLG': row.get('SLG', None),
+        }
     return {}
 
 def get_bat_tracking(player_name, recent=False):
@@ -329,23 +1146,26 @@ def get_pitch_movement(player_name, pitch_type='FF'):
     return {}
 
 def get_pitcher_vs_hand_stats(pitcher_name, batter_hand):
-    if batter_hand == 'L':
-        df = csv_files.get('pitcher_splits_lhb')
-    else:
-        df = csv_files.get('pitcher_splits_rhb')
+    csv_key = 'pitcher_splits_lhb' if batter_hand == 'L' else 'pitcher_splits_rhb'
+    df = csv_files.get(csv_key)
     if df is None:
         return {}
-    for idx, row in df.iterrows():
-        if normalize_name(row.get('Player', '')) == normalize_name(pitcher_name):
-            return {
-                'ERA': row.get('ERA', None),
-                'WHIP': row.get('WHIP', None),
-                'OPS': row.get('OPS', None),
-                'K/9': row.get('SO/9', None),
-                'HR/9': row.get('HR.1', None),
-            }
+    row = classic_csv_lookup(pitcher_name, df, csv_key)
+    if row is not None:
+        return {
+            'ERA': row.get('ERA', None),
+            'WHIP': row.get('WHIP', None),
+            'OPS': row.get('OPS', None),
+            'K/9': row.get('SO/9', None),
+            'HR/9': row.get('HR.1', None),
+        }
     return {}
 
+# A lineup with at least this many hitters from one side, against a pitcher
+# allowing more than this OPS to that side, is a VULNERABLE platoon matchup.
+PLATOON_STACK_MIN = 5
+PLATOON_OPS_CUTOFF = 0.800
+
 def platoon_matchup_analysis(pitcher_name, opp_lineup_handedness):
     lhb_count = opp_lineup_handedness.count('L')
     rhb_count = opp_lineup_handedness.count('R')
@@ -358,21 +1178,33 @@ def platoon_matchup_analysis(pitcher_name, opp_lineup_handedness):
         return "No handedness data for lineup."
     expected_ops = (lhb_count * lhb_ops + rhb_count * rhb_ops) / total
     notes = []
-    if lhb_count >= 5 and lhb_ops > 0.800:
+    if lhb_count >= PLATOON_STACK_MIN and lhb_ops > PLATOON_OPS_CUTOFF:
         notes.append(f"VULNERABLE: {lhb_count} LHB vs pitcher OPS {lhb_ops:.3f}")
-    if rhb_count >= 5 and rhb_ops > 0.800:
+    if rhb_count >= PLATOON_STACK_MIN and rhb_ops > PLATOON_OPS_CUTOFF:
         notes.append(f"VULNERABLE: {rhb_count} RHB vs pitcher OPS {rhb_ops:.3f}")
     return f"Expected lineup OPS vs this pitcher: {expected_ops:.3f}" + (" | " + "; ".join(notes) if notes else "")
 
 # === BULLPEN AND TRIGGER LOGIC ===
 
+# {'df': team_relievers frame, 'stats': {team_abbr: get_team_bullpen_stats result}}
+team_bullpen_cache = {}
+
 def get_team_bullpen_stats(team_abbr):
     df = csv_files.get('team_relievers')
     if df is None:
         return {}
+    if team_bullpen_cache.get('df') is not df:
+        team_bullpen_cache.update(df=df, stats={})
+    stats = team_bullpen_cache['stats']
+    if team_abbr not in stats:
+        stats[team_abbr] = _team_bullpen_stats(df, team_abbr)
+    return dict(stats[team_abbr])
+
+def _team_bullpen_stats(df, team_abbr):
     full_team_name = TEAM_ABBR_TO_NAME.get(team_abbr, team_abbr)
     for col in ['Team', 'Tm', 'team', 'TEAM']:
         if col in df.columns:
+            count_scan('get_team_bullpen_stats', 'team_relievers')
             row = df[(df[col] == team_abbr) | (df[col] == full_team_name)]
             if not row.empty:
                 row = row.iloc[0]
@@ -383,58 +1215,125 @@ def get_team_bullpen_stats(team_abbr):
     print("No valid team column found in team_relievers CSV! Columns are:", list(df.columns))
     return {}
 
-def get_recent_relievers_for_team(team_abbr, last3days_df):
-    team_df = last3days_df[last3days_df['Team'] == team_abbr].copy()
-    def ip_to_float(ip):
-        if pd.isna(ip): return 0.0
-        ip = str(ip)
-        if '.' in ip:
-            whole, frac = ip.split('.')
-            return float(whole) + (1 if frac == '1' else 2 if frac == '2' else 0)/3
-        return float(ip)
-    team_df['IP_float'] = team_df['IP'].apply(ip_to_float)
-    reliever_mask = team_df.groupby('Player')['IP_float'].max() <= 2.0
-    relievers = reliever_mask[reliever_mask].index.tolist()
-    return relievers
-
-def last_3_days_usage(reliever_name):
-    df = csv_files['last3dayspitching']
+TIRED_THRESHOLD_IP = 2.0
+TIRED_THRESHOLD_APP = 2
+RELIEVER_MAX_IP = 2.0
+
+# {'df': source frame, 'fatigue': build_bullpen_fatigue() result}
+bullpen_fatigue_cache = {}
+
+def _consecutive_days(offsets, keys):
+    # Days in a row pitched, counting back from the latest date in the file.
+    # Each pitcher's day offsets are packed into a bitmask; the streak is the
+    # run of low 1 bits.
+    valid = offsets.notna().to_numpy()
+    frame = pd.DataFrame({f"k{i}": k.to_numpy()[valid] for i, k in enumerate(keys)})
+    frame['offset'] = offsets.to_numpy()[valid].astype('int64').clip(0, 62)
+    frame = frame.drop_duplicates()
+    frame['bit'] = np.left_shift(np.int64(1), frame['offset'].to_numpy())
+    mask = frame.groupby([f"k{i}" for i in range(len(keys))], observed=True)['bit'].sum()
+    lowest_zero = (~mask) & (mask + 1)
+    return pd.Series(np.log2(lowest_zero.to_numpy()).astype(int), index=mask.index)
+
+def build_bullpen_fatigue(last3days_df):
+    """One pass over the last-3-days pitching lines.
+
+    Returns {'usage': per-pitcher (crosswalk player ID) IP, appearances,
+    consecutive days and tired flag; 'team': the same per (Team, Player);
+    'relievers_by_team': {team: [Player, ...]} for pitchers whose longest
+    outing was RELIEVER_MAX_IP or less}.
+    """
+    df = last3days_df
+    count_scan('build_bullpen_fatigue', 'last3dayspitching')
     for player_col in ['Player', 'Name', 'player_name', 'Pitcher', 'pitcher_name']:
         if player_col in df.columns:
             break
     else:
         print("No player name column found in last3dayspitching!")
-        return {'ip': 0.0, 'appearances': 0}
-    mask = df[player_col].apply(normalize_name) == normalize_name(reliever_name)
-    reliever_rows = df[mask]
-    def ip_to_float(ip):
-        if pd.isna(ip): return 0.0
-        ip = str(ip)
-        if '.' in ip:
-            whole, frac = ip.split('.')
-            return float(whole) + (1 if frac == '1' else 2 if frac == '2' else 0)/3
-        return float(ip)
-    total_ip = reliever_rows['IP'].apply(ip_to_float).sum()
-    appearances = reliever_rows.shape[0]
-    return {'ip': total_ip, 'appearances': appearances}
+        player_col = None
+    if 'IP_float' in df.columns:
+        ip = df['IP_float'].fillna(0.0)
+    elif 'IP' in df.columns:
+        ip = parse_innings(df['IP'])[0].fillna(0.0)
+    else:
+        ip = pd.Series(0.0, index=df.index)
+    dates = pd.to_datetime(df['Date'], errors='coerce') if 'Date' in df.columns else pd.Series(pd.NaT, index=df.index)
+    offsets = (dates.max() - dates).dt.days
+
+    usage = pd.DataFrame(columns=['ip', 'appearances', 'consecutive_days', 'tired'])
+    if player_col is not None:
+        key = player_ids(df, player_col)
+        grouped = ip.groupby(key)
+        usage = pd.DataFrame({'ip': grouped.sum(), 'appearances': grouped.size()})
+        usage['consecutive_days'] = _consecutive_days(offsets, [key]).reindex(usage.index, fill_value=0)
+        usage['tired'] = (usage['ip'] > TIRED_THRESHOLD_IP) | (usage['appearances'] > TIRED_THRESHOLD_APP)
+
+    team = pd.DataFrame(columns=['ip', 'appearances', 'max_ip', 'consecutive_days', 'reliever', 'tired'])
+    relievers_by_team = {}
+    if 'Player' in df.columns and 'Team' in df.columns:
+        keys = [df['Team'], df['Player']]
+        # Team/Player are categoricals after compact_frame; only group the
+        # pairs that occur, not every Team x Player combination.
+        grouped = ip.groupby(keys, observed=True)
+        team = pd.DataFrame({'ip': grouped.sum(), 'appearances': grouped.size(), 'max_ip': grouped.max()})
+        team['consecutive_days'] = _consecutive_days(offsets, keys).reindex(team.index, fill_value=0)
+        team['reliever'] = team['max_ip'] <= RELIEVER_MAX_IP
+        team['tired'] = (team['ip'] > TIRED_THRESHOLD_IP) | (team['appearances'] > TIRED_THRESHOLD_APP)
+        relievers = team[team['reliever']]
+        for team_abbr, players in relievers.index.to_frame(index=False).groupby('Team', sort=False, observed=True)['Player']:
+            relievers_by_team[team_abbr] = players.tolist()
+    return {'usage': usage, 'team': team, 'relievers_by_team': relievers_by_team}
+
+def get_bullpen_fatigue(last3days_df=None, lookback=None):
+    # With a lookback (argument or --bullpen-days) and a pitching log on disk,
+    # fatigue comes from the log's rolling window; otherwise from
+    # last3dayspitching.csv as before.
+    if last3days_df is None and use_pitching_log(lookback):
+        return get_pitching_log().fatigue(lookback or BULLPEN_LOOKBACK)
+    if last3days_df is None:
+        last3days_df = csv_files['last3dayspitching']
+    if bullpen_fatigue_cache.get('df') is not last3days_df:
+        bullpen_fatigue_cache['df'] = last3days_df
+        bullpen_fatigue_cache['fatigue'] = build_bullpen_fatigue(last3days_df)
+    return bullpen_fatigue_cache['fatigue']
+
+def bullpen_window_days(lookback=None):
+    # Days the fatigue figures cover; last3dayspitching.csv holds three.
+    return (lookback or BULLPEN_LOOKBACK) if use_pitching_log(lookback) else 3
+
+def bullpen_data_available(lookback=None):
+    return use_pitching_log(lookback) or 'last3dayspitching' in csv_files
+
+def get_recent_relievers_for_team(team_abbr, last3days_df=None, lookback=None):
+    return list(get_bullpen_fatigue(last3days_df, lookback)['relievers_by_team'].get(team_abbr, []))
+
+def last_3_days_usage(reliever_name, lookback=None):
+    usage = get_bullpen_fatigue(lookback=lookback)['usage']
+    key = player_crosswalk.resolve(reliever_name)
+    if key is None or key not in usage.index:
+        return {'ip': 0.0, 'appearances': 0, 'consecutive_days': 0}
+    row = usage.loc[key]
+    return {'ip': float(row['ip']), 'appearances': int(row['appearances']), 'consecutive_days': int(row['consecutive_days'])}
 
 class BullpenAnalysis:
-    def __init__(self, reliever_names, team):
+    def __init__(self, reliever_names, team, lookback=None):
         self.reliever_names = reliever_names
         self.team = team
+        self.lookback = lookback
         self.stats = []
         self.risk = False
 
     def analyze(self):
-        tired_threshold_ip = 2.0
-        tired_threshold_app = 2
+        tired_threshold_ip = TIRED_THRESHOLD_IP
+        tired_threshold_app = TIRED_THRESHOLD_APP
         for name in self.reliever_names:
-            usage = last_3_days_usage(name)
+            usage = last_3_days_usage(name, self.lookback)
             tired = usage['ip'] > tired_threshold_ip or usage['appearances'] > tired_threshold_app
             self.stats.append({
                 'name': name,
                 'ip_last3': usage['ip'],
                 'appearances_last3': usage['appearances'],
+                'consecutive_days': usage['consecutive_days'],
                 'tired': tired
             })
         self.risk = any(r['tired'] for r in self.stats)
@@ -445,34 +1344,330 @@ class BullpenAnalysis:
             'relievers': self.stats
         }
 
-def get_recent_team_ops(days=7):
-    for key, df in csv_files.items():
-        if not isinstance(df, pd.DataFrame):
-            continue
-        if 'Date' in df.columns and 'Team' in df.columns:
+# === PITCHING GAME LOG ===
+
+# Lookbacks (days) the pitching log keeps rolling totals for.
+FATIGUE_LOOKBACKS = (3, 5, 7)
+# Bullpen fatigue lookback; None reads last3dayspitching.csv as before. The
+# TIRED_* thresholds apply unchanged whatever the lookback.
+BULLPEN_LOOKBACK = None
+RELIEVER_MAX_OUTS = int(RELIEVER_MAX_IP * 3)
+
+def pitching_lines(df):
+    # Date/Team/Player/IP lines from a last3dayspitching-style export: header
+    # whitespace stripped, repeated header rows and undated lines dropped,
+    # "2025-06-01 (G1)" dates cut to the day, outs parsed from IP.
+    df = df.rename(columns=lambda c: c.strip() if isinstance(c, str) else c)
+    missing = [c for c in ['Date', 'Team', 'Player', 'IP'] if c not in df.columns]
+    if missing:
+        raise ValueError(f"pitching lines need {missing} columns")
+    df = clean_last3dayspitching(df)
+    df = df[df['Team'].notna() & df['Player'].notna()]
+    outs = df['IP_outs'] if 'IP_outs' in df.columns else parse_innings(df['IP'])[1]
+    return pd.DataFrame({
+        'Date': df['Date'].dt.normalize(),
+        'Team': df['Team'].astype(str),
+        'Player': df['Player'].astype(str),
+        'IP': df['IP'].astype(str).str.strip().where(df['IP'].notna(), ''),
+        'outs': outs.fillna(0).astype(int),
+    })
+
+class PitchingLogStore:
+    """Append-only pitching game log with rolling bullpen-usage windows.
+
+    Lines are keyed by (player ID, date, team); a line already in the log is
+    skipped, so re-ingesting an overlapping export is harmless. For every
+    lookback in `lookbacks` the store keeps outs, appearances and long
+    outings per (Team, Player) over the days ending on the latest logged
+    date, updated as days arrive and slide out. Ingesting touches only the
+    new lines and the days leaving each window; only the last
+    max(lookbacks) days are held per line.
+    """
+
+    def __init__(self, path=None, lookbacks=FATIGUE_LOOKBACKS):
+        self.path = path
+        self.lookbacks = tuple(sorted(set(lookbacks)))
+        self.keys = set()
+        # day -> {(Team, Player): [outs, appearances, long outings]}
+        self.days = {}
+        self.latest = None
+        self.windows = {n: {} for n in self.lookbacks}
+        self.player_id = {}
+        self.version = 0
+        self.fatigue_cache = {}
+
+    def ingest(self, df, append=True):
+        """Add pitching lines (any number of days). Returns (new, duplicates).
+
+        New lines are appended to the log file unless append is False.
+        """
+        return self._ingest_lines(pitching_lines(df), append)
+
+    def replay(self, df):
+        """Rebuild from the log file's own lines (nothing is appended).
+
+        Every line is remembered as a duplicate key, but only the days the
+        longest window still reaches go through the windows; older days
+        would slide straight back out.
+        """
+        lines = pitching_lines(df)
+        if lines.empty:
+            return 0, 0
+        recent = (lines['Date'] > lines['Date'].max() - pd.Timedelta(days=self.lookbacks[-1])).to_numpy()
+        old = lines[~recent]
+        ids = player_ids(old, 'Player')
+        self.keys.update(key for key in zip(ids.tolist(), old['Date'].tolist(), old['Team'].tolist()) if key[0] is not pd.NA)
+        return self._ingest_lines(lines[recent], append=False)
+
+    def _ingest_lines(self, lines, append):
+        ids = player_ids(lines, 'Player')
+        fresh = []
+        for pos, key in enumerate(zip(ids.tolist(), lines['Date'].tolist(), lines['Team'].tolist())):
+            if key[0] is pd.NA or key in self.keys:
+                continue
+            self.keys.add(key)
+            fresh.append(pos)
+        new = lines.iloc[fresh]
+        if new.empty:
+            return 0, len(lines)
+        if append and self.path:
+            self._append(new)
+        new_ids = ids.iloc[fresh].tolist()
+        rows = zip(new['Date'].tolist(), new['Team'].tolist(), new['Player'].tolist(), new_ids, new['outs'].tolist())
+        by_day = {}
+        for day, team, player, player_id, outs in rows:
+            self.player_id[(team, player)] = player_id
+            by_day.setdefault(day, []).append(((team, player), outs))
+        for day in sorted(by_day):
+            self._add_day(day, by_day[day])
+        self.version += 1
+        self.fatigue_cache.clear()
+        return len(new), len(lines) - len(new)
+
+    def ingest_file(self, path):
+        return self.ingest(pd.read_csv(path, dtype=str))
+
+    def _append(self, lines):
+        out = lines[['Date', 'Team', 'Player', 'IP']].copy()
+        out['Date'] = out['Date'].dt.strftime('%Y-%m-%d')
+        header = not os.path.isfile(self.path) or os.path.getsize(self.path) == 0
+        out.to_csv(self.path, mode='a', header=header, index=False)
+
+    def _window_change(self, totals, key, values, sign):
+        entry = totals.setdefault(key, [0, 0, 0])
+        for i, value in enumerate(values):
+            entry[i] += sign * value
+        if entry[1] <= 0:
+            del totals[key]
+
+    def _add_day(self, day, lines):
+        if self.latest is None or day > self.latest:
+            self._advance(day)
+        oldest = self.latest - pd.Timedelta(days=self.lookbacks[-1])
+        if day <= oldest:
+            return
+        bucket = self.days.setdefault(day, {})
+        for key, outs in lines:
+            values = (outs, 1, int(outs > RELIEVER_MAX_OUTS))
+            self._window_change(bucket, key, values, 1)
+            for n, totals in self.windows.items():
+                if day > self.latest - pd.Timedelta(days=n):
+                    self._window_change(totals, key, values, 1)
+
+    def _advance(self, day):
+        # Slide every window forward so it ends on `day`, then forget days no
+        # window reaches any more.
+        if self.latest is not None:
+            for n, totals in self.windows.items():
+                start, end = self.latest - pd.Timedelta(days=n), day - pd.Timedelta(days=n)
+                for old, bucket in self.days.items():
+                    if start < old <= end:
+                        for key, values in bucket.items():
+                            self._window_change(totals, key, values, -1)
+        self.latest = day
+        oldest = day - pd.Timedelta(days=self.lookbacks[-1])
+        for old in [d for d in self.days if d <= oldest]:
+            del self.days[old]
+
+    def _streaks(self, lookback, key):
+        # Days in a row pitched, counting back from the latest logged day.
+        streaks = {}
+        for back in range(lookback):
+            day = self.latest - pd.Timedelta(days=back)
+            for k in {key(pair) for pair in self.days.get(day, ())}:
+                if streaks.get(k, 0) == back:
+                    streaks[k] = back + 1
+        return streaks
+
+    def fatigue(self, lookback):
+        """Same shape as build_bullpen_fatigue(), over the last `lookback` days.
+
+        'team' carries long_outings (appearances over RELIEVER_MAX_IP) instead
+        of max_ip, since a maximum cannot be slid out of a window.
+        """
+        if lookback not in self.windows:
+            raise ValueError(f"lookback must be one of {self.lookbacks}, not {lookback}")
+        if lookback in self.fatigue_cache:
+            return self.fatigue_cache[lookback]
+        totals = self.windows[lookback]
+        keys = sorted(totals)
+        values = np.array([totals[k] for k in keys], dtype='int64').reshape(-1, 3)
+        index = pd.MultiIndex.from_tuples(keys, names=['Team', 'Player']) if keys else pd.MultiIndex.from_tuples([], names=['Team', 'Player'])
+        team = pd.DataFrame({'outs': values[:, 0], 'appearances': values[:, 1], 'long_outings': values[:, 2]}, index=index)
+        streaks = self._streaks(lookback, lambda pair: pair) if keys else {}
+        team['consecutive_days'] = [streaks.get(k, 0) for k in keys]
+
+        ids = pd.Series([self.player_id[k] for k in keys], index=index, dtype='int64')
+        grouped = team[['outs', 'appearances']].groupby(ids.to_numpy())
+        usage = grouped.sum()
+        streaks = self._streaks(lookback, self.player_id.get) if keys else {}
+        usage['consecutive_days'] = [streaks.get(k, 0) for k in usage.index]
+        for frame in (usage, team):
+            frame.insert(0, 'ip', frame.pop('outs') / 3)
+            frame['tired'] = (frame['ip'] > TIRED_THRESHOLD_IP) | (frame['appearances'] > TIRED_THRESHOLD_APP)
+        team.insert(len(team.columns) - 1, 'reliever', team['long_outings'] == 0)
+
+        relievers_by_team = {}
+        for (team_abbr, player) in team.index[team['reliever'].to_numpy()]:
+            relievers_by_team.setdefault(team_abbr, []).append(player)
+        fatigue = {'usage': usage, 'team': team, 'relievers_by_team': relievers_by_team}
+        self.fatigue_cache[lookback] = fatigue
+        return fatigue
+
+# {'df': log frame it was built from, 'store': PitchingLogStore}
+pitching_log_cache = {}
+
+def get_pitching_log():
+    df = csv_files.load('pitching_log') if 'pitching_log' in csv_files else None
+    if 'store' not in pitching_log_cache or pitching_log_cache['df'] is not df:
+        store = PitchingLogStore(csv_files.path('pitching_log'))
+        if df is not None:
+            store.replay(df)
+        pitching_log_cache.update(df=df, store=store)
+    return pitching_log_cache['store']
+
+def use_pitching_log(lookback=None):
+    return (lookback or BULLPEN_LOOKBACK) is not None and 'pitching_log' in csv_files
+
+def ingest_pitching_files(paths):
+    store = get_pitching_log()
+    for path in paths:
+        new, duplicates = store.ingest_file(path)
+        print(f"{path}: {new} new lines, {duplicates} duplicates skipped.")
+    if store.latest is not None:
+        print(f"Pitching log {store.path} runs through {store.latest:%Y-%m-%d}.")
+    return store
+
+# === TEAM FORM ===
+
+TEAM_FORM_WINDOWS = (3, 7, 14, 30)
+
+# Per-team, per-day OPS sums/counts with running totals, built once from the
+# source dataset: {'generation': csv_files.generation, 'source': key,
+# 'daily': DataFrame}.
+team_form_state = {}
+# (source, window, as-of day) -> {team: mean OPS}
+team_form_cache = {}
+
+def _team_form_daily(key, df):
+    # Row-level OPS exactly as before, then summed per team and day. Works on
+    # copies; the shared frame in csv_files is never modified.
+    if 'OBP' in df.columns and 'SLG' in df.columns:
+        ops = pd.to_numeric(df['OBP'], errors='coerce') + pd.to_numeric(df['SLG'], errors='coerce')
+    elif {'H', 'BB', 'AB', 'TB'}.issubset(df.columns):
+        h, bb, ab, tb = (pd.to_numeric(df[c], errors='coerce') for c in ('H', 'BB', 'AB', 'TB'))
+        ops = (h + bb) / (ab + bb) + tb / ab
+    else:
+        return None
+    count_scan('get_team_form', key)
+    dates = pd.to_datetime(df['Date'], errors='coerce').dt.normalize()
+    rows = pd.DataFrame({'Team': df['Team'].to_numpy(), 'Date': dates.to_numpy(), 'ops': ops.to_numpy()})
+    rows = rows.dropna(subset=['Team', 'Date'])
+    rows['n'] = rows['ops'].notna().astype(int)
+    daily = rows.groupby(['Team', 'Date'], sort=True).agg(ops_sum=('ops', 'sum'), n=('n', 'sum')).reset_index()
+    grouped = daily.groupby('Team', sort=False)
+    daily['cum_ops'] = grouped['ops_sum'].cumsum()
+    daily['cum_n'] = grouped['n'].cumsum()
+    return daily
+
+def _team_form_source():
+    if team_form_state.get('generation') == csv_files.generation:
+        return team_form_state if team_form_state.get('source') else None
+    team_form_state.clear()
+    team_form_cache.clear()
+    team_form_state['generation'] = csv_files.generation
+    for key in csv_files:
+        columns = csv_files.columns(key)
+        if 'Date' in columns and 'Team' in columns:
+            df = csv_files.get(key)
+            if df is None:
+                continue
             print(f"Using {key} for recent OPS calculation.")
             try:
-                df['Date'] = pd.to_datetime(df['Date'], errors='coerce')
-                cutoff = pd.Timestamp.now() - pd.Timedelta(days=days)
-                recent = df[df['Date'] >= cutoff]
-                if 'OBP' in recent.columns and 'SLG' in recent.columns:
-                    recent['OPS'] = pd.to_numeric(recent['OBP'], errors='coerce') + pd.to_numeric(recent['SLG'], errors='coerce')
-                elif {'H', 'BB', 'AB', 'TB'}.issubset(recent.columns):
-                    recent['OBP'] = (pd.to_numeric(recent['H'], errors='coerce') + pd.to_numeric(recent['BB'], errors='coerce')) / (pd.to_numeric(recent['AB'], errors='coerce') + pd.to_numeric(recent['BB'], errors='coerce'))
-                    recent['SLG'] = pd.to_numeric(recent['TB'], errors='coerce') / pd.to_numeric(recent['AB'], errors='coerce')
-                    recent['OPS'] = recent['OBP'] + recent['SLG']
-                else:
-                    print(f"{key} does not have OBP/SLG or H/BB/AB/TB columns.")
-                    continue
-                team_ops = recent.groupby('Team')['OPS'].mean().to_dict()
-                return team_ops
+                daily = _team_form_daily(key, df)
             except Exception as e:
                 print(f"Error processing {key} for recent OPS: {e}")
+                continue
+            if daily is None:
+                print(f"{key} does not have OBP/SLG or H/BB/AB/TB columns.")
+                continue
+            team_form_state.update({'source': key, 'daily': daily})
+            return team_form_state
     print("No suitable CSV found for recent OPS calculation.")
-    return {}
+    return None
+
+def _cumulative_at(daily, boundaries):
+    # Running totals per team as of each boundary date (inclusive).
+    queries = pd.DataFrame({
+        'Team': np.repeat(daily['Team'].unique(), len(boundaries)),
+        'Date': np.tile(np.array(boundaries, dtype='datetime64[ns]'), daily['Team'].nunique()),
+    })
+    queries['Date'] = queries['Date'].astype(daily['Date'].dtype)
+    queries = queries.sort_values('Date', kind='stable')
+    found = pd.merge_asof(queries, daily[['Team', 'Date', 'cum_ops', 'cum_n']].sort_values('Date', kind='stable'),
+                          on='Date', by='Team', direction='backward')
+    return found.fillna({'cum_ops': 0.0, 'cum_n': 0}).set_index(['Team', 'Date'])
+
+def get_team_form(windows=TEAM_FORM_WINDOWS, as_of=None):
+    """Mean per-game OPS by team over the last N days for each N in windows.
+
+    Returns {window: {team: ops}}. A window of N days covers the N calendar
+    days ending on as_of (default: today). Results are cached per
+    (source dataset, window, as-of day).
+    """
+    as_of = (pd.Timestamp.now() if as_of is None else pd.Timestamp(as_of)).normalize()
+    store = feature_stores.get('teams')
+    if store is not None and store.meta['as_of'] == as_of.isoformat() and set(windows) <= set(store.meta['windows']):
+        return {days: store.column_dict(f"ops_{days}") for days in windows}
+    state = _team_form_source()
+    if state is None:
+        return {days: {} for days in windows}
+    missing = [days for days in windows if (state['source'], days, as_of) not in team_form_cache]
+    if missing:
+        boundaries = [as_of] + [as_of - pd.Timedelta(days=days) for days in missing]
+        cum = _cumulative_at(state['daily'], boundaries)
+        end = cum.xs(as_of, level='Date')
+        for days in missing:
+            start = cum.xs(as_of - pd.Timedelta(days=days), level='Date')
+            n = end['cum_n'] - start['cum_n']
+            ops = (end['cum_ops'] - start['cum_ops'])[n > 0] / n[n > 0]
+            team_form_cache[(state['source'], days, as_of)] = ops.to_dict()
+    return {days: team_form_cache[(state['source'], days, as_of)] for days in windows}
+
+def get_recent_team_ops(days=7, as_of=None):
+    return dict(get_team_form((days,), as_of=as_of)[days])
+
+# Firepower: FIREPOWER_MIN_HITTERS or more hitters over FIREPOWER_OPS in a
+# lineup whose team is not cold (recent team OPS under COLD_TEAM_OPS).
+FIREPOWER_OPS = 0.800
+FIREPOWER_MIN_HITTERS = 2
+COLD_TEAM_OPS = 0.700
 
 def bullpen_at_risk(bullpen, team_bullpen_stats=None):
     tired_count = sum(1 for r in bullpen.stats if r.get('tired'))
+    return tired_count_at_risk(tired_count, team_bullpen_stats)
+
+def tired_count_at_risk(tired_count, team_bullpen_stats=None):
     if tired_count >= 2:
         return True
     if team_bullpen_stats:
@@ -497,7 +1692,7 @@ def is_ace(sp):
 def is_cold(team_abbr):
     global recent_ops
     ops = recent_ops.get(team_abbr)
-    return ops is not None and ops < 0.700
+    return ops is not None and ops < COLD_TEAM_OPS
 def update_pitcher_flags_from_advanced(pitcher, adv_triggers):
     # Set vulnerable if hard hit or barrel danger trigger is True
     pitcher.is_vulnerable = bool(adv_triggers.get('hard_hit_danger') or adv_triggers.get('barrel_danger'))
@@ -507,12 +1702,45 @@ def update_pitcher_flags_from_advanced(pitcher, adv_triggers):
         adv_triggers.get('low_k_percentile')
     )
 
-def print_triggers_and_bets(
+# (bet type, report line, markets it is graded on, rule). Rules combine the
+# game features with & and ~ so the same rule fires for one game (NumPy
+# bools, see bet_features) or for a whole season of games at once (arrays).
+BET_RULES = [
+    ('over_velo_anomaly', "OVER: Home SP Velo Anomaly + Both Bullpens Tired + Both Teams Hot", ('total_over',),
+     lambda f: f['home_sp_velo_anomaly'] & f['home_bullpen_risk'] & f['home_firepower'] & f['away_firepower']),
+    ('over_fade_home_sp', "OVER: Auto-fade Home SP {home_sp} vs. strong Away lineup", ('total_over',),
+     lambda f: f['home_sp_auto_fade'] & f['away_firepower']),
+    ('over_fade_away_sp', "OVER: Auto-fade Away SP {away_sp} vs. strong Home lineup", ('total_over',),
+     lambda f: f['away_sp_auto_fade'] & f['home_firepower']),
+    ('fade_home_sp_tired_bullpen', "AWAY TEAM TOTAL OVER & AWAY MONEYLINE: Fade Home SP {home_sp} + Tired Home Bullpen", ('away_team_total_over', 'away_moneyline'),
+     lambda f: f['home_sp_auto_fade'] & f['home_bullpen_risk']),
+    ('fade_away_sp_tired_bullpen', "HOME TEAM TOTAL OVER & HOME MONEYLINE: Fade Away SP {away_sp} + Tired Away Bullpen", ('home_team_total_over', 'home_moneyline'),
+     lambda f: f['away_sp_auto_fade'] & f['away_bullpen_risk']),
+    ('under_aces', "UNDER: Both Aces pitching in a pitcher's park", ('total_under',),
+     lambda f: f['home_ace'] & f['away_ace'] & f['pitchers_park']),
+    ('under_dead_ball', "UNDER: Dead Ball Lockout conditions and cold offenses", ('total_under',),
+     lambda f: f['dead_ball_lockout'] & ~f['home_firepower'] & ~f['away_firepower']),
+    ('away_stack_platoon', "AWAY TEAM TOTAL OVER / AWAY TEAM STACK: Home SP {home_sp} is {home_platoon}", ('away_team_total_over',),
+     lambda f: f['home_sp_platoon_vulnerable']),
+    ('home_stack_platoon', "HOME TEAM TOTAL OVER / HOME TEAM STACK: Away SP {away_sp} is {away_platoon}", ('home_team_total_over',),
+     lambda f: f['away_sp_platoon_vulnerable']),
+]
+
+def bet_features(features):
+    # Plain bools to NumPy bools, so ~ is a logical not.
+    return {name: np.bool_(bool(value)) for name, value in features.items()}
+
+def evaluate_triggers_and_bets(
     home_sp, away_sp, home_hitters, away_hitters,
     home_bullpen, away_bullpen, park_factors, home_team_abbr, away_team_abbr,
     home_sp_vulnerability_score, away_sp_vulnerability_score
 ):
-    print("\n=== MODEL TRIGGERS & BETTING LOGIC ===")
+    """Model triggers and fired bets for one game, without printing.
+
+    Returns {'triggers': {name: bool}, 'home_tired': [...],
+    'away_tired': [...], 'bets': [description, ...], 'bet_types': [...]}
+    with bet_types the BET_RULES names of the bets fired.
+    """
     triggers = {}
     bets = []
 
@@ -581,11 +1809,11 @@ def print_triggers_and_bets(
 
     home_firepower = (
         not is_cold(home_team_abbr) and
-        sum(1 for h in home_hitters if h.classic.get('OPS') and float(str(h.classic['OPS']).replace('.','0.',1)) > 0.800) >= 2
+        sum(1 for h in home_hitters if h.classic.get('OPS') and float(str(h.classic['OPS']).replace('.','0.',1)) > FIREPOWER_OPS) >= FIREPOWER_MIN_HITTERS
     )
     away_firepower = (
         not is_cold(away_team_abbr) and
-        sum(1 for h in away_hitters if h.classic.get('OPS') and float(str(h.classic['OPS']).replace('.','0.',1)) > 0.800) >= 2
+        sum(1 for h in away_hitters if h.classic.get('OPS') and float(str(h.classic['OPS']).replace('.','0.',1)) > FIREPOWER_OPS) >= FIREPOWER_MIN_HITTERS
     )
 
     triggers = {
@@ -608,259 +1836,74 @@ def print_triggers_and_bets(
     "away_cold": is_cold(away_team_abbr),
 }
 
+    home_sp_platoon_analysis = platoon_matchup_analysis(home_sp.name, home_sp.opp_lineup_handedness)
+    away_sp_platoon_analysis = platoon_matchup_analysis(away_sp.name, away_sp.opp_lineup_handedness)
+    features = {
+        'home_sp_velo_anomaly': home_sp.velo_anomaly,
+        'home_sp_auto_fade': home_sp.is_auto_fade,
+        'away_sp_auto_fade': away_sp.is_auto_fade,
+        'home_ace': is_ace(home_sp),
+        'away_ace': is_ace(away_sp),
+        'home_bullpen_risk': home_bullpen_risk,
+        'away_bullpen_risk': away_bullpen_risk,
+        'home_firepower': home_firepower,
+        'away_firepower': away_firepower,
+        'pitchers_park': triggers["pitchers_park"],
+        'dead_ball_lockout': triggers["dead_ball_lockout"],
+        'home_sp_platoon_vulnerable': "VULNERABLE" in home_sp_platoon_analysis,
+        'away_sp_platoon_vulnerable': "VULNERABLE" in away_sp_platoon_analysis,
+    }
+    labels = {
+        'home_sp': home_sp.name,
+        'away_sp': away_sp.name,
+        'home_platoon': home_sp_platoon_analysis,
+        'away_platoon': away_sp_platoon_analysis,
+    }
+    features = bet_features(features)
+    fired = [(bet, label.format(**labels)) for bet, label, _, fires in BET_RULES if fires(features)]
+
+    return {
+        'triggers': triggers,
+        'home_tired': home_tired,
+        'away_tired': away_tired,
+        'bets': [label for _, label in fired],
+        'bet_types': [bet for bet, _ in fired],
+    }
+
+def print_model_result(model):
+    print("\n=== MODEL TRIGGERS & BETTING LOGIC ===")
     print("--- TRIGGERS ---")
-    for k, v in triggers.items():
+    for k, v in model['triggers'].items():
         print(f"{k}: {v}")
 
-    print("\n--- BULLPEN FATIGUE (last 3 days, full game impact only) ---")
+    home_tired, away_tired = model['home_tired'], model['away_tired']
+    print(f"\n--- BULLPEN FATIGUE (last {bullpen_window_days()} days, full game impact only) ---")
     print(f"Home bullpen tired relievers ({len(home_tired)}): {', '.join(home_tired) if home_tired else 'None'}")
     print(f"Away bullpen tired relievers ({len(away_tired)}): {', '.join(away_tired) if away_tired else 'None'}")
 
     print("\n--- BETS ---")
-    bets_fired = []
-
-    if home_sp.velo_anomaly and home_bullpen_risk and home_firepower and away_firepower:
-        bets_fired.append(f"OVER: Home SP Velo Anomaly + Both Bullpens Tired + Both Teams Hot")
-
-# Apply these changes:
-    if home_sp.is_auto_fade and away_firepower: # Use the attribute
-        bets_fired.append(f"OVER: Auto-fade Home SP {home_sp.name} vs. strong Away lineup")
-    if away_sp.is_auto_fade and home_firepower: # Use the attribute
-        bets_fired.append(f"OVER: Auto-fade Away SP {away_sp.name} vs. strong Home lineup")
-    if home_sp.is_auto_fade and home_bullpen_risk: # Use the attribute
-        bets_fired.append(f"AWAY TEAM TOTAL OVER & AWAY MONEYLINE: Fade Home SP {home_sp.name} + Tired Home Bullpen")
-    if away_sp.is_auto_fade and away_bullpen_risk: # Use the attribute
-        bets_fired.append(f"HOME TEAM TOTAL OVER & HOME MONEYLINE: Fade Away SP {away_sp.name} + Tired Away Bullpen")
-
-# Keep is_ace as a global function call, as you prefer:
-    if is_ace(home_sp) and is_ace(away_sp) and triggers["pitchers_park"]:
-        bets_fired.append(f"UNDER: Both Aces pitching in a pitcher's park")
-
-    if triggers["dead_ball_lockout"] and not home_firepower and not away_firepower:
-        bets_fired.append(f"UNDER: Dead Ball Lockout conditions and cold offenses")
-    
-    home_sp_platoon_analysis = platoon_matchup_analysis(home_sp.name, away_lineup_handedness)
-    if "VULNERABLE" in home_sp_platoon_analysis:
-        bets_fired.append(f"AWAY TEAM TOTAL OVER / AWAY TEAM STACK: Home SP {home_sp.name} is {home_sp_platoon_analysis}")
-    away_sp_platoon_analysis = platoon_matchup_analysis(away_sp.name, home_lineup_handedness)
-    if "VULNERABLE" in away_sp_platoon_analysis:
-        bets_fired.append(f"HOME TEAM TOTAL OVER / HOME TEAM STACK: Away SP {away_sp.name} is {away_sp_platoon_analysis}")
-
-    if not bets_fired:
+    if not model['bets']:
         print("No strong betting triggers identified based on current analysis.")
     else:
-        for bet in bets_fired:
+        for bet in model['bets']:
          print(f"- {bet}")
 
-# === UTILITY FUNCTIONS ===
-
-def normalize_name(name):
-    if not isinstance(name, str):
-        return ""
-    name = name.replace('*', '').replace(',', '')
-    return ''.join(
-        c for c in unicodedata.normalize('NFD', name)
-        if unicodedata.category(c) != 'Mn'
-    ).replace('.', '').replace('-', '').replace("'", '').replace(' ', '').lower()
+def print_triggers_and_bets(*args):
+    print_model_result(evaluate_triggers_and_bets(*args))
 
-def all_name_variants(name):
-    name = name.strip()
-    parts = [p.strip() for p in name.replace(',', '').split()]
-    variants = []
-    if len(parts) == 2:
-        first, last = parts[0], parts[1]
-        variants.append(f"{first} {last}")
-        variants.append(f"{last} {first}")
-        variants.append(f"{last}, {first}")
-    variants.append(name)
-    return set(normalize_name(v) for v in variants)
-
-def advanced_csv_lookup(player_name, df, csv_key=None, year=None):
-    ADVANCED_CSV_PLAYER_COLUMNS = {
-        'expected_stats': 'last_name, first_name',
-        'percentile_rankings': 'player_name',
-        'bat_tracking': 'name',
-        'bat_tracking_last30': 'name',
-        'swing_take': 'last_name, first_name',
-        'pitch_movement': 'last_name, first_name',
-        'pitcher_running_game': 'player_name',
-        'active_spin': 'entity_name',
-        'pitcher_arm_angles': 'pitcher_name',
-        'exit_velocity': 'last_name, first_name',
-        'spin_direction_pitches': 'last_name, first_name',
-        'homeruns': 'player',
-    }
-    if csv_key is not None and csv_key in ADVANCED_CSV_PLAYER_COLUMNS:
-        name_column = ADVANCED_CSV_PLAYER_COLUMNS[csv_key]
-    else:
-        name_column = 'last_name, first_name'
-    if name_column not in df.columns:
-        raise KeyError(f"Column '{name_column}' not found in DataFrame for {csv_key}")
-    norm_variants = all_name_variants(player_name)
-    for idx, row in df.iterrows():
-        csv_name = row[name_column]
-        norm_csv_name = normalize_name(csv_name)
-        if norm_csv_name in norm_variants:
-            if year is not None and 'year' in row and str(row['year']) != str(year):
-                continue
-            return row
-    return None
-
-def get_percentile(player_name, stat):
-    stat_map = {
-        'K%': 'k_percent',
-        'xwOBA': 'xwoba',
-        'Barrel%': 'brl_percent',
-        'fb_velocity': 'fb_velocity',
-        'fb_spin': 'fb_spin',
-        'hard_hit_percent': 'hard_hit_percent',
-        'xERA': 'xera',
-    }
-    df = csv_files.get('percentile_rankings')
-    if df is None:
-        return None
-    col_name = stat_map.get(stat, stat)
-    row = advanced_csv_lookup(player_name, df, csv_key='percentile_rankings')
-    if row is not None and col_name in row.index:
-        return row[col_name]
-    return None
-
-def get_expected_stats(player_name, year=2025):
-    df = csv_files.get('expected_stats')
-    if df is None:
-        return {}
-    row = advanced_csv_lookup(player_name, df, csv_key='expected_stats', year=year)
-    if row is not None:
-        return {
-            'xwOBA': row.get('est_woba', None),
-            'xERA': row.get('xera', None),
-            'SIERA': None
-        }
-    return {}
-
-def get_classic_pitcher_stats(player_name):
-    df = csv_files.get('std_pitching')
-    if df is None:
-        return {}
-    for idx, row in df.iterrows():
-        if normalize_name(row.get('Player', '')) == normalize_name(player_name):
-            return {
-                'ERA': row.get('ERA', None),
-                'WHIP': row.get('WHIP', None),
-                'IP': row.get('IP', None),
-                'K/9': row.get('SO9', None),
-                'BB/9': row.get('BB9', None),
-                'HR/9': row.get('HR9', None),
-            }
-    return {}
-
-def get_classic_hitter_stats(player_name):
-    df = csv_files.get('homeandawatbatter')
-    if df is None:
-        return {}
-    for idx, row in df.iterrows():
-        if normalize_name(row.get('Player', '')) == normalize_name(player_name):
-            return {
-                'OPS': row.get('OPS', None),
-                'HR': row.get('HR', None),
-                'AVG': row.get('AVG', None),
-                'OBP': row.get('OBP', None),
-                'SLG': row.get('SLG', None),
-            }
-    return {}
-
-def get_bat_tracking(player_name, recent=False):
-    key = 'bat_tracking_last30' if recent else 'bat_tracking'
-    df = csv_files.get(key)
-    if df is None:
-        return {}
-    row = advanced_csv_lookup(player_name, df, csv_key=key)
-    if row is not None:
-        return {
-            'swing_speed': row.get('avg_bat_speed', None),
-            'attack_angle': row.get('swing_length', None),
-            'bat_speed_percentile': None
-        }
-    return {}
-
-def get_swing_take(player_name):
-    df = csv_files.get('swing_take')
-    if df is None:
-        return None
-    row = advanced_csv_lookup(player_name, df, csv_key='swing_take')
-    if row is not None:
-        return {
-            'runs_all': row.get('runs_all', None),
-            'runs_heart': row.get('runs_heart', None),
-            'runs_shadow': row.get('runs_shadow', None),
-            'runs_chase': row.get('runs_chase', None),
-            'runs_waste': row.get('runs_waste', None),
-        }
-    return None
-
-def get_pitch_movement(player_name, pitch_type='FF'):
-    df = csv_files.get('pitch_movement')
-    if df is None:
-        return {}
-    row = advanced_csv_lookup(player_name, df, csv_key='pitch_movement')
-    if row is not None and (('pitch_type' in row and row['pitch_type'] == pitch_type) or pitch_type is None):
-        return {
-            'IVB': row.get('pitcher_break_z_induced', None),
-            'HB': row.get('pitcher_break_x', None),
-            'Usage%': row.get('pitch_per', None),
-            'SpinRate': None
-        }
-    return {}
-
-def get_pitcher_vs_hand_stats(pitcher_name, batter_hand):
-    if batter_hand == 'L':
-        df = csv_files.get('pitcher_splits_lhb')
-    else:
-        df = csv_files.get('pitcher_splits_rhb')
-    if df is None:
-        return {}
-    for idx, row in df.iterrows():
-        if normalize_name(row.get('Player', '')) == normalize_name(pitcher_name):
-            return {
-                'ERA': row.get('ERA', None),
-                'WHIP': row.get('WHIP', None),
-                'OPS': row.get('OPS', None),
-                'K/9': row.get('SO/9', None),
-                'HR/9': row.get('HR.1', None),
-            }
-    return {}
-
-def platoon_matchup_analysis(pitcher_name, opp_lineup_handedness):
-    lhb_count = opp_lineup_handedness.count('L')
-    rhb_count = opp_lineup_handedness.count('R')
-    lhb_split = get_pitcher_vs_hand_stats(pitcher_name, 'L')
-    rhb_split = get_pitcher_vs_hand_stats(pitcher_name, 'R')
-    lhb_ops = float(lhb_split.get('OPS', 0) or 0)
-    rhb_ops = float(rhb_split.get('OPS', 0) or 0)
-    total = lhb_count + rhb_count
-    if total == 0:
-        return "No handedness data for lineup."
-    expected_ops = (lhb_count * lhb_ops + rhb_count * rhb_ops) / total
-    notes = []
-    if lhb_count >= 5 and lhb_ops > 0.800:
-        notes.append(f"VULNERABLE: {lhb_count} LHB vs pitcher OPS {lhb_ops:.3f}")
-    if rhb_count >= 5 and rhb_ops > 0.800:
-        notes.append(f"VULNERABLE: {rhb_count} RHB vs pitcher OPS {rhb_ops:.3f}")
-    return f"Expected lineup OPS vs this pitcher: {expected_ops:.3f}" + (" | " + "; ".join(notes) if notes else "")
-
-def get_pitch_movement_details(player_name, pitch_type='FF'):
-    df = csv_files.get('pitch_movement')
-    if df is None:
-        return {}
-    row = advanced_csv_lookup(player_name, df, csv_key='pitch_movement')
-    if row is not None and (('pitch_type' in row and row['pitch_type'] == pitch_type) or pitch_type is None):
-        return {
-            'IVB': row.get('pitcher_break_z_induced', None),
-            'HB': row.get('pitcher_break_x', None),
-            'Usage%': row.get('pitch_per', None),
-            'SpinRate': row.get('spin_rate', None)
-        }
-    return {}
+def get_pitch_movement_details(player_name, pitch_type='FF'):
+    df = csv_files.get('pitch_movement')
+    if df is None:
+        return {}
+    row = advanced_csv_lookup(player_name, df, csv_key='pitch_movement')
+    if row is not None and (('pitch_type' in row and row['pitch_type'] == pitch_type) or pitch_type is None):
+        return {
+            'IVB': row.get('pitcher_break_z_induced', None),
+            'HB': row.get('pitcher_break_x', None),
+            'Usage%': row.get('pitch_per', None),
+            'SpinRate': row.get('spin_rate', None)
+        }
+    return {}
 
 def get_spin_direction(player_name, pitch_type='FF'):
     df = csv_files.get('spin_direction_pitches') # Or 'spin_direction' if that's the correct key for your CSV
@@ -888,6 +1931,155 @@ def get_exit_velocity(player_name):
         }
     return {}
 
+# === PITCHER FEATURE TABLE ===
+
+# One entry per PitcherAnalysis attribute: (attribute, dataset, {feature:
+# source column}, options). A source column of None is a feature the dataset
+# does not provide. Options:
+#   year        only rows for that season (when the dataset has 'year')
+#   pitch_type  the player's first row must be this pitch type
+#   missing     value used when the player is not in the dataset
+PITCHER_FEATURE_GROUPS = [
+    ('classic', 'std_pitching', {
+        'ERA': 'ERA', 'WHIP': 'WHIP', 'IP': 'IP', 'K/9': 'SO9', 'BB/9': 'BB9', 'HR/9': 'HR9',
+    }, {}),
+    ('advanced', 'expected_stats', {'xwOBA': 'est_woba', 'xERA': 'xera', 'SIERA': None}, {'year': 2025}),
+    ('percentiles', 'percentile_rankings', {
+        'K%': 'k_percent', 'xwOBA': 'xwoba', 'Barrel%': 'brl_percent',
+        'FB Velo%': 'fb_velocity', 'FB Spin%': 'fb_spin', 'Hard Hit%': 'hard_hit_percent',
+    }, {'missing': 'none_values'}),
+    ('pitch_movement', 'pitch_movement', {
+        'IVB': 'pitcher_break_z_induced', 'HB': 'pitcher_break_x', 'Usage%': 'pitch_per', 'SpinRate': None,
+    }, {'pitch_type': 'FF'}),
+    ('swing_take', 'swing_take', {
+        'runs_all': 'runs_all', 'runs_heart': 'runs_heart', 'runs_shadow': 'runs_shadow',
+        'runs_chase': 'runs_chase', 'runs_waste': 'runs_waste',
+    }, {'missing': None}),
+    ('arm_angle', 'pitcher_arm_angles', {
+        'ball_angle': 'ball_angle', 'release_ball_z': 'release_ball_z', 'release_ball_x': 'relative_release_ball_x',
+        'shoulder_z': 'shoulder_z', 'shoulder_x': 'relative_shoulder_x',
+    }, {}),
+    ('active_spin', 'active_spin', {
+        'active_spin_fourseam': 'active_spin_fourseam', 'active_spin_curve': 'active_spin_curve',
+        'active_spin_slider': 'active_spin_slider',
+    }, {}),
+    ('running_game', 'pitcher_running_game', {
+        'runs_prevented_on_running_attr': 'runs_prevented_on_running_attr', 'rate_sbx': 'rate_sbx',
+        'n_sb': 'n_sb', 'n_cs': 'n_cs',
+    }, {}),
+    ('movement_details', 'pitch_movement', {
+        'IVB': 'pitcher_break_z_induced', 'HB': 'pitcher_break_x', 'Usage%': 'pitch_per', 'SpinRate': 'spin_rate',
+    }, {'pitch_type': 'FF'}),
+    ('spin_direction', 'spin_direction_pitches', {
+        'spin_direction': 'spin_direction', 'spin_axis': 'spin_axis',
+    }, {'pitch_type': 'FF'}),
+    ('exit_velocity', 'exit_velocity', {
+        'avg_hit_speed': 'avg_hit_speed', 'max_hit_speed': 'max_hit_speed', 'brl_percent': 'brl_percent',
+    }, {}),
+]
+
+# {'table': DataFrame, 'sources': {dataset: df}}; rebuilt when a source frame
+# is replaced (e.g. after csv_files.reload()).
+pitcher_feature_cache = {}
+
+def _feature_group_frame(attr, df, name_column, features, options):
+    year = options.get('year')
+    if year is not None and 'year' in df.columns:
+        df = df[df['year'].astype(str) == str(year)]
+    keys = player_ids(df, name_column)
+    first = ~keys.duplicated() & keys.notna()
+    df = df[first.values]
+    out = pd.DataFrame(index=pd.Index(keys[first].astype(int).values, name='player_id'))
+    out['_name'] = df[name_column].values
+    pitch_type = options.get('pitch_type')
+    if pitch_type is not None:
+        found = (df['pitch_type'] == pitch_type).values if 'pitch_type' in df.columns else False
+    else:
+        found = True
+    out[f"{attr}.found"] = found
+    for feature, column in features.items():
+        if column is None or column not in df.columns:
+            out[f"{attr}.{feature}"] = None
+            continue
+        values = df[column]
+        if pd.api.types.is_integer_dtype(values):
+            # Nullable ints keep 5 printing as 5 after the outer join.
+            values = values.astype('Int64')
+        out[f"{attr}.{feature}"] = values.values
+    return out
+
+def build_pitcher_feature_table():
+    frames = []
+    names = []
+    sources = {}
+    for attr, key, features, options in PITCHER_FEATURE_GROUPS:
+        df = csv_files.get(key)
+        name_column = player_name_column(key)
+        if df is None or name_column not in df.columns:
+            continue
+        sources[key] = df
+        count_scan('build_pitcher_feature_table', key)
+        frame = _feature_group_frame(attr, df, name_column, features, options)
+        names.append(frame.pop('_name'))
+        frames.append(frame)
+    if not frames:
+        return pd.DataFrame({'player_name': []}, index=pd.Index([], name='player_id')), sources
+    table = pd.concat(frames, axis=1, join='outer')
+    # Display name: the first dataset that has the player, as "First Last".
+    display = pd.concat(names, axis=1, join='outer').bfill(axis=1).iloc[:, 0]
+    table.insert(0, 'player_name', display.map(
+        lambda n: ' '.join(reversed([p.strip() for p in n.split(',', 1)])) if isinstance(n, str) and ',' in n else n
+    ).reindex(table.index))
+    found_cols = [c for c in table.columns if c.endswith('.found')]
+    table[found_cols] = table[found_cols].eq(True)
+    return table, sources
+
+def get_pitcher_feature_table():
+    cached = pitcher_feature_cache.get('table')
+    if cached is not None:
+        sources = pitcher_feature_cache['sources']
+        if all(csv_files.frames.get(key) is df for key, df in sources.items()):
+            return cached
+    table, sources = build_pitcher_feature_table()
+    pitcher_feature_cache['table'] = table
+    pitcher_feature_cache['sources'] = sources
+    return table
+
+def lookup_player_id(table, player_name):
+    player_id = player_crosswalk.resolve(player_name)
+    return player_id if player_id is not None and player_id in table.index else None
+
+def _py(value):
+    return value.item() if isinstance(value, np.generic) else value
+
+def pitcher_feature_row(player_name):
+    store = feature_stores.get('players')
+    if store is not None:
+        player_id = player_crosswalk.resolve(player_name)
+        return store.row(player_id) if player_id is not None else None
+    table = get_pitcher_feature_table()
+    player_id = lookup_player_id(table, player_name)
+    if player_id is None:
+        return None
+    return table.loc[player_id]
+
+def feature_group_values(row, attr, features, options):
+    if row is None or not row.get(f"{attr}.found", False):
+        missing = options.get('missing', {})
+        if missing == 'none_values':
+            return {feature: None for feature in features}
+        return dict(missing) if isinstance(missing, dict) else missing
+    values = {}
+    for feature in features:
+        value = _py(row[f"{attr}.{feature}"])
+        values[feature] = None if value is pd.NA else value
+    return values
+
+# These thresholds determine when a pitcher is flagged as vulnerable or auto-fade.
+# Adjust these values based on your betting strategy (see --sweep).
+AUTO_FADE_SCORE_THRESHOLD = 7.0
+VULNERABLE_SCORE_THRESHOLD = 4.0
+
 def check_pitcher_triggers(pitcher):
     triggers = {}
     pitcher_vulnerability_score = 0.0 # Initialize score as float
@@ -951,11 +2143,6 @@ def check_pitcher_triggers(pitcher):
 
 
     # --- NEW LOGIC TO SET IS_VULNERABLE AND IS_AUTO_FADE ON PITCHERANALYSIS OBJECT ---
-    # These thresholds determine when a pitcher is flagged as vulnerable or auto-fade.
-    # Adjust these values based on your betting strategy.
-    AUTO_FADE_SCORE_THRESHOLD = 7.0
-    VULNERABLE_SCORE_THRESHOLD = 4.0
-
     if pitcher_vulnerability_score >= AUTO_FADE_SCORE_THRESHOLD:
         pitcher.is_auto_fade = True
         pitcher.is_vulnerable = True  # If auto-fade, it's also vulnerable
@@ -967,6 +2154,449 @@ def check_pitcher_triggers(pitcher):
         pitcher.is_vulnerable = False
 
     return triggers, pitcher_vulnerability_score
+# === PARK-ADJUSTED METRICS ===
+
+# Share of a player's games played in the home park.
+PARK_HOME_SHARE = 0.5
+
+# (group, dataset, {metric: (source column, park factor)}, options as in
+# PITCHER_FEATURE_GROUPS). A player's home park comes from the Team column
+# of the group's datasets.
+PARK_ADJUSTED_METRICS = [
+    ('hitter', 'homeandawatbatter', {
+        'OPS': ('OPS', 'woba'), 'OBP': ('OBP', 'woba'), 'SLG': ('SLG', 'woba'), 'HR': ('HR', 'hr'),
+    }, {}),
+    ('pitcher', 'std_pitching', {'ERA': ('ERA', 'runs'), 'WHIP': ('WHIP', 'woba'), 'HR/9': ('HR9', 'hr')}, {}),
+    ('pitcher', 'expected_stats', {'xwOBA': ('est_woba', 'woba'), 'xERA': ('xera', 'runs')}, {'year': 2025}),
+]
+# Batted-ball metrics: park-neutral as measured, so only the venue applies.
+PARK_NEUTRAL_METRICS = {'xwOBA', 'xERA'}
+
+# {'table': DataFrame, 'venue': {...}, 'sources': {dataset: df}}; rebuilt when
+# a source frame is replaced (e.g. after csv_files.reload()).
+park_metrics_cache = {}
+
+def _metric_values(values):
+    if pd.api.types.is_numeric_dtype(values):
+        return values.astype(float)
+    return values.map(_parse_ops).astype(float)
+
+def build_park_metrics():
+    """Every player's PARK_ADJUSTED_METRICS, park-neutral and at every venue.
+
+    Returns (table, venue, sources). table is indexed by player ID with
+    '{group}.team', '{group}.park', the rates as '{group}.{metric}' and
+    '{group}.{metric}.neutral': the rate over the player's home factor,
+    1 + PARK_HOME_SHARE * (park factor - 1). venue['values'] is the
+    neutral rates times each park's factor, (players, metrics, parks + 1),
+    the last park being a neutral one.
+    """
+    frames = []
+    teams = {}
+    sources = {}
+    for group, key, metrics, options in PARK_ADJUSTED_METRICS:
+        df = csv_files.get(key)
+        name_column = player_name_column(key)
+        if df is None or name_column not in df.columns:
+            continue
+        sources[key] = df
+        count_scan('build_park_metrics', key)
+        features = {metric: column for metric, (column, _) in metrics.items()}
+        frame = _feature_group_frame(group, df, name_column, {**features, 'team': 'Team'}, options)
+        teams.setdefault(group, []).append(frame.pop(f"{group}.team"))
+        frames.append(frame.drop(columns=['_name', f"{group}.found"]).apply(_metric_values))
+    if not frames:
+        return pd.DataFrame(index=pd.Index([], name='player_id')), {'metrics': [], 'parks': [], 'values': np.zeros((0, 0, 1))}, sources
+    table = pd.concat(frames, axis=1, join='outer')
+    for group, team in teams.items():
+        team = pd.concat(team, axis=1, join='outer').bfill(axis=1).iloc[:, 0].reindex(table.index)
+        table[f"{group}.team"] = team.map(lambda t: TEAM_NAME_TO_ABBR.get(t, t) if isinstance(t, str) else None)
+        table[f"{group}.park"] = table[f"{group}.team"].map(TEAM_TO_PARK)
+
+    parks = sorted(PARK_FACTORS_2025)
+    metrics = []
+    neutral = []
+    factors = []
+    for group, key, group_metrics, _ in PARK_ADJUSTED_METRICS:
+        if key not in sources:
+            continue
+        for metric, (_, factor) in group_metrics.items():
+            name = f"{group}.{metric}"
+            values = table[name]
+            if metric not in PARK_NEUTRAL_METRICS:
+                home = table[f"{group}.team"].map(lambda t: TEAM_PARK_FACTORS.get(t, NEUTRAL_PARK_FACTORS)[factor])
+                values = values / (1 + PARK_HOME_SHARE * (home.astype(float) - 1))
+            table[f"{name}.neutral"] = values
+            metrics.append(name)
+            neutral.append(values.to_numpy(dtype=float))
+            factors.append([PARK_FACTORS_2025[park][factor] for park in parks] + [1.0])
+    venue = {'metrics': metrics, 'parks': parks, 'values': np.column_stack(neutral)[:, :, None] * np.array(factors)[None, :, :]}
+    return table, venue, sources
+
+def get_park_metrics():
+    """(table, venue) of build_park_metrics, cached per set of source frames."""
+    cached = park_metrics_cache.get('table')
+    if cached is None or not all(csv_files.frames.get(key) is df for key, df in park_metrics_cache['sources'].items()):
+        table, venue, sources = build_park_metrics()
+        park_metrics_cache.update(table=table, venue=venue, sources=sources)
+    return park_metrics_cache['table'], park_metrics_cache['venue']
+
+def venue_metrics(player_names, venue_team=None):
+    """Each player's PARK_ADJUSTED_METRICS as expected in venue_team's park.
+
+    A lookup into the precomputed venue values: one row per name, one
+    column per '{group}.{metric}', NaN where the player or rate is unknown.
+    No venue_team (or one without a park) gives the park-neutral rates.
+    """
+    table, venue = get_park_metrics()
+    ids = [player_crosswalk.resolve(name) for name in player_names]
+    positions = table.index.get_indexer([-1 if i is None else i for i in ids])
+    park = TEAM_TO_PARK.get(venue_team)
+    column = venue['parks'].index(park) if park in venue['parks'] else -1
+    values = np.full((len(ids), len(venue['metrics'])), np.nan)
+    found = positions >= 0
+    values[found] = venue['values'][positions[found], :, column]
+    return pd.DataFrame(values, index=list(player_names), columns=venue['metrics'])
+
+# === VELOCITY TRENDS ===
+
+VELO_SEASON = 2025
+VELO_RECENT_STARTS = 3
+VELO_EWMA_SPAN = 3
+VELO_DROP_THRESHOLD = 1.0
+
+# Pitch types averaged into an outing's fastball velocity when the pitch
+# file is broken out by pitch_type.
+FASTBALL_PITCH_TYPES = ('FF', 'FA', 'FT', 'SI')
+
+# {'df': pitching_pitches frame, 'table': build_velocity_trends() result}
+velocity_trend_cache = {}
+# {'df': source frame, 'table': build_pitch_type_table() result}
+pitch_type_cache = {}
+
+def pitch_outings(df):
+    # One FBv row per pitcher outing from a PitchAggregator frame: fastball
+    # rows pooled (weighted by pitch count) when the file has pitch_type.
+    if 'velo' not in df.columns:
+        return df
+    if 'pitch_type' not in df.columns:
+        return df.rename(columns={'velo': 'FBv'})
+    features = [c for c in df.columns if c.removesuffix('_n') in PITCH_FEATURE_ALIASES]
+    keys = [c for c in df.columns if c not in ('pitch_type', 'rows', *features)]
+    fastballs = df[df['pitch_type'].isin(FASTBALL_PITCH_TYPES) & df['velo'].notna()]
+    weighted = pd.DataFrame({'velo': fastballs['velo'] * fastballs['velo_n'], 'n': fastballs['velo_n']})
+    sums = weighted.groupby([fastballs[k] for k in keys], sort=False, dropna=False, observed=True).sum()
+    return pd.DataFrame({'FBv': sums['velo'] / sums['n']}).reset_index()
+
+def build_velocity_trends(df):
+    """Fastball velocity trend for every pitcher in one sorted, grouped pass.
+
+    Indexed by crosswalk player ID. season_velo is the mean FBv over
+    VELO_SEASON, recent_velo the mean of the last VELO_RECENT_STARTS outings,
+    ewma_velo an exponentially weighted mean (most recent outing weighted
+    highest), velo_drop = season_velo - recent_velo and drop_z that drop in
+    standard errors of the recent mean. velo_anomaly is velo_drop > 1 mph.
+    """
+    columns = ['player_name', 'season_velo', 'recent_velo', 'ewma_velo', 'season_std', 'starts', 'velo_drop', 'drop_z', 'velo_anomaly']
+    df = pitch_outings(df)
+    for player_col in ['Player', 'Name', 'player_name', 'Pitcher', 'pitcher_name']:
+        if player_col in df.columns:
+            break
+    else:
+        print("No player name column found in pitching_pitches!")
+        return pd.DataFrame(columns=columns, index=pd.Index([], name='player_id'))
+    count_scan('build_velocity_trends', 'pitching_pitches')
+    keys = player_ids(df, player_col)
+    table = pd.DataFrame(index=pd.Index(keys.dropna().unique(), name='player_id'))
+    table['player_name'] = df[player_col].groupby(keys).first()
+    has_fbv = 'FBv' in df.columns
+    fbv = pd.to_numeric(df['FBv'], errors='coerce') if has_fbv else None
+
+    if has_fbv and 'Year' in df.columns:
+        in_season = (df['Year'] == VELO_SEASON).to_numpy()
+        season = fbv[in_season].groupby(keys[in_season])
+        table['season_velo'] = season.mean()
+        table['season_std'] = season.std()
+    else:
+        table['season_velo'] = None
+        table['season_std'] = np.nan
+
+    if has_fbv and 'Date' in df.columns:
+        ordered = pd.DataFrame({
+            'key': keys.to_numpy(),
+            'Date': pd.to_datetime(df['Date'], errors='coerce').to_numpy(),
+            'FBv': fbv.to_numpy(),
+        }).sort_values('Date', ascending=False, kind='stable')
+        recent = ordered.groupby('key', sort=False).head(VELO_RECENT_STARTS).groupby('key')['FBv']
+        table['recent_velo'] = recent.mean()
+        table['starts'] = recent.count()
+        # EWMA runs oldest -> newest, so take each pitcher's last value.
+        oldest_first = ordered.iloc[::-1]
+        ewma = oldest_first.groupby('key', sort=False)['FBv'].ewm(span=VELO_EWMA_SPAN).mean()
+        table['ewma_velo'] = ewma.groupby(level=0).last()
+    else:
+        table['recent_velo'] = None
+        table['starts'] = 0
+        table['ewma_velo'] = np.nan
+
+    season_velo = pd.to_numeric(table['season_velo'], errors='coerce')
+    recent_velo = pd.to_numeric(table['recent_velo'], errors='coerce')
+    table['velo_drop'] = season_velo - recent_velo
+    stderr = table['season_std'] / np.sqrt(table['starts'].where(table['starts'] > 0))
+    table['drop_z'] = table['velo_drop'] / stderr.where(stderr > 0)
+    table['velo_anomaly'] = table['velo_drop'] > VELO_DROP_THRESHOLD
+    return table[columns]
+
+def get_velocity_trends():
+    df = csv_files.get('pitching_pitches')
+    if df is None:
+        return None
+    if velocity_trend_cache.get('df') is not df:
+        velocity_trend_cache['df'] = df
+        velocity_trend_cache['table'] = build_velocity_trends(df)
+    return velocity_trend_cache['table']
+
+def build_pitch_type_table(df, key='statcast_pitches'):
+    """Per-pitcher arsenal from a PitchAggregator frame with pitch_type.
+
+    Indexed by (player_id, pitch_type): player_name, pitches, usage (share
+    of the pitcher's pitches) and the pitch-weighted mean velo, spin, hmov
+    and vmov the file has. Empty when the file has no pitch_type column.
+    """
+    features = [c for c in PITCH_FEATURE_ALIASES if c in df.columns]
+    columns = ['player_name', 'pitches', 'usage'] + features
+    player_col = next((c for c in PLAYER_NAME_COLUMNS if c in df.columns), None)
+    if player_col is None or 'pitch_type' not in df.columns:
+        return pd.DataFrame(columns=columns, index=pd.MultiIndex.from_arrays([[], []], names=['player_id', 'pitch_type']))
+    count_scan('build_pitch_type_table', key)
+    keys = player_ids(df, player_col)
+    parts = {'pitches': df['rows']}
+    for feature in features:
+        n = df[f"{feature}_n"]
+        parts[feature] = (df[feature] * n).where(n > 0, 0.0)
+        parts[f"{feature}_n"] = n
+    groups = [keys.rename('player_id'), df['pitch_type'].astype(str)]
+    table = pd.DataFrame(parts).groupby(groups, sort=False).sum()
+    table['player_name'] = df[player_col].groupby(groups, sort=False).first()
+    table['usage'] = table['pitches'] / table['pitches'].groupby(level='player_id').transform('sum')
+    for feature in features:
+        n = table.pop(f"{feature}_n")
+        table[feature] = table[feature] / n.where(n > 0)
+    return table[columns].sort_index(level='player_id', sort_remaining=False)
+
+def get_pitch_type_table():
+    # Prefers the Statcast pitch-level file; falls back to pitching_pitches
+    # when that one is broken out by pitch_type. Either may be absent, so
+    # neither is loaded (and warned about) unless it is on disk.
+    for key in ('statcast_pitches', 'pitching_pitches'):
+        df = csv_files.get(key) if key in csv_files else None
+        if df is not None and 'pitch_type' in df.columns:
+            break
+    else:
+        return None
+    if pitch_type_cache.get('df') is not df:
+        pitch_type_cache['df'] = df
+        pitch_type_cache['table'] = build_pitch_type_table(df, key)
+    return pitch_type_cache['table']
+
+def print_pitch_mix(names):
+    table = get_pitch_type_table()
+    if table is None:
+        print("No pitch-level file with pitch_type loaded; no pitch mix.")
+        return
+    for name in names:
+        pid = player_crosswalk.resolve(name)
+        print(f"=== PITCH MIX: {name} ===")
+        if pid is None or pid not in table.index.get_level_values('player_id'):
+            print("Not found")
+            continue
+        arsenal = table.xs(pid, level='player_id').sort_values('usage', ascending=False, kind='stable')
+        for pitch_type, row in arsenal.iterrows():
+            details = ", ".join(f"{c} {row[c]:.{2 if c in ('hmov', 'vmov') else 1}f}" for c in PITCH_FEATURE_ALIASES if c in arsenal.columns and pd.notna(row[c]))
+            print(f"{pitch_type}: {row['usage']:.1%} ({int(row['pitches'])} pitches){', ' + details if details else ''}")
+
+def print_velocity_drops(limit=25):
+    trends = get_velocity_trends()
+    if trends is None:
+        print("pitching_pitches not loaded; no velocity trends.")
+        return
+    drops = trends[trends['velo_anomaly']].sort_values(['drop_z', 'velo_drop'], ascending=False, kind='stable')
+    print(f"=== FASTBALL VELOCITY DROPS ({len(drops)}) ===")
+    if drops.empty:
+        print("None")
+        return
+    print(drops[['player_name', 'season_velo', 'recent_velo', 'ewma_velo', 'velo_drop', 'drop_z']].head(limit).round(2).to_string(index=False))
+
+# === LEAGUE SCREENER ===
+
+# (trigger, score added) in the order check_pitcher_triggers evaluates them.
+PITCHER_TRIGGER_WEIGHTS = [
+    ('barrel_danger', 3.0),
+    ('barrel_caution', 1.0),
+    ('hard_hit_danger', 2.0),
+    ('hard_hit_caution', 0.5),
+    ('xwoba_red_flag', 2.5),
+    ('xwoba_caution', 1.0),
+    ('exit_velo_red_flag', 1.5),
+    ('elite_contact_suppression', -2.0),
+    ('high_xera', 1.5),
+    ('low_k_percentile', 1.0),
+    ('velo_anomaly_detected', 1.5),
+]
+
+def screen_pitcher_triggers(table=None, velo=None):
+    """Vectorized check_pitcher_triggers over every pitcher in the feature table.
+
+    Returns one row per pitcher with a boolean column per trigger,
+    pitcher_vulnerability_score, is_vulnerable and is_auto_fade.
+    """
+    if table is None:
+        table = get_pitcher_feature_table()
+    if velo is None:
+        velo = get_velocity_trends()
+        if velo is None:
+            velo = pd.DataFrame(columns=['velo_anomaly'])
+
+    def numeric(column, group=None):
+        if column not in table.columns:
+            return pd.Series(np.nan, index=table.index)
+        values = pd.to_numeric(table[column], errors='coerce').astype(float)
+        if group is not None:
+            values = values.where(table[f"{group}.found"])
+        return values
+
+    barrel = numeric('percentiles.Barrel%')
+    hard_hit = numeric('percentiles.Hard Hit%')
+    xwoba = numeric('percentiles.xwOBA')
+    k_pct = numeric('percentiles.K%')
+    exit_velo = numeric('exit_velocity.avg_hit_speed', 'exit_velocity')
+    xera = numeric('advanced.xERA', 'advanced')
+    velo_anomaly = velo['velo_anomaly'].reindex(table.index, fill_value=False) if len(velo) else pd.Series(False, index=table.index)
+
+    out = pd.DataFrame(index=table.index)
+    out['player_name'] = table['player_name']
+    out['barrel_danger'] = barrel >= 80
+    out['barrel_caution'] = (barrel >= 60) & ~out['barrel_danger']
+    out['hard_hit_danger'] = hard_hit >= 80
+    out['hard_hit_caution'] = (hard_hit >= 60) & ~out['hard_hit_danger']
+    out['xwoba_red_flag'] = xwoba >= 75
+    out['xwoba_caution'] = (xwoba >= 65) & ~out['xwoba_red_flag']
+    out['exit_velo_red_flag'] = exit_velo >= 90
+    out['elite_contact_suppression'] = (barrel <= 20) & (hard_hit <= 20)
+    out['high_xera'] = xera > 4.5
+    out['low_k_percentile'] = k_pct < 30
+    out['velo_anomaly_detected'] = velo_anomaly
+
+    names = [name for name, _ in PITCHER_TRIGGER_WEIGHTS]
+    weights = np.array([weight for _, weight in PITCHER_TRIGGER_WEIGHTS])
+    score = out[names].to_numpy(dtype=float) @ weights
+    score -= (k_pct >= 80).to_numpy(dtype=float)
+    out['pitcher_vulnerability_score'] = score
+    out['is_auto_fade'] = score >= AUTO_FADE_SCORE_THRESHOLD
+    out['is_vulnerable'] = score >= VULNERABLE_SCORE_THRESHOLD
+    return out
+
+def print_pitcher_screen(screen, limit=25):
+    columns = ['player_name', 'pitcher_vulnerability_score']
+    fades = screen[screen['is_auto_fade']].sort_values('pitcher_vulnerability_score', ascending=False, kind='stable')
+    elite = screen[screen['pitcher_vulnerability_score'] <= -1.0].sort_values('pitcher_vulnerability_score', kind='stable')
+    print(f"=== AUTO-FADE STARTERS ({len(fades)}) ===")
+    print(fades[columns].head(limit).to_string(index=False) if len(fades) else "None")
+    print(f"\n=== ELITE STARTERS ({len(elite)}) ===")
+    print(elite[columns].head(limit).to_string(index=False) if len(elite) else "None")
+
+# === PLATOON MATRIX ===
+
+def platoon_matrix(lhb_ops, rhb_ops, lhb_counts, rhb_counts,
+                   stack_min=PLATOON_STACK_MIN, ops_cutoff=PLATOON_OPS_CUTOFF):
+    """platoon_matchup_analysis for every pitcher against every lineup at once.
+
+    lhb_ops/rhb_ops are the pitchers' OPS allowed to each side (P,),
+    lhb_counts/rhb_counts the lineups' hitter counts (L,). Returns the
+    expected lineup OPS (P, L), NaN for lineups with no L/R hitters, and the
+    VULNERABLE flags (P, L).
+    """
+    lhb_ops = np.asarray(lhb_ops, dtype=float)[:, None]
+    rhb_ops = np.asarray(rhb_ops, dtype=float)[:, None]
+    lhb_counts = np.asarray(lhb_counts, dtype=float)[None, :]
+    rhb_counts = np.asarray(rhb_counts, dtype=float)[None, :]
+    with np.errstate(invalid='ignore', divide='ignore'):
+        expected = (lhb_counts * lhb_ops + rhb_counts * rhb_ops) / (lhb_counts + rhb_counts)
+    vulnerable = (((lhb_counts >= stack_min) & (lhb_ops > ops_cutoff))
+                  | ((rhb_counts >= stack_min) & (rhb_ops > ops_cutoff)))
+    return expected, vulnerable
+
+def _split_ops(value):
+    # float(split.get('OPS', 0) or 0), as platoon_matchup_analysis reads it.
+    try:
+        return float(value or 0)
+    except (TypeError, ValueError):
+        return np.nan
+
+def platoon_matchups(pitchers, lineups):
+    """Rank every starter against every lineup by expected lineup OPS.
+
+    pitchers: {name: team or None}; lineups: {label: (team, [hand, ...])}.
+    A pitcher is not paired with his own team's lineup, nor with lineups
+    that have no L/R hitters. Best spots for the hitters come first.
+    """
+    names = list(pitchers)
+    labels = list(lineups)
+    lhb_split = first_values('pitcher_splits_lhb', 'OPS')
+    rhb_split = first_values('pitcher_splits_rhb', 'OPS')
+    ids = [player_crosswalk.resolve(name) for name in names]
+    lhb_ops = np.array([_split_ops(lhb_split.get(i)) for i in ids], dtype=float)
+    rhb_ops = np.array([_split_ops(rhb_split.get(i)) for i in ids], dtype=float)
+    lhb = np.array([hands.count('L') for _, hands in lineups.values()], dtype=int)
+    rhb = np.array([hands.count('R') for _, hands in lineups.values()], dtype=int)
+    expected, vulnerable = platoon_matrix(lhb_ops, rhb_ops, lhb, rhb)
+
+    n, m = len(names), len(labels)
+    frame = pd.DataFrame({
+        'pitcher': np.repeat(np.array(names, dtype=object), m),
+        'pitcher_team': np.repeat(np.array([pitchers[name] for name in names], dtype=object), m),
+        'lineup': np.tile(np.array(labels, dtype=object), n),
+        'lineup_team': np.tile(np.array([team for team, _ in lineups.values()], dtype=object), n),
+        'lhb': np.tile(lhb, n),
+        'rhb': np.tile(rhb, n),
+        'ops_vs_lhb': np.repeat(lhb_ops, m),
+        'ops_vs_rhb': np.repeat(rhb_ops, m),
+        'expected_ops': expected.ravel(),
+        'vulnerable': vulnerable.ravel(),
+    })
+    keep = (frame['lhb'] + frame['rhb'] > 0) & (frame['pitcher_team'] != frame['lineup_team'])
+    frame = frame[keep].sort_values('expected_ops', ascending=False, kind='stable').reset_index(drop=True)
+    frame.insert(0, 'rank', np.arange(1, len(frame) + 1))
+    return frame
+
+def slate_platoon_matchups(games, probables=()):
+    # The slate's starters (plus any probables) against the slate's lineups.
+    pitchers, lineups = {}, {}
+    for game in games:
+        for side in ('home', 'away'):
+            team = game.get(f'{side}_team')
+            name = game.get(f'{side}_starting_pitcher')
+            if name:
+                pitchers.setdefault(name, team)
+            hands = [hitter.get('hand') for hitter in game.get(f'{side}_lineup') or []]
+            if team and hands:
+                label = team
+                while label in lineups:
+                    label += "'"
+                lineups[label] = (team, hands)
+    for name in probables:
+        pitchers.setdefault(name, None)
+    return platoon_matchups(pitchers, lineups)
+
+def print_platoon_matchups(matchups, limit=25):
+    vulnerable = int(matchups['vulnerable'].sum())
+    print(f"=== PLATOON MATCHUPS ({len(matchups)} pairings, {vulnerable} VULNERABLE) ===")
+    if matchups.empty:
+        print("None")
+        return
+    columns = ['rank', 'pitcher', 'lineup', 'lhb', 'rhb', 'ops_vs_lhb', 'ops_vs_rhb', 'expected_ops', 'vulnerable']
+    print(matchups[columns].head(limit).to_string(index=False, float_format=lambda v: f"{v:.3f}"))
+
 # === CLASS DEFINITIONS ===
 
 class PitcherAnalysis:
@@ -994,54 +2624,21 @@ class PitcherAnalysis:
         self.is_auto_fade = False   # NEW: Initialize to False
 
     def detect_velocity_anomaly(self):
-        df = csv_files.get('pitching_pitches')
-        if df is None:
-            return None, None, False
-        for player_col in ['Player', 'Name', 'player_name', 'Pitcher', 'pitcher_name']:
-            if player_col in df.columns:
-                break
-        else:
-            print("No player name column found in pitching_pitches!")
+        trends = get_velocity_trends()
+        if trends is None:
             return None, None, False
-        mask = df[player_col].apply(normalize_name) == normalize_name(self.name)
-        player_rows = df[mask]
-        if player_rows.empty:
+        player_id = player_crosswalk.resolve(self.name)
+        if player_id is None or player_id not in trends.index:
             return None, None, False
-        season_velo = player_rows[player_rows['Year'] == 2025]['FBv'].mean() if 'Year' in player_rows.columns and 'FBv' in player_rows.columns else None
-        if 'Date' in player_rows.columns and 'FBv' in player_rows.columns:
-            player_rows = player_rows.sort_values('Date', ascending=False)
-            recent_velo = player_rows.head(3)['FBv'].mean()
-        else:
-            recent_velo = None
-        anomaly = False
-        if season_velo is not None and recent_velo is not None:
-            try:
-                anomaly = (season_velo - recent_velo) > 1.0
-            except:
-                anomaly = False
-        return season_velo, recent_velo, anomaly
+        row = trends.loc[player_id]
+        return _py(row['season_velo']), _py(row['recent_velo']), bool(row['velo_anomaly'])
 
     def analyze(self):
-        self.classic = get_classic_pitcher_stats(self.name)
-        self.advanced = get_expected_stats(self.name)
-        # These percentiles are already being fetched, we'll just use them in print_report
-        self.percentiles['K%'] = get_percentile(self.name, 'K%')
-        self.percentiles['xwOBA'] = get_percentile(self.name, 'xwOBA')
-        self.percentiles['Barrel%'] = get_percentile(self.name, 'Barrel%') # This will be used for Barrel% Allowed
-        self.percentiles['FB Velo%'] = get_percentile(self.name, 'fb_velocity')
-        self.percentiles['FB Spin%'] = get_percentile(self.name, 'fb_spin')
-        self.percentiles['Hard Hit%'] = get_percentile(self.name, 'hard_hit_percent') # This will be used for Hard Hit% Allowed
-        
-        self.pitch_movement = get_pitch_movement(self.name, 'FF')
-        self.swing_take = get_swing_take(self.name)
+        # Row view onto the league-wide feature table; see PITCHER_FEATURE_GROUPS.
+        row = pitcher_feature_row(self.name)
+        for attr, key, features, options in PITCHER_FEATURE_GROUPS:
+            setattr(self, attr, feature_group_values(row, attr, features, options))
         self.season_velo, self.recent_velo, self.velo_anomaly = self.detect_velocity_anomaly()
-        self.arm_angle = get_pitcher_arm_angle(self.name)
-        self.active_spin = get_active_spin(self.name)
-        self.running_game = get_running_game(self.name)
-        self.movement_details = get_pitch_movement_details(self.name)
-        self.spin_direction = get_spin_direction(self.name)
-        # New call to fetch exit velocity data
-        self.exit_velocity = get_exit_velocity(self.name)
 
     def print_report(self):
         print(f"{self.name} Classic Stats:")
@@ -1083,6 +2680,29 @@ class PitcherAnalysis:
         print(f"    Is Vulnerable: {self.is_vulnerable}")
         print(f"    Is Auto-Fade: {self.is_auto_fade}")
         # Removed debug prints for cleaner output based on prior successful run.
+
+    def to_record(self):
+        # Same fields print_report shows, as plain data for --output json.
+        return {
+            'name': self.name,
+            'team': self.team,
+            'classic': self.classic,
+            'advanced': self.advanced,
+            'percentiles': self.percentiles,
+            'pitch_movement': self.pitch_movement,
+            'swing_take': self.swing_take,
+            'velocity': {'season': self.season_velo, 'recent': self.recent_velo, 'anomaly': self.velo_anomaly},
+            'splits': {'LHB': get_pitcher_vs_hand_stats(self.name, 'L'), 'RHB': get_pitcher_vs_hand_stats(self.name, 'R')},
+            'platoon': platoon_matchup_analysis(self.name, self.opp_lineup_handedness) if self.opp_lineup_handedness else None,
+            'arm_angle': self.arm_angle,
+            'active_spin': self.active_spin,
+            'running_game': self.running_game,
+            'movement_details': self.movement_details,
+            'spin_direction': self.spin_direction,
+            'exit_velocity': self.exit_velocity,
+            'is_vulnerable': self.is_vulnerable,
+            'is_auto_fade': self.is_auto_fade,
+        }
 class HitterAnalysis:
     def __init__(self, name, team):
         self.name = name
@@ -1107,26 +2727,180 @@ class HitterAnalysis:
         print(f"  xwOBA: {self.advanced.get('xwOBA')}, SIERA: {self.advanced.get('SIERA')}")
         print(f"  Percentiles: xwOBA {self.percentiles['xwOBA']}, Barrel% {self.percentiles['Barrel%']}")
         print(f"  Bat Speed: {self.bat_tracking.get('swing_speed')}, Attack Angle: {self.bat_tracking.get('attack_angle')}")
-# === MAIN SCRIPT ===
 
-if __name__ == "__main__":
-    parser = argparse.ArgumentParser(description="Analyze MLB game using pitcher/hitter data.")
-    parser.add_argument('game_data_file', type=str, help='Path to the YAML file containing game data.')
-    args = parser.parse_args()
+    def to_record(self):
+        return {
+            'name': self.name,
+            'team': self.team,
+            'classic': self.classic,
+            'advanced': self.advanced,
+            'percentiles': self.percentiles,
+            'bat_tracking': self.bat_tracking,
+        }
+# === SHARED FEATURE STORE ===
 
-    # Load game data from YAML
-    try:
-        with open(args.game_data_file, 'r') as f:
-            game_data = yaml.safe_load(f)
-    except FileNotFoundError:
-        print(f"Error: Game data file '{args.game_data_file}' not found.")
-        exit(1)
-    except yaml.YAMLError as e:
-        print(f"Error parsing YAML file: {e}")
-        exit(1)
+# {name: FeatureStore} a worker process reads instead of the frames
+# (see attach_feature_stores); empty in the parent.
+feature_stores = {}
+
+def save_arrays(directory, arrays):
+    """Write {name: array} as one .npy file per array under directory."""
+    os.makedirs(directory, exist_ok=True)
+    for name, array in arrays.items():
+        np.save(os.path.join(directory, f"{name}.npy"), np.ascontiguousarray(array))
+
+def load_arrays(directory):
+    """{name: read-only memmap} for the .npy files save_arrays wrote.
+
+    The pages come from the OS page cache, so every process mapping the
+    same files shares one copy, and nothing is unpickled.
+    """
+    return {
+        name[:-4]: np.load(os.path.join(directory, name), mmap_mode='r')
+        for name in sorted(os.listdir(directory)) if name.endswith('.npy')
+    }
+
+class FeatureStore:
+    """A numeric feature table as one memory-mapped float64 matrix.
+
+    Rows are found by binary search in a sorted key array (player IDs or
+    team abbreviations); column names, their kinds and any metadata sit in
+    a small index.json. Kinds restore what the frame held: 'int' NaN is
+    pd.NA, 'none' a column the frame had no values for.
+    """
+
+    def __init__(self, directory):
+        with open(os.path.join(directory, 'index.json')) as f:
+            index = json.load(f)
+        self.columns = index['columns']
+        self.kinds = index['kinds']
+        self.meta = index['meta']
+        self.column_index = {name: i for i, name in enumerate(self.columns)}
+        arrays = load_arrays(directory)
+        self.keys = arrays['keys']
+        self.values = arrays['values']
+
+    @classmethod
+    def write(cls, directory, frame, meta=None):
+        """Export frame, keyed by its index. None if a column is not numeric."""
+        kinds = []
+        values = []
+        for name in frame.columns:
+            column = frame[name]
+            if pd.api.types.is_bool_dtype(column):
+                kinds.append('bool')
+            elif pd.api.types.is_integer_dtype(column):
+                kinds.append('int')
+            elif pd.api.types.is_float_dtype(column):
+                kinds.append('float')
+            elif column.isna().all():
+                kinds.append('none')
+                values.append(np.full(len(column), np.nan))
+                continue
+            else:
+                return None
+            values.append(column.to_numpy(dtype='float64', na_value=np.nan))
+        keys = frame.index.to_numpy()
+        keys = keys.astype(np.int64) if pd.api.types.is_integer_dtype(frame.index) else keys.astype(str)
+        order = np.argsort(keys, kind='stable')
+        matrix = np.column_stack(values)[order] if values else np.zeros((len(keys), 0))
+        save_arrays(directory, {'keys': keys[order], 'values': matrix})
+        with open(os.path.join(directory, 'index.json'), 'w') as f:
+            json.dump({'columns': [str(c) for c in frame.columns], 'kinds': kinds, 'meta': meta or {}}, f)
+        return cls(directory)
+
+    def position(self, key):
+        i = int(np.searchsorted(self.keys, key))
+        return i if i < len(self.keys) and self.keys[i] == key else None
+
+    def row(self, key):
+        """{column: value} for key, or None when the store does not have it."""
+        i = self.position(key)
+        if i is None:
+            return None
+        row = {}
+        for name, kind, value in zip(self.columns, self.kinds, self.values[i].tolist()):
+            if kind == 'bool':
+                value = bool(value)
+            elif kind == 'int':
+                value = pd.NA if np.isnan(value) else int(value)
+            elif kind == 'none':
+                value = None
+            row[name] = value
+        return row
+
+    def column_dict(self, name):
+        """{key: value} of one float column, NaN entries left out."""
+        values = self.values[:, self.column_index[name]]
+        present = ~np.isnan(values)
+        return dict(zip(self.keys[present].tolist(), values[present].tolist()))
+
+def export_feature_stores(directory):
+    """Write the players (pitcher feature table) and teams (recent OPS) stores.
+
+    Builds both tables here, once, so workers attaching the stores never
+    build or unpickle them. Returns {name: FeatureStore} for the stores
+    written; a table with a column the store cannot hold is left out.
+    """
+    table = get_pitcher_feature_table()
+    windows = TEAM_FORM_WINDOWS
+    as_of = pd.Timestamp.now().normalize()
+    form = get_team_form(windows, as_of=as_of)
+    teams = pd.DataFrame({f"ops_{days}": pd.Series(form[days], dtype=float) for days in windows})
+    stores = {
+        'players': FeatureStore.write(os.path.join(directory, 'players'), table.drop(columns='player_name')),
+        'teams': FeatureStore.write(os.path.join(directory, 'teams'), teams,
+                                    meta={'as_of': as_of.isoformat(), 'windows': list(windows)}),
+    }
+    return {name: store for name, store in stores.items() if store is not None}
+
+def attach_feature_stores(directory):
+    # Worker initializer: map whatever export_feature_stores wrote.
+    feature_stores.clear()
+    for name in ('players', 'teams'):
+        if os.path.exists(os.path.join(directory, name, 'index.json')):
+            feature_stores[name] = FeatureStore(os.path.join(directory, name))
+
+# === GAME RUNNER ===
+
+# Datasets a game analysis touches; loaded up front for slates so forked
+# workers inherit them instead of each re-reading the CSVs. The Statcast
+# pitch file only feeds --pitch-mix.
+GAME_DATASETS = [key for key in DATASET_COLUMNS if key != 'statcast_pitches']
+# Threads parsing CSVs during preload (None: the executor's default).
+LOAD_WORKERS = int(os.environ.get('MLB_LOAD_WORKERS', 0)) or None
+
+recent_ops = {}
+
+# libyaml's loader when PyYAML was built with it; same safe subset.
+YAML_LOADER = getattr(yaml, 'CSafeLoader', yaml.SafeLoader)
 
-    # Extract data from YAML
-    game_info = game_data.get('game', {})
+def load_games(path):
+    """Return the list of 'game' blocks in a YAML file or a directory of them."""
+    if os.path.isdir(path):
+        files = sorted(
+            os.path.join(path, f) for f in os.listdir(path)
+            if f.endswith(('.yaml', '.yml'))
+        )
+    else:
+        files = [path]
+    games = []
+    for fname in files:
+        with open(fname, 'r') as f:
+            data = yaml.load(f, Loader=YAML_LOADER) or {}
+        if 'games' in data:
+            games.extend(data['games'] or [])
+        elif 'game' in data:
+            games.append(data['game'])
+    return games
+
+def evaluate_game(game_info):
+    """Run every analysis for one game block without printing the report.
+
+    Returns a dict of the analysis objects, triggers and model result, or
+    None (after printing why) when the block is missing essential data.
+    """
+    global recent_ops
     home_team_abbr = game_info.get('home_team')
     away_team_abbr = game_info.get('away_team')
     home_sp_name = game_info.get('home_starting_pitcher')
@@ -1140,79 +2914,1266 @@ if __name__ == "__main__":
 
     if not all([home_team_abbr, away_team_abbr, home_sp_name, away_sp_name, home_lineup_handedness, away_lineup_handedness]):
         print("Error: Missing essential game data in the YAML file. Please check 'home_team', 'away_team', 'home_starting_pitcher', 'away_starting_pitcher', 'home_lineup', and 'away_lineup'.")
-        exit(1)
+        return None
 
     print(f"Analyzing matchup: {away_team_abbr} vs {home_team_abbr}")
 
     # Initialize Pitcher Analysis
-    home_sp = PitcherAnalysis(home_sp_name, home_team_abbr, opp_lineup_handedness=away_lineup_handedness)
-    away_sp = PitcherAnalysis(away_sp_name, away_team_abbr, opp_lineup_handedness=home_lineup_handedness)
+    with profiler.stage('pitcher analysis'):
+        home_sp = PitcherAnalysis(home_sp_name, home_team_abbr, opp_lineup_handedness=away_lineup_handedness)
+        away_sp = PitcherAnalysis(away_sp_name, away_team_abbr, opp_lineup_handedness=home_lineup_handedness)
 
-    home_sp.analyze()
-    away_sp.analyze()
+        home_sp.analyze()
+        away_sp.analyze()
 
     # Initialize Hitter Analysis for each player in the lineup
-    home_hitters = []
-    for hitter_data in home_lineup_data:
-        hitter = HitterAnalysis(hitter_data['name'], home_team_abbr)
-        hitter.analyze()
-        home_hitters.append(hitter)
-
-    away_hitters = []
-    for hitter_data in away_lineup_data:
-        hitter = HitterAnalysis(hitter_data['name'], away_team_abbr)
-        hitter.analyze()
-        away_hitters.append(hitter)
-
-    # Initialize Bullpen Analysis (requires 'last3dayspitching.csv' to be present)
-    home_recent_relievers = []
-    away_recent_relievers = []
-    if 'last3dayspitching' in csv_files:
-        home_recent_relievers = get_recent_relievers_for_team(home_team_abbr, csv_files['last3dayspitching'])
-        away_recent_relievers = get_recent_relievers_for_team(away_team_abbr, csv_files['last3dayspitching'])
-    else:
-        print("Cannot perform bullpen analysis: last3dayspitching.csv not loaded.")
+    with profiler.stage('hitter analysis'):
+        home_hitters = []
+        for hitter_data in home_lineup_data:
+            hitter = HitterAnalysis(hitter_data['name'], home_team_abbr)
+            hitter.analyze()
+            home_hitters.append(hitter)
 
-    home_bullpen = BullpenAnalysis(home_recent_relievers, home_team_abbr)
-    away_bullpen = BullpenAnalysis(away_recent_relievers, away_team_abbr)
+        away_hitters = []
+        for hitter_data in away_lineup_data:
+            hitter = HitterAnalysis(hitter_data['name'], away_team_abbr)
+            hitter.analyze()
+            away_hitters.append(hitter)
 
-    home_bullpen.analyze()
-    away_bullpen.analyze()
+    # Initialize Bullpen Analysis (requires 'last3dayspitching.csv' or the pitching log)
+    with profiler.stage('bullpen'):
+        home_recent_relievers = []
+        away_recent_relievers = []
+        if bullpen_data_available():
+            home_recent_relievers = get_recent_relievers_for_team(home_team_abbr)
+            away_recent_relievers = get_recent_relievers_for_team(away_team_abbr)
+        else:
+            print("Cannot perform bullpen analysis: last3dayspitching.csv not loaded.")
+
+        home_bullpen = BullpenAnalysis(home_recent_relievers, home_team_abbr)
+        away_bullpen = BullpenAnalysis(away_recent_relievers, away_team_abbr)
+
+        home_bullpen.analyze()
+        away_bullpen.analyze()
 
     # Get recent team OPS for 'cold team' check
-    recent_ops = get_recent_team_ops() # Now global or can be passed if preferred
+    with profiler.stage('team OPS'):
+        recent_ops = get_recent_team_ops()
 
     # Get park factors
     home_park_name = TEAM_TO_PARK.get(home_team_abbr)
-    park_factors = PARK_FACTORS_2025.get(home_park_name, {'runs': 1.0, 'hr': 1.0, 'woba': 1.0})
+    park_factors = TEAM_PARK_FACTORS.get(home_team_abbr, NEUTRAL_PARK_FACTORS)
 
-    print("--- HOME STARTING PITCHER ANALYSIS ---")
-    home_sp.print_report()
-    print("\n--- AWAY STARTING PITCHER ANALYSIS ---")
-    away_sp.print_report()
+    with profiler.stage('triggers/bets'):
+        home_sp_triggers, home_sp_vulnerability_score = check_pitcher_triggers(home_sp)
+        away_sp_triggers, away_sp_vulnerability_score = check_pitcher_triggers(away_sp)
 
-     # --- THIS IS WHERE YOU INSERT THE NEW ADVANCED PITCHER TRIGGERS CODE ---
-    home_sp_triggers, home_sp_vulnerability_score = check_pitcher_triggers(home_sp)
-    away_sp_triggers, away_sp_vulnerability_score = check_pitcher_triggers(away_sp)
+        update_pitcher_flags_from_advanced(home_sp, home_sp_triggers)
+        update_pitcher_flags_from_advanced(away_sp, away_sp_triggers)
 
-   
-    print("\n--- ADVANCED PITCHER TRIGGERS ---")
-    print("Home SP:", home_sp_triggers, f"(Vulnerability Score: {home_sp_vulnerability_score:.2f})")
-    print("Away SP:", away_sp_triggers, f"(Vulnerability Score: {away_sp_vulnerability_score:.2f})")
+        model = evaluate_triggers_and_bets(
+            home_sp, away_sp, home_hitters, away_hitters,
+            home_bullpen, away_bullpen, park_factors, home_team_abbr, away_team_abbr,
+            home_sp_vulnerability_score, away_sp_vulnerability_score
+        )
+
+    return {
+        'home_team': home_team_abbr,
+        'away_team': away_team_abbr,
+        'park': home_park_name,
+        'park_factors': park_factors,
+        'home_sp': home_sp,
+        'away_sp': away_sp,
+        'home_hitters': home_hitters,
+        'away_hitters': away_hitters,
+        'home_bullpen': home_bullpen,
+        'away_bullpen': away_bullpen,
+        'recent_ops': recent_ops,
+        'home_sp_triggers': home_sp_triggers,
+        'away_sp_triggers': away_sp_triggers,
+        'home_sp_vulnerability_score': home_sp_vulnerability_score,
+        'away_sp_vulnerability_score': away_sp_vulnerability_score,
+        'model': model,
+    }
 
-    update_pitcher_flags_from_advanced(home_sp, home_sp_triggers)
-    update_pitcher_flags_from_advanced(away_sp, away_sp_triggers)
+def print_game_report(game):
+    print("--- HOME STARTING PITCHER ANALYSIS ---")
+    game['home_sp'].print_report()
+    print("\n--- AWAY STARTING PITCHER ANALYSIS ---")
+    game['away_sp'].print_report()
 
+    print("\n--- ADVANCED PITCHER TRIGGERS ---")
+    print("Home SP:", game['home_sp_triggers'], f"(Vulnerability Score: {game['home_sp_vulnerability_score']:.2f})")
+    print("Away SP:", game['away_sp_triggers'], f"(Vulnerability Score: {game['away_sp_vulnerability_score']:.2f})")
 
     print("\n--- HOME HITTERS ANALYSIS (Sample) ---")
-    for hitter in home_hitters:
+    for hitter in game['home_hitters']:
         hitter.print_report()
     print("\n--- AWAY HITTERS ANALYSIS (Sample) ---")
-    for hitter in away_hitters:
+    for hitter in game['away_hitters']:
         hitter.print_report()
 
-    print_triggers_and_bets(
-        home_sp, away_sp, home_hitters, away_hitters,
-        home_bullpen, away_bullpen, park_factors, home_team_abbr, away_team_abbr, # <--- Correct team abbr variables
-        home_sp_vulnerability_score, away_sp_vulnerability_score # <--- New vulnerability scores
+    print_model_result(game['model'])
+
+def json_ready(value):
+    # Plain JSON types: numpy scalars unwrapped, NaN/NA/NaT as null.
+    if isinstance(value, dict):
+        return {str(k): json_ready(v) for k, v in value.items()}
+    if isinstance(value, (list, tuple)):
+        return [json_ready(v) for v in value]
+    if isinstance(value, np.generic):
+        value = value.item()
+    if isinstance(value, float):
+        return None if np.isnan(value) else value
+    if value is pd.NA or value is pd.NaT:
+        return None
+    if isinstance(value, (pd.Timestamp, datetime.date)):
+        return value.isoformat()
+    return value
+
+def game_record(game):
+    """One structured record per game for --output json/ndjson."""
+    return json_ready({
+        'home_team': game['home_team'],
+        'away_team': game['away_team'],
+        'park': game['park'],
+        'park_factors': game['park_factors'],
+        'pitchers': {
+            'home': {**game['home_sp'].to_record(), 'triggers': game['home_sp_triggers'], 'vulnerability_score': game['home_sp_vulnerability_score']},
+            'away': {**game['away_sp'].to_record(), 'triggers': game['away_sp_triggers'], 'vulnerability_score': game['away_sp_vulnerability_score']},
+        },
+        'hitters': {
+            'home': [h.to_record() for h in game['home_hitters']],
+            'away': [h.to_record() for h in game['away_hitters']],
+        },
+        'bullpen': {
+            'home': {'team': game['home_team'], **game['home_bullpen'].summary(), 'tired': game['model']['home_tired']},
+            'away': {'team': game['away_team'], **game['away_bullpen'].summary(), 'tired': game['model']['away_tired']},
+        },
+        'recent_ops': {'home': game['recent_ops'].get(game['home_team']), 'away': game['recent_ops'].get(game['away_team'])},
+        'triggers': game['model']['triggers'],
+        'bets': game['model']['bets'],
+        'bet_types': game['model']['bet_types'],
+    })
+
+def error_record(game_info, message):
+    return {'home_team': game_info.get('home_team'), 'away_team': game_info.get('away_team'), 'error': message}
+
+class GameRecordWriter:
+    """Streams game records: 'ndjson' one line per game, 'json' one array.
+
+    Each record is written and flushed as soon as its game finishes.
+    """
+    def __init__(self, fmt, out=None):
+        self.fmt = fmt
+        self.out = out or sys.stdout
+        self.count = 0
+
+    def write(self, record):
+        if self.fmt == 'ndjson':
+            self.out.write(json.dumps(record) + '\n')
+        else:
+            self.out.write(('[\n' if self.count == 0 else ',\n') + json.dumps(record, indent=2))
+        self.count += 1
+        self.out.flush()
+
+    def close(self):
+        if self.fmt == 'json':
+            self.out.write('[]\n' if self.count == 0 else '\n]\n')
+            self.out.flush()
+
+def analyze_game(game_info, writer=None):
+    """Analyze one game: print the text report, or hand a record to writer.
+
+    With a writer, anything the analysis prints goes to stderr so stdout
+    carries only records. Returns False when the game block is incomplete.
+    """
+    if writer is None:
+        game = evaluate_game(game_info)
+        if game is None:
+            return False
+        with profiler.stage('reporting'):
+            print_game_report(game)
+        return True
+    with contextlib.redirect_stdout(sys.stderr):
+        game = evaluate_game(game_info)
+    with profiler.stage('reporting'):
+        writer.write(error_record(game_info, 'missing game data') if game is None else game_record(game))
+    return game is not None
+
+def _analyze_game_worker(game_info, output='text'):
+    # Worker entry point: capture the report (or, for structured output, the
+    # analysis chatter plus the record) so the parent emits in slate order.
+    buf = io.StringIO()
+    record = None
+    with contextlib.redirect_stdout(buf):
+        try:
+            if output == 'text':
+                analyze_game(game_info)
+            else:
+                game = evaluate_game(game_info)
+                record = error_record(game_info, 'missing game data') if game is None else game_record(game)
+        except Exception as e:
+            print(f"Error analyzing game {game_info.get('away_team')} @ {game_info.get('home_team')}: {e}")
+            if output != 'text':
+                record = error_record(game_info, str(e))
+    return buf.getvalue(), record
+
+def _emit_slate(results, writer):
+    if writer is None:
+        for text, _ in results:
+            print(text)
+        return
+    for text, record in results:
+        sys.stderr.write(text)
+        if record is not None:
+            writer.write(record)
+
+def preload_datasets(keys=None):
+    return csv_files.load_many(GAME_DATASETS if keys is None else keys, workers=LOAD_WORKERS)
+
+def run_slate(games, workers=None, writer=None):
+    output = 'text' if writer is None else writer.fmt
+    with profiler.stage('load'):
+        preload_datasets()
+    with profiler.stage('team OPS'):
+        get_team_form()
+    # Stage timings live in this process, so profiled slates run serially.
+    workers = 1 if profiler.enabled else min(workers or os.cpu_count() or 1, len(games))
+    if workers <= 1:
+        results = (_analyze_game_worker(game, output) for game in games)
+        _emit_slate(results, writer)
+        return
+    # Fork lets workers share the parent's loaded frames; elsewhere each
+    # worker falls back to loading lazily (cheap with warm snapshots). Under
+    # fork the league-wide tables are built once here, the pitcher features
+    # and team form go out through the shared feature store, and gc.freeze
+    # keeps the workers' collector from dirtying (and so copying) the
+    # inherited pages. The store is keyed by this process's crosswalk IDs,
+    # which only forked workers inherit, so spawned workers go without it.
+    try:
+        ctx = multiprocessing.get_context('fork')
+    except ValueError:
+        ctx = None
+    with contextlib.ExitStack() as stack:
+        pool_options = {}
+        if ctx is not None:
+            warm_caches()
+            directory = stack.enter_context(tempfile.TemporaryDirectory(prefix='mlb_features_'))
+            export_feature_stores(directory)
+            gc.freeze()
+            stack.callback(gc.unfreeze)
+            pool_options = {'initializer': attach_feature_stores, 'initargs': (directory,)}
+        pool = stack.enter_context(concurrent.futures.ProcessPoolExecutor(max_workers=workers, mp_context=ctx, **pool_options))
+        _emit_slate(pool.map(_analyze_game_worker, games, [output] * len(games)), writer)
+
+# === GAME SIMULATION ===
+
+LEAGUE_OPS = 0.711
+LEAGUE_ERA = 4.10
+# League per-PA rates of walk (incl. HBP), single, double, triple and home
+# run; every other PA is an out.
+PA_EVENT_RATES = np.array([0.094, 0.143, 0.044, 0.004, 0.030])
+# Runs scale roughly with the square of the reach rates, so a pitcher's
+# ERA ratio moves each PA rate by its square root.
+SIM_PITCHER_EXPONENT = 0.5
+SIM_STARTER_INNINGS = 6
+# Bullpen reach rates rise by this much when every listed reliever is tired.
+SIM_TIRED_BULLPEN_PENALTY = 0.10
+# Chance runners take the extra base (see base_transitions), scaled by the
+# park's run factor.
+SIM_EXTRA_BASE_RATE = 0.35
+SIM_MAX_INNINGS = 15
+SIMULATIONS = 100_000
+SIM_TOTAL_LINES = (6.5, 7.5, 8.5, 9.5, 10.5)
+
+def _era_factor(era):
+    era = _parse_ops(era)
+    if not era or era <= 0 or np.isnan(era):
+        return 1.0
+    return float(np.clip(era / LEAGUE_ERA, 0.5, 2.0)) ** SIM_PITCHER_EXPONENT
+
+def _park_neutral(names, metric):
+    # venue_metrics without a venue: the park-neutral rate, NaN if unknown.
+    neutral = venue_metrics(names)
+    return neutral[metric].tolist() if metric in neutral.columns else [np.nan] * len(names)
+
+def starter_run_factor(sp):
+    # xERA when the advanced data has it (park-neutral as measured), else
+    # the park-neutral ERA, else ERA.
+    era = sp.advanced.get('xERA')
+    if _parse_ops(era):
+        return _era_factor(era)
+    neutral = _park_neutral([sp.name], 'pitcher.ERA')[0]
+    return _era_factor(sp.classic.get('ERA') if np.isnan(neutral) else neutral)
+
+def bullpen_run_factor(bullpen):
+    factor = _era_factor(get_team_bullpen_stats(bullpen.team).get('ERA'))
+    if bullpen.stats:
+        tired_share = sum(1 for r in bullpen.stats if r['tired']) / len(bullpen.stats)
+        factor *= 1 + SIM_TIRED_BULLPEN_PENALTY * tired_share
+    return factor
+
+def lineup_ops(hitters):
+    # Park-neutral OPS where known: a hitter's OPS carries the home park,
+    # and pa_event_probs applies the venue's.
+    neutral = _park_neutral([h.name for h in hitters], 'hitter.OPS')
+    ops = [_parse_ops(h.classic.get('OPS')) if np.isnan(n) else n for h, n in zip(hitters, neutral)]
+    ops = [v if v and v > 0 else LEAGUE_OPS for v in ops]
+    return np.array(ops or [LEAGUE_OPS] * 9)
+
+def pa_event_probs(ops, pitcher_factor, park_factors):
+    """PA event probabilities (batters, 5) for one lineup: walk, 1B, 2B, 3B, HR.
+
+    League rates scaled by each hitter's (park-neutral) OPS relative to
+    league, the pitcher's factor, the park's wOBA factor (walks and non-HR
+    hits) and HR factor (home runs).
+    """
+    probs = PA_EVENT_RATES[None, :] * (ops / LEAGUE_OPS)[:, None] * pitcher_factor
+    probs[:, :4] *= park_factors.get('woba', 1.0)
+    probs[:, 4] *= park_factors.get('hr', 1.0)
+    reach = probs.sum(axis=1, keepdims=True)
+    return probs * np.minimum(1.0, 0.6 / reach)
+
+# A PA outcome is one of 12 symbols: event * 2 + extra, where event is 0 walk,
+# 1 single, 2 double, 3 triple, 4 home run, 5 out and extra says whether
+# runners take the extra base. Symbols are drawn from a 16-bit inverse-CDF
+# table, so one draw is one lookup (probabilities exact to 2**-16).
+SIM_DRAW_BITS = 16
+
+def symbol_tables(probs, extra_p):
+    """(batters, 2**SIM_DRAW_BITS) int8 symbol lookup for one lineup/pitcher."""
+    events = np.concatenate([probs, 1 - probs.sum(axis=1, keepdims=True)], axis=1)
+    symbols = (events[:, :, None] * np.array([1 - extra_p, extra_p])).reshape(len(probs), 12)
+    cum = np.cumsum(symbols, axis=1)
+    grid = (np.arange(1 << SIM_DRAW_BITS) + 0.5) / (1 << SIM_DRAW_BITS)
+    table = np.stack([np.searchsorted(row, grid, side='right') for row in cum])
+    return np.minimum(table, 11).astype(np.int8)
+
+# Half-inning state: outs * 8 + bases, where bases is a bitmask (1 first,
+# 2 second, 4 third); after the third out the state is SIM_INNING_OVER.
+SIM_INNING_OVER = 24
+
+@functools.lru_cache(maxsize=None)
+def base_transitions():
+    """Lookup tables indexed by code = state * 12 + symbol.
+
+    Returns the next state * 12, and runs * 2 + (1 if a PA was played) for
+    the code; SIM_INNING_OVER absorbs every symbol. Walks force runners;
+    on an extra-base symbol a runner scores from second on a single, goes
+    first to third on a single and scores from first on a double, and an
+    out with fewer than two outs moves every runner up a base (sacrifice
+    flies, productive groundouts).
+    """
+    next_state = np.full((SIM_INNING_OVER + 1) * 12, SIM_INNING_OVER * 12, dtype=np.intp)
+    result = np.zeros((SIM_INNING_OVER + 1) * 12, dtype=np.int8)
+    for outs in range(3):
+        for bases in range(8):
+            f1, f2, f3 = bases & 1, (bases >> 1) & 1, (bases >> 2) & 1
+            for symbol in range(12):
+                event, extra = divmod(symbol, 2)
+                if event == 0:
+                    n1, n2, n3, scored = 1, f2 | f1, f3 | (f1 & f2), f1 & f2 & f3
+                elif event == 1:
+                    n1, n2, n3 = 1, f1 & (1 - extra), (f2 & (1 - extra)) | (f1 & extra)
+                    scored = f3 + (f2 & extra)
+                elif event == 2:
+                    n1, n2, n3, scored = 0, 1, f1 & (1 - extra), f3 + f2 + (f1 & extra)
+                elif event == 3:
+                    n1, n2, n3, scored = 0, 0, 1, f1 + f2 + f3
+                elif event == 4:
+                    n1, n2, n3, scored = 0, 0, 0, f1 + f2 + f3 + 1
+                elif extra and outs < 2:
+                    n1, n2, n3, scored = 0, f1, f2, f3
+                else:
+                    n1, n2, n3, scored = f1, f2, f3, 0
+                new_outs = outs + (event == 5)
+                new_state = SIM_INNING_OVER if new_outs == 3 else new_outs * 8 + (n1 | (n2 << 1) | (n3 << 2))
+                code = (outs * 8 + bases) * 12 + symbol
+                next_state[code] = new_state * 12
+                result[code] = scored * 2 + 1
+    return next_state, result
+
+def _half_inning(table, batter, live, rng, deficit=None, ghost_runner=False):
+    # Plays one half inning in every live simulation at once, one PA per
+    # step. Finished simulations sit in SIM_INNING_OVER and are compacted
+    # away once they are most of those left. Advances `batter` in place
+    # and returns the runs scored. With `deficit`, a simulation ends once it
+    # scores more than it (walk-off).
+    next_state, results = base_transitions()
+    over = SIM_INNING_OVER * 12
+    lineup_size, width = table.shape
+    flat_table = table.ravel()
+    runs = np.zeros(len(batter), dtype=np.int16)
+    idx = np.flatnonzero(live)
+    state = np.full(len(idx), 2 * 12 if ghost_runner else 0, dtype=np.intp)
+    scored = np.zeros(len(idx), dtype=np.int16)
+    played = np.zeros(len(idx), dtype=np.int16)
+    start = batter[idx].astype(np.intp)
+    row = start * width
+    need = deficit[idx] if deficit is not None else None
+    while len(idx):
+        code = state + np.take(flat_table, row + rng.integers(0, width, size=len(idx), dtype=np.uint16))
+        state = np.take(next_state, code)
+        result = np.take(results, code)
+        scored += result >> 1
+        played += result & 1
+        row += width
+        row[row == lineup_size * width] = 0
+        if need is not None:
+            state[scored > need] = over
+        done = state == over
+        finished = np.count_nonzero(done)
+        if 4 * finished >= 3 * len(idx):
+            out = np.flatnonzero(done)
+            runs[idx[out]] = scored[out]
+            batter[idx[out]] = (start[out] + played[out]) % lineup_size
+            keep = np.flatnonzero(~done)
+            idx, state, scored, played, start, row = (a.take(keep) for a in (idx, state, scored, played, start, row))
+            if need is not None:
+                need = need.take(keep)
+    return runs
+
+def simulate_game(away_tables, home_tables, n=SIMULATIONS, seed=None, starter_innings=SIM_STARTER_INNINGS):
+    """Simulate n games; returns (away runs, home runs) arrays.
+
+    away_tables/home_tables are the symbol_tables() for each lineup against
+    the opposing starter (0) and bullpen (1). Games go nine innings (no
+    bottom ninth when the home team leads, walk-offs end the game), then
+    extras with a runner on second up to SIM_MAX_INNINGS; games still tied
+    after that stay tied.
+    """
+    rng = np.random.default_rng(seed)
+    away = np.zeros(n, dtype=np.int16)
+    home = np.zeros(n, dtype=np.int16)
+    away_batter = np.zeros(n, dtype=np.int8)
+    home_batter = np.zeros(n, dtype=np.int8)
+    live = np.ones(n, dtype=bool)
+    for inning in range(1, SIM_MAX_INNINGS + 1):
+        phase = 0 if inning <= starter_innings else 1
+        extras = inning > 9
+        away += _half_inning(away_tables[phase], away_batter, live, rng, ghost_runner=extras)
+        if inning < 9:
+            home += _half_inning(home_tables[phase], home_batter, live, rng)
+            continue
+        bottom = live & (home <= away)
+        home += _half_inning(home_tables[phase], home_batter, bottom, rng, deficit=away - home, ghost_runner=extras)
+        live &= home == away
+        if not live.any():
+            break
+    return away, home
+
+def simulate_evaluated_game(game, n=SIMULATIONS, seed=None):
+    """Run distributions for an evaluate_game() result."""
+    park = game['park_factors']
+    extra_p = min(1.0, SIM_EXTRA_BASE_RATE * park.get('runs', 1.0))
+    tables = {}
+    for side, other in (('away', 'home'), ('home', 'away')):
+        ops = lineup_ops(game[f'{side}_hitters'])
+        factors = (starter_run_factor(game[f'{other}_sp']), bullpen_run_factor(game[f'{other}_bullpen']))
+        tables[side] = [symbol_tables(pa_event_probs(ops, factor, park), extra_p) for factor in factors]
+    away, home = simulate_game(tables['away'], tables['home'], n=n, seed=seed)
+    return simulation_summary(game['away_team'], game['home_team'], away, home)
+
+def simulation_summary(away_team, home_team, away, home, lines=SIM_TOTAL_LINES):
+    total = away.astype(np.int32) + home
+    n = len(total)
+    return {
+        'away_team': away_team,
+        'home_team': home_team,
+        'simulations': n,
+        'away_runs': float(away.mean()),
+        'home_runs': float(home.mean()),
+        'total_runs': float(total.mean()),
+        'total_p10': float(np.percentile(total, 10)),
+        'total_median': float(np.median(total)),
+        'total_p90': float(np.percentile(total, 90)),
+        'home_win': float((home > away).mean()),
+        'away_win': float((away > home).mean()),
+        'total_over': {str(line): float((total > line).mean()) for line in lines},
+        # P(runs == k) for k = 0, 1, ...
+        'total_pmf': (np.bincount(total) / n).tolist(),
+        'away_pmf': (np.bincount(away) / n).tolist(),
+        'home_pmf': (np.bincount(home) / n).tolist(),
+    }
+
+def simulate_slate(games, n=SIMULATIONS, seed=None):
+    # One independent random stream per game, reproducible from `seed`.
+    with profiler.stage('load'):
+        preload_datasets()
+    seeds = np.random.SeedSequence(seed).spawn(len(games))
+    results = []
+    for game_info, game_seed in zip(games, seeds):
+        game = evaluate_game(game_info)
+        if game is None:
+            results.append(error_record(game_info, 'missing game data'))
+            continue
+        with profiler.stage('simulation'):
+            results.append(simulate_evaluated_game(game, n=n, seed=game_seed))
+    return results
+
+def print_simulations(results):
+    lines = ' '.join(f"{'O' + str(line):>6}" for line in SIM_TOTAL_LINES)
+    print(f"{'Game':<12} {'Away':>5} {'Home':>5} {'Total':>6} {'P10-P90':>8} {'Home W':>7} {lines}")
+    for r in results:
+        game = f"{r['away_team']} @ {r['home_team']}"
+        if 'error' in r:
+            print(f"{game:<12} {r['error']}")
+            continue
+        overs = ' '.join(f"{r['total_over'][str(line)]:>6.1%}" for line in SIM_TOTAL_LINES)
+        spread = f"{r['total_p10']:.0f}-{r['total_p90']:.0f}"
+        print(f"{game:<12} {r['away_runs']:>5.2f} {r['home_runs']:>5.2f} {r['total_runs']:>6.2f} {spread:>8} {r['home_win']:>7.1%} {overs}")
+
+# === BACKTEST ===
+
+# How each market settles from a final score: +1 win, 0 push, -1 loss, NaN
+# when the score or line is missing.
+BET_MARKETS = {
+    'total_over': lambda r: np.sign(r['home_score'] + r['away_score'] - r['total']),
+    'total_under': lambda r: np.sign(r['total'] - r['home_score'] - r['away_score']),
+    'home_team_total_over': lambda r: np.sign(r['home_score'] - r['home_team_total']),
+    'away_team_total_over': lambda r: np.sign(r['away_score'] - r['away_team_total']),
+    'home_moneyline': lambda r: np.sign(r['home_score'] - r['away_score']),
+    'away_moneyline': lambda r: np.sign(r['away_score'] - r['home_score']),
+}
+RESULT_COLUMNS = ['home_score', 'away_score', 'total', 'home_team_total', 'away_team_total']
+
+# {(csv_key, column): (source frame, first value per player ID)}
+first_values_cache = {}
+
+def _parse_ops(value):
+    # The float() the trigger code applies to a hitter's OPS; None if it fails.
+    if value is None:
+        return None
+    try:
+        return float(str(value).replace('%', '').replace(',', '').strip())
+    except Exception:
+        return None
+
+def first_values(csv_key, column):
+    """{player ID: column value from the player's first row}.
+
+    What classic_csv_lookup(...)[column] returns, for every player at once.
+    """
+    df = csv_files.get(csv_key)
+    name_column = player_name_column(csv_key, df)
+    if df is None or column not in df.columns or name_column not in df.columns:
+        return {}
+    cached = first_values_cache.get((csv_key, column))
+    if cached is None or cached[0] is not df:
+        count_scan('first_values', csv_key)
+        keys = player_ids(df, name_column)
+        first = (~keys.duplicated() & keys.notna()).values
+        cached = (df, dict(zip(keys[first].astype(int).tolist(), df[column][first].tolist())))
+        first_values_cache[(csv_key, column)] = cached
+    return cached[1]
+
+def backtest_day_inputs(games, as_of):
+    """Threshold-free inputs of the bet-rule features for one day's games.
+
+    Mirrors evaluate_game/evaluate_triggers_and_bets without building the
+    per-player analysis objects, but stops short of the tunable thresholds
+    (model_thresholds): pitcher scores, lineup OPS, recent team OPS and
+    reliever usage are kept raw, so threshold_features can apply any
+    setting later. Returns one row per game.
+    """
+    table = get_pitcher_feature_table()
+    screen = screen_pitcher_triggers(table)
+    velo = get_velocity_trends()
+    velo_anomaly = velo['velo_anomaly'].to_dict() if velo is not None else {}
+    hitter_ops = first_values('homeandawatbatter', 'OPS')
+    split_ops = {'L': first_values('pitcher_splits_lhb', 'OPS'), 'R': first_values('pitcher_splits_rhb', 'OPS')}
+    recent = get_recent_team_ops(as_of=as_of)
+    fatigue = get_bullpen_fatigue() if bullpen_data_available() else None
+    usage = {}
+    if fatigue is not None:
+        lines = fatigue['usage']
+        usage = dict(zip(lines.index, zip(lines['ip'].astype(float), lines['appearances'].astype(float))))
+
+    def numeric(column):
+        return pd.to_numeric(table[column], errors='coerce') if column in table.columns else pd.Series(np.nan, index=table.index)
+    # is_ace: missing (or zero) values fall back to 99/99/0 and never qualify.
+    ace = ((numeric('advanced.xERA') < 2.75) & (numeric('classic.WHIP') < 1.05) & (numeric('classic.K/9') > 10)).to_dict()
+    advanced_fade = ((screen['hard_hit_danger'] & screen['barrel_danger']) | screen['low_k_percentile']).to_dict()
+    score = screen['pitcher_vulnerability_score'].to_dict()
+
+    bullpens = {}
+    def bullpen(team):
+        # Usage of the relievers the BullpenAnalysis evaluate_game would
+        # build, plus whether the team's bullpen stats alone mean risk.
+        if team not in bullpens:
+            relievers = fatigue['relievers_by_team'].get(team, []) if fatigue is not None else []
+            lines = [usage.get(player_crosswalk.resolve(name), (np.nan, np.nan)) for name in relievers]
+            bullpens[team] = (
+                tuple(ip for ip, _ in lines),
+                tuple(appearances for _, appearances in lines),
+                tired_count_at_risk(0, get_team_bullpen_stats(team)),
+            )
+        return bullpens[team]
+
+    def platoon_vulnerable(player_id, hands):
+        # The VULNERABLE notes of platoon_matchup_analysis.
+        for hand in ('L', 'R'):
+            ops = split_ops[hand].get(player_id)
+            if hands.count(hand) >= PLATOON_STACK_MIN and float(ops or 0) > PLATOON_OPS_CUTOFF:
+                return True
+        return False
+
+    def pitcher(name, hands):
+        player_id = player_crosswalk.resolve(name)
+        return {
+            'score': score.get(player_id, np.nan),
+            'advanced_fade': bool(advanced_fade.get(player_id, False)),
+            'ace': bool(ace.get(player_id, False)),
+            'velo_anomaly': bool(velo_anomaly.get(player_id, False)),
+            'platoon_vulnerable': platoon_vulnerable(player_id, hands),
+        }
+
+    def lineup(hitters):
+        ops = [_parse_ops(hitter_ops.get(player_crosswalk.resolve(h['name']))) for h in hitters]
+        return tuple(v for v in ops if v is not None)
+
+    rows = []
+    for game in games:
+        home, away = game.get('home_team'), game.get('away_team')
+        home_lineup, away_lineup = game.get('home_lineup') or [], game.get('away_lineup') or []
+        if not all([home, away, game.get('home_starting_pitcher'), game.get('away_starting_pitcher'), home_lineup, away_lineup]):
+            continue
+        home_sp = pitcher(game['home_starting_pitcher'], [h['hand'] for h in away_lineup])
+        away_sp = pitcher(game['away_starting_pitcher'], [h['hand'] for h in home_lineup])
+        home_ops, away_ops = lineup(home_lineup), lineup(away_lineup)
+        home_avg_ops = np.mean(home_ops) if home_ops else 0.7
+        away_avg_ops = np.mean(away_ops) if away_ops else 0.7
+        home_ip, home_app, home_stats_risk = bullpen(home)
+        away_ip, away_app, away_stats_risk = bullpen(away)
+        park_factors = TEAM_PARK_FACTORS.get(home, NEUTRAL_PARK_FACTORS)
+        rows.append({
+            'date': pd.Timestamp(as_of).normalize(),
+            'home_team': home,
+            'away_team': away,
+            'home_sp_velo_anomaly': home_sp['velo_anomaly'],
+            'home_sp_score': home_sp['score'],
+            'away_sp_score': away_sp['score'],
+            'home_sp_advanced_fade': home_sp['advanced_fade'],
+            'away_sp_advanced_fade': away_sp['advanced_fade'],
+            'home_ace': home_sp['ace'],
+            'away_ace': away_sp['ace'],
+            'home_reliever_ip': home_ip,
+            'away_reliever_ip': away_ip,
+            'home_reliever_app': home_app,
+            'away_reliever_app': away_app,
+            'home_bullpen_stats_risk': home_stats_risk,
+            'away_bullpen_stats_risk': away_stats_risk,
+            'home_lineup_ops': home_ops,
+            'away_lineup_ops': away_ops,
+            'home_recent_ops': recent.get(home, np.nan),
+            'away_recent_ops': recent.get(away, np.nan),
+            'pitchers_park': park_factors['runs'] < 0.95,
+            'dead_ball_lockout': bool((home_avg_ops < 0.68 or away_avg_ops < 0.68) and park_factors.get('hr', 1.0) < 1.0),
+            'home_sp_platoon_vulnerable': home_sp['platoon_vulnerable'],
+            'away_sp_platoon_vulnerable': away_sp['platoon_vulnerable'],
+        })
+    return pd.DataFrame(rows)
+
+def model_thresholds():
+    """The tunable thresholds behind the bet-rule features, as the model has them.
+
+    fade_score NaN is the advanced-trigger auto-fade rule
+    (update_pitcher_flags_from_advanced); a number fades a starter whose
+    pitcher_vulnerability_score is at least that instead.
+    """
+    return {
+        'fade_score': np.nan,
+        'firepower_ops': FIREPOWER_OPS,
+        'firepower_hitters': FIREPOWER_MIN_HITTERS,
+        'cold_ops': COLD_TEAM_OPS,
+        'tired_ip': TIRED_THRESHOLD_IP,
+        'tired_app': TIRED_THRESHOLD_APP,
+    }
+
+# Columns of backtest_day_inputs holding one value per hitter or reliever.
+RAGGED_INPUTS = ('home_lineup_ops', 'away_lineup_ops', 'home_reliever_ip', 'away_reliever_ip', 'home_reliever_app', 'away_reliever_app')
+
+def backtest_arrays(inputs):
+    """backtest_day_inputs rows as NumPy arrays, the ragged columns NaN padded."""
+    arrays = {}
+    for column in inputs.columns:
+        if column in ('date', 'home_team', 'away_team'):
+            continue
+        if column in RAGGED_INPUTS:
+            rows = inputs[column].tolist()
+            padded = np.full((len(rows), max(map(len, rows), default=0)), np.nan)
+            for i, row in enumerate(rows):
+                padded[i, :len(row)] = row
+            arrays[column] = padded
+        else:
+            arrays[column] = inputs[column].to_numpy(dtype=float if column.endswith(('_score', '_ops')) else bool)
+    return arrays
+
+def threshold_features(arrays, thresholds):
+    """BET_RULES features for every game under several threshold settings.
+
+    arrays is backtest_arrays output, thresholds maps each model_thresholds
+    name to one value per setting. Features a threshold touches come back
+    (settings, games), the rest (games,); the rules broadcast over both.
+    """
+    t = {name: np.asarray(values, dtype=float)[:, None] for name, values in thresholds.items()}
+    features = {name: arrays[name] for name in (
+        'home_sp_velo_anomaly', 'home_ace', 'away_ace', 'pitchers_park', 'dead_ball_lockout',
+        'home_sp_platoon_vulnerable', 'away_sp_platoon_vulnerable')}
+    for side in ('home', 'away'):
+        features[f'{side}_sp_auto_fade'] = np.where(
+            np.isnan(t['fade_score']), arrays[f'{side}_sp_advanced_fade'], arrays[f'{side}_sp_score'] >= t['fade_score'])
+        strong = (arrays[f'{side}_lineup_ops'] > t['firepower_ops'][..., None]).sum(axis=-1)
+        cold = arrays[f'{side}_recent_ops'] < t['cold_ops']
+        features[f'{side}_firepower'] = ~cold & (strong >= t['firepower_hitters'])
+        tired = (arrays[f'{side}_reliever_ip'] > t['tired_ip'][..., None]) | (arrays[f'{side}_reliever_app'] > t['tired_app'][..., None])
+        features[f'{side}_bullpen_risk'] = (tired.sum(axis=-1) >= 2) | arrays[f'{side}_bullpen_stats_risk']
+    return features
+
+# backtest_day_features columns, in order.
+BET_FEATURES = [
+    'home_sp_velo_anomaly', 'home_sp_auto_fade', 'away_sp_auto_fade', 'home_ace', 'away_ace',
+    'home_bullpen_risk', 'away_bullpen_risk', 'home_firepower', 'away_firepower',
+    'pitchers_park', 'dead_ball_lockout', 'home_sp_platoon_vulnerable', 'away_sp_platoon_vulnerable',
+]
+
+def backtest_day_features(games, as_of):
+    """Bet-rule features for one day's games, read off the league-wide tables.
+
+    backtest_day_inputs at the model's thresholds. Returns one row per game.
+    """
+    inputs = backtest_day_inputs(games, as_of)
+    if inputs.empty:
+        return inputs
+    thresholds = {name: [value] for name, value in model_thresholds().items()}
+    features = threshold_features(backtest_arrays(inputs), thresholds)
+    frame = inputs[['date', 'home_team', 'away_team']].copy()
+    for name in BET_FEATURES:
+        frame[name] = np.broadcast_to(features[name], (1, len(inputs)))[0]
+    return frame
+
+def load_backtest_results(path):
+    results = pd.read_csv(path, dtype={'home_team': str, 'away_team': str})
+    results['date'] = pd.to_datetime(results['date']).dt.normalize()
+    for column in RESULT_COLUMNS:
+        results[column] = pd.to_numeric(results[column], errors='coerce') if column in results.columns else np.nan
+    return results.drop_duplicates(['date', 'home_team', 'away_team'], keep='last')
+
+def backtest_days(season_dir):
+    days = []
+    for name in sorted(os.listdir(season_dir)):
+        try:
+            day = pd.Timestamp(datetime.date.fromisoformat(name))
+        except ValueError:
+            continue
+        if os.path.isdir(os.path.join(season_dir, name)):
+            days.append((day, os.path.join(season_dir, name)))
+    return days
+
+def _backtest_days(days, extract=backtest_day_features):
+    # Worker entry point: replay consecutive days, so unchanged files carry
+    # over from one day to the next. Chatter is returned, not printed.
+    buf = io.StringIO()
+    frames = []
+    with contextlib.redirect_stdout(buf):
+        for day, day_dir in days:
+            csv_files.switch_data_dir(day_dir, cache_dir=os.path.join(day_dir, '.mlb_cache') if CACHE_DIR else None)
+            games = load_games(day_dir)
+            if games:
+                frames.append(extract(games, as_of=day))
+    return buf.getvalue(), frames
+
+def replay_season(season_dir, results_path=None, workers=None, extract=backtest_day_features):
+    """extract(games, as_of) for every day of a season, merged with the results.
+
+    With several workers each replays one contiguous run of days.
+    """
+    results = load_backtest_results(results_path or os.path.join(season_dir, 'results.csv'))
+    days = backtest_days(season_dir)
+    workers = max(1, min(workers or os.cpu_count() or 1, len(days)))
+    bounds = np.linspace(0, len(days), workers + 1).astype(int)
+    chunks = [days[a:b] for a, b in zip(bounds, bounds[1:]) if b > a]
+    frames = []
+    with contextlib.ExitStack() as stack:
+        if workers == 1:
+            replayed = map(functools.partial(_backtest_days, extract=extract), chunks)
+        else:
+            try:
+                ctx = multiprocessing.get_context('fork')
+            except ValueError:
+                ctx = None
+            pool = stack.enter_context(concurrent.futures.ProcessPoolExecutor(max_workers=workers, mp_context=ctx))
+            replayed = pool.map(functools.partial(_backtest_days, extract=extract), chunks)
+        for text, day_frames in replayed:
+            sys.stdout.write(text)
+            frames.extend(day_frames)
+    games = pd.concat(frames, ignore_index=True) if frames else pd.DataFrame(columns=['date', 'home_team', 'away_team'])
+    games['date'] = pd.to_datetime(games['date'])
+    games = games.merge(results, on=['date', 'home_team', 'away_team'], how='left')
+    for column in RESULT_COLUMNS:
+        if column not in games.columns:
+            games[column] = np.nan
+    return games
+
+def run_backtest(season_dir, results_path=None, workers=None):
+    """Replay a season and report how each bet type settled.
+
+    season_dir holds one YYYY-MM-DD directory per day, each a full data drop
+    plus that day's game YAML(s); results_path (default
+    season_dir/results.csv) has date, home_team, away_team, home_score,
+    away_score and optionally total, home_team_total, away_team_total.
+    Unchanged files carry over between days (CSVRegistry.switch_data_dir),
+    so their derived tables are reused. With several workers each replays
+    one contiguous run of days. Returns (summary, games) frames.
+    """
+    games = replay_season(season_dir, results_path, workers)
+
+    # Every rule over every game at once.
+    features = {name: games[name].to_numpy(dtype=bool) for name in games.columns if games[name].dtype == bool}
+    outcomes = {market: settle(games).to_numpy(dtype=float) for market, settle in BET_MARKETS.items()}
+    rows = []
+    for bet, _, markets, fires in BET_RULES:
+        fired = fires(features) if len(games) else np.zeros(0, dtype=bool)
+        games[bet] = fired
+        for market in markets:
+            outcome = outcomes[market][fired]
+            hits, losses, pushes = int((outcome > 0).sum()), int((outcome < 0).sum()), int((outcome == 0).sum())
+            rows.append({
+                'bet': bet,
+                'market': market,
+                'fired': int(fired.sum()),
+                'hits': hits,
+                'losses': losses,
+                'pushes': pushes,
+                'ungraded': int(np.isnan(outcome).sum()),
+                'hit_rate': hits / (hits + losses) if hits + losses else None,
+            })
+    return pd.DataFrame(rows), games
+
+def print_backtest(summary, games):
+    days = games['date'].nunique() if len(games) else 0
+    graded = int(games['home_score'].notna().sum()) if len(games) else 0
+    print(f"=== BACKTEST: {len(games)} games over {days} days ({graded} with results) ===")
+    table = summary.copy()
+    table['hit_rate'] = table['hit_rate'].map(lambda r: '-' if r is None or pd.isna(r) else f"{r:.3f}")
+    print(table.to_string(index=False))
+
+# === THRESHOLD SWEEP ===
+
+# Values tried per model_thresholds name; NaN fade_score is the model's
+# advanced-trigger auto-fade rule. 4320 settings.
+SWEEP_GRID = {
+    'fade_score': (np.nan, 4.0, 5.0, 6.0, 7.0, 8.0),
+    'firepower_ops': (0.750, 0.775, 0.800, 0.825, 0.850),
+    'firepower_hitters': (1, 2, 3, 4),
+    'cold_ops': (0.650, 0.675, 0.700, 0.725),
+    'tired_ip': (1.0, 2.0, 3.0),
+    'tired_app': (1, 2, 3),
+}
+# Settings scored per threshold_features call.
+SWEEP_BATCH = 256
+# Units a winning bet returns at -110; a loss costs one.
+SWEEP_WIN_UNITS = 100 / 110
+
+sweep_state = {}
+
+def threshold_grid(grid):
+    """Every combination of a {name: values} grid, as {name: array}."""
+    axes = np.meshgrid(*[np.asarray(values, dtype=float) for values in grid.values()], indexing='ij')
+    return {name: axis.ravel() for name, axis in zip(grid, axes)}
+
+def score_thresholds(arrays, outcomes, thresholds, rules=BET_RULES):
+    """Bets, hits, losses and pushes of the rules under each threshold setting.
+
+    outcomes maps each BET_MARKETS market to one settled value per game
+    (NaN ungraded). Returns {count: array} with one entry per setting.
+    """
+    features = threshold_features(arrays, thresholds)
+    size = len(next(iter(thresholds.values())))
+    shape = (size, len(next(iter(outcomes.values()))))
+    counts = {name: np.zeros(size, dtype=np.int64) for name in ('bets', 'hits', 'losses', 'pushes')}
+    for _, _, markets, fires in rules:
+        fired = np.broadcast_to(fires(features), shape)
+        for market in markets:
+            outcome = outcomes[market]
+            counts['bets'] += np.count_nonzero(fired, axis=1)
+            counts['hits'] += np.count_nonzero(fired & (outcome > 0), axis=1)
+            counts['losses'] += np.count_nonzero(fired & (outcome < 0), axis=1)
+            counts['pushes'] += np.count_nonzero(fired & (outcome == 0), axis=1)
+    return counts
+
+def _sweep_init(directory, bets):
+    # Worker initializer: map the game arrays run_sweep saved, zero-copy.
+    sweep_state.update(
+        arrays=load_arrays(os.path.join(directory, 'games')),
+        outcomes=load_arrays(os.path.join(directory, 'outcomes')),
+        rules=[rule for rule in BET_RULES if rule[0] in bets],
     )
+
+def _sweep_batch(thresholds):
+    return score_thresholds(sweep_state['arrays'], sweep_state['outcomes'], thresholds, sweep_state['rules'])
+
+def run_sweep(season_dir, results_path=None, grid=None, workers=None, bets=None):
+    """Rank threshold settings by how the bet rules would have settled.
+
+    Replays the season once for the threshold-free inputs
+    (backtest_day_inputs), then scores every combination of grid (default
+    SWEEP_GRID, {name: values} over model_thresholds names) in batches of
+    SWEEP_BATCH across worker processes, which map the game arrays from
+    .npy files (save_arrays/load_arrays). bets limits the scoring to those
+    BET_RULES. Returns (table, games): one row per setting, best units
+    first, and the replayed games.
+    """
+    games = replay_season(season_dir, results_path, workers, extract=backtest_day_inputs)
+    rules = [rule for rule in BET_RULES if not bets or rule[0] in bets]
+    thresholds = threshold_grid({**{name: [value] for name, value in model_thresholds().items()}, **(grid or SWEEP_GRID)})
+    size = len(thresholds['fade_score'])
+    batches = [{name: values[a:a + SWEEP_BATCH] for name, values in thresholds.items()} for a in range(0, size, SWEEP_BATCH)]
+    names = ('bets', 'hits', 'losses', 'pushes')
+    if len(games):
+        arrays = backtest_arrays(games[[c for c in games.columns if c not in RESULT_COLUMNS]])
+        outcomes = {market: settle(games).to_numpy(dtype=float) for market, settle in BET_MARKETS.items()}
+        workers = max(1, min(workers or os.cpu_count() or 1, len(batches)))
+        if workers == 1:
+            scored = [score_thresholds(arrays, outcomes, batch, rules) for batch in batches]
+        else:
+            try:
+                ctx = multiprocessing.get_context('fork')
+            except ValueError:
+                ctx = None
+            with contextlib.ExitStack() as stack:
+                directory = stack.enter_context(tempfile.TemporaryDirectory(prefix='mlb_sweep_'))
+                save_arrays(os.path.join(directory, 'games'), arrays)
+                save_arrays(os.path.join(directory, 'outcomes'), outcomes)
+                pool = stack.enter_context(concurrent.futures.ProcessPoolExecutor(
+                    max_workers=workers, mp_context=ctx, initializer=_sweep_init,
+                    initargs=(directory, [rule[0] for rule in rules])))
+                scored = list(pool.map(_sweep_batch, batches))
+        counts = {name: np.concatenate([batch[name] for batch in scored]) for name in names}
+    else:
+        counts = {name: np.zeros(size, dtype=np.int64) for name in names}
+
+    table = pd.DataFrame(thresholds)
+    for name, values in counts.items():
+        table[name] = values
+    decided = table['hits'] + table['losses']
+    table['hit_rate'] = (table['hits'] / decided).where(decided > 0)
+    table['units'] = table['hits'] * SWEEP_WIN_UNITS - table['losses']
+    model = pd.Series(True, index=table.index)
+    for name, value in model_thresholds().items():
+        model &= (table[name] == value) | (table[name].isna() & pd.isna(value))
+    table['model'] = model
+    table = table.sort_values(['units', 'hit_rate'], ascending=False, kind='stable', na_position='last').reset_index(drop=True)
+    table.insert(0, 'rank', np.arange(1, len(table) + 1))
+    return table, games
+
+def print_sweep(table, games, limit=25):
+    print(f"=== THRESHOLD SWEEP: {len(table)} settings over {len(games)} games ===")
+    shown = table.head(limit).copy()
+    for name in model_thresholds():
+        shown[name] = shown[name].map(lambda v: 'advanced' if pd.isna(v) else f"{v:g}")
+    shown['hit_rate'] = shown['hit_rate'].map(lambda r: '-' if pd.isna(r) else f"{r:.3f}")
+    shown['units'] = shown['units'].round(2)
+    print(shown.drop(columns='model').to_string(index=False))
+    model = table[table['model']]
+    if len(model):
+        row = model.iloc[0]
+        rate = '-' if pd.isna(row['hit_rate']) else f"{row['hit_rate']:.3f}"
+        print(f"\nModel thresholds: rank {row['rank']}, {row['bets']} bets, hit rate {rate}, {row['units']:.2f} units")
+
+def parse_sweep_grid(specs):
+    """NAME=V1,V2,... strings to a sweep grid; 'advanced' is a NaN fade_score."""
+    grid = {}
+    for spec in specs:
+        name, _, values = spec.partition('=')
+        name = name.strip().replace('-', '_')
+        if name not in SWEEP_GRID or not values:
+            raise ValueError(f"expected NAME=V1,V2,... with NAME one of {', '.join(SWEEP_GRID)}: {spec!r}")
+        grid[name] = [np.nan if v.strip() == 'advanced' else float(v) for v in values.split(',')]
+    return grid
+
+# === QUERY SERVER ===
+
+def warm_caches():
+    """Load the game datasets and build the league-wide tables up front."""
+    preload_datasets()
+    get_pitcher_feature_table()
+    get_velocity_trends()
+    get_team_form()
+    get_park_metrics()
+    if bullpen_data_available():
+        get_bullpen_fatigue()
+
+def analyze_payload(payload):
+    # A game block, {'game': block}, {'games': [blocks]} or a list of blocks.
+    # Returns (HTTP status, JSON body).
+    if isinstance(payload, dict) and 'games' in payload:
+        games, many = payload['games'] or [], True
+    elif isinstance(payload, dict) and 'game' in payload:
+        games, many = [payload['game']], False
+    else:
+        games, many = (payload, True) if isinstance(payload, list) else ([payload], False)
+    records = []
+    for game_info in games:
+        if not isinstance(game_info, dict):
+            records.append({'error': 'game must be a JSON object'})
+            continue
+        try:
+            game = evaluate_game(game_info)
+            records.append(error_record(game_info, 'missing game data') if game is None else game_record(game))
+        except Exception as e:
+            records.append(error_record(game_info, str(e)))
+    if many:
+        return 200, records
+    return (422 if 'error' in records[0] else 200), records[0]
+
+def reload_payload(payload):
+    # Re-read changed CSVs, or switch to {'data_dir': ...}, then re-warm.
+    start = time.perf_counter()
+    data_dir = payload.get('data_dir') if isinstance(payload, dict) else None
+    if data_dir and os.path.abspath(data_dir) != os.path.abspath(csv_files.data_dir):
+        if not os.path.isdir(data_dir):
+            return 400, {'error': f"no such data directory: {data_dir}"}
+        dropped = csv_files.switch_data_dir(data_dir, cache_dir=os.path.join(data_dir, '.mlb_cache') if CACHE_DIR else None)
+    else:
+        dropped = csv_files.refresh()
+    warm_caches()
+    return 200, {
+        'dropped': dropped,
+        'data_dir': csv_files.data_dir,
+        'generation': csv_files.generation,
+        'seconds': round(time.perf_counter() - start, 3),
+    }
+
+def server_status():
+    return {
+        'status': 'ok',
+        'data_dir': csv_files.data_dir,
+        'generation': csv_files.generation,
+        'datasets': sorted(csv_files.frames),
+        'failed': sorted(csv_files.failed),
+    }
+
+class AnalysisRequestHandler(http.server.BaseHTTPRequestHandler):
+    """JSON API over the datasets held in memory by --serve.
+
+    POST /analyze  game block(s) as in the YAML -> game record(s)
+    POST /reload   pick up changed CSVs (optionally {"data_dir": ...})
+    GET  /health   data directory, generation and loaded datasets
+    """
+    server_version = 'mlb-analyzer'
+    routes = {'/analyze': analyze_payload, '/reload': reload_payload}
+
+    def do_GET(self):
+        if self.path == '/health':
+            self.send_json(200, server_status())
+        else:
+            self.send_json(404, {'error': f"unknown path {self.path}"})
+
+    def do_POST(self):
+        route = self.routes.get(self.path)
+        if route is None:
+            self.send_json(404, {'error': f"unknown path {self.path}"})
+            return
+        body = self.rfile.read(int(self.headers.get('Content-Length') or 0))
+        try:
+            payload = json.loads(body) if body.strip() else {}
+        except ValueError as e:
+            self.send_json(400, {'error': f"invalid JSON: {e}"})
+            return
+        try:
+            # Analysis chatter goes to the server log, not the response.
+            with contextlib.redirect_stdout(sys.stderr):
+                status, result = route(payload)
+        except Exception as e:
+            status, result = 500, {'error': str(e)}
+        self.send_json(status, json_ready(result))
+
+    def send_json(self, status, result):
+        body = json.dumps(result).encode()
+        self.send_response(status)
+        self.send_header('Content-Type', 'application/json')
+        self.send_header('Content-Length', str(len(body)))
+        self.end_headers()
+        self.wfile.write(body)
+
+    def address_string(self):
+        # Unix-socket peers have no (host, port).
+        return self.client_address[0] if isinstance(self.client_address, tuple) else 'local'
+
+class UnixHTTPServer(socketserver.UnixStreamServer):
+    pass
+
+def make_server(address):
+    """HTTP server on 'HOST:PORT', ':PORT'/'PORT' (localhost), or a Unix socket path."""
+    if os.sep in address:
+        # Only a stale socket from an earlier run is cleared; anything else
+        # at the path is left alone.
+        if os.path.lexists(address):
+            if not S_ISSOCK(os.lstat(address).st_mode):
+                raise FileExistsError(f"{address} exists and is not a socket")
+            os.remove(address)
+        return UnixHTTPServer(address, AnalysisRequestHandler)
+    host, _, port = address.rpartition(':')
+    return http.server.HTTPServer((host or '127.0.0.1', int(port)), AnalysisRequestHandler)
+
+def serve(address):
+    """Warm every cache once, then answer requests one at a time until stopped."""
+    # Bind first so a bad address fails before the (slow) warm-up.
+    server = make_server(address)
+    try:
+        start = time.perf_counter()
+        with contextlib.redirect_stdout(sys.stderr):
+            warm_caches()
+        print(f"Warmed in {time.perf_counter() - start:.1f}s; serving on {address}", file=sys.stderr)
+        server.serve_forever()
+    except KeyboardInterrupt:
+        pass
+    finally:
+        server.server_close()
+        if isinstance(server, UnixHTTPServer) and os.path.exists(address):
+            os.remove(address)
+
+# === MAIN SCRIPT ===
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Analyze MLB game using pitcher/hitter data.")
+    parser.add_argument('game_data_file', type=str, nargs='?', help="Path to a game YAML, a multi-game YAML with a 'games' list, or a directory of game YAMLs.")
+    parser.add_argument('--workers', type=int, default=None, help='Worker processes for slate runs and backtests (default: CPU count).')
+    parser.add_argument('--velo-drops', action='store_true', help='List pitchers whose recent fastball velocity is down more than 1 mph.')
+    parser.add_argument('--pitch-mix', type=str, nargs='+', default=(), metavar='NAME', help='Show each named pitcher\'s arsenal (usage, velo, spin, movement per pitch type) from a pitch-level file.')
+    parser.add_argument('--screen', action='store_true', help="Rank auto-fade and elite starters (the slate's starters if a game file is given, else the whole league).")
+    parser.add_argument('--platoon', action='store_true', help="Rank every starter in the game file against every lineup in it by expected lineup OPS.")
+    parser.add_argument('--probables', type=str, nargs='+', default=(), metavar='NAME', help='Extra starters (e.g. the next few days\' probables) to include with --platoon.')
+    parser.add_argument('--simulate', action='store_true', help='Monte Carlo run distributions (team and total runs) for each game in the game file.')
+    parser.add_argument('--sims', type=int, default=SIMULATIONS, help=f'Simulations per game for --simulate (default: {SIMULATIONS}).')
+    parser.add_argument('--seed', type=int, default=None, help='Random seed for --simulate.')
+    parser.add_argument('--backtest', type=str, default=None, metavar='SEASON_DIR', help='Replay dated data drops in SEASON_DIR/YYYY-MM-DD and report hit rates per bet type.')
+    parser.add_argument('--sweep', type=str, default=None, metavar='SEASON_DIR', help='Replay SEASON_DIR like --backtest and rank every combination of the model thresholds (auto-fade score, firepower, cold team, tired reliever) by units won.')
+    parser.add_argument('--sweep-grid', type=str, nargs='+', default=(), metavar='NAME=V1,V2', help=f"Values to try for --sweep instead of the defaults ({', '.join(SWEEP_GRID)}; fade_score 'advanced' is the model's rule). Unlisted names stay at the model value.")
+    parser.add_argument('--sweep-bets', type=str, nargs='+', default=None, choices=[rule[0] for rule in BET_RULES], metavar='BET', help='Only score these bet types in --sweep.')
+    parser.add_argument('--results', type=str, default=None, help='Game results CSV for --backtest and --sweep (default: SEASON_DIR/results.csv).')
+    parser.add_argument('--output', choices=['text', 'json', 'ndjson'], default='text', help='Report format: text, a JSON array, or one JSON record per line, streamed as each game finishes.')
+    parser.add_argument('--ingest-pitching', type=str, nargs='+', default=None, metavar='FILE', help='Append daily pitching exports (last3dayspitching.csv format) to the pitching log, skipping lines already in it.')
+    parser.add_argument('--bullpen-days', type=int, choices=FATIGUE_LOOKBACKS, default=None, help='Bullpen fatigue lookback in days, read from the pitching log (default: last3dayspitching.csv).')
+    parser.add_argument('--load-workers', type=int, default=None, help='Threads parsing CSVs at startup (default: MLB_LOAD_WORKERS, else the thread pool default; 1 loads serially).')
+    parser.add_argument('--serve', type=str, default=None, metavar='ADDRESS', help='Keep the data warm and answer JSON requests on HOST:PORT or a Unix socket path (POST /analyze, POST /reload, GET /health).')
+    parser.add_argument('--profile', action='store_true', help='Report time, peak memory and full dataset scans per stage on stderr (slates run serially).')
+    parser.add_argument('--profile-output', type=str, default='mlb_profile.json', help='JSON dump of the --profile summary (default: mlb_profile.json).')
+    args = parser.parse_args()
+
+    if args.profile:
+        profiler.start()
+        atexit.register(profiler.report, args.profile_output)
+
+    if args.load_workers is not None:
+        LOAD_WORKERS = args.load_workers
+
+    if args.bullpen_days is not None:
+        BULLPEN_LOOKBACK = args.bullpen_days
+
+    if args.ingest_pitching:
+        ingest_pitching_files(args.ingest_pitching)
+        if args.game_data_file is None and not (args.screen or args.velo_drops or args.pitch_mix or args.backtest or args.sweep or args.serve):
+            exit(0)
+
+    if args.serve:
+        try:
+            serve(args.serve)
+        except FileExistsError as e:
+            print(f"Error: {e}")
+            exit(1)
+        exit(0)
+
+    if args.velo_drops:
+        print_velocity_drops()
+        exit(0)
+
+    if args.pitch_mix:
+        print_pitch_mix(args.pitch_mix)
+        exit(0)
+
+    if args.backtest:
+        with contextlib.redirect_stdout(sys.stderr):
+            summary, backtest_games = run_backtest(args.backtest, args.results, workers=args.workers)
+        if args.output == 'text':
+            print_backtest(summary, backtest_games)
+        else:
+            writer = GameRecordWriter(args.output)
+            for record in summary.to_dict('records'):
+                writer.write(json_ready(record))
+            writer.close()
+        exit(0)
+
+    if args.sweep:
+        try:
+            grid = parse_sweep_grid(args.sweep_grid) if args.sweep_grid else None
+        except ValueError as e:
+            parser.error(f"--sweep-grid: {e}")
+        with contextlib.redirect_stdout(sys.stderr):
+            table, sweep_games = run_sweep(args.sweep, args.results, grid=grid, workers=args.workers, bets=args.sweep_bets)
+        if args.output == 'text':
+            print_sweep(table, sweep_games)
+        else:
+            writer = GameRecordWriter(args.output)
+            for record in table.to_dict('records'):
+                writer.write(json_ready(record))
+            writer.close()
+        exit(0)
+
+    if args.game_data_file is None and not args.screen:
+        parser.error("game_data_file is required unless --screen, --velo-drops, --pitch-mix, --backtest, --sweep, --serve or --ingest-pitching is given")
+
+    if args.screen and args.game_data_file is None:
+        print_pitcher_screen(screen_pitcher_triggers())
+        exit(0)
+
+    # Load game data from YAML
+    try:
+        games = load_games(args.game_data_file)
+    except FileNotFoundError:
+        print(f"Error: Game data file '{args.game_data_file}' not found.")
+        exit(1)
+    except yaml.YAMLError as e:
+        print(f"Error parsing YAML file: {e}")
+        exit(1)
+
+    if args.platoon:
+        print_platoon_matchups(slate_platoon_matchups(games, args.probables))
+        exit(0)
+
+    if args.simulate:
+        with contextlib.redirect_stdout(sys.stderr):
+            simulations = simulate_slate(games, n=args.sims, seed=args.seed)
+        if args.output == 'text':
+            print_simulations(simulations)
+        else:
+            writer = GameRecordWriter(args.output)
+            for record in simulations:
+                writer.write(json_ready(record))
+            writer.close()
+        exit(0)
+
+    if args.screen:
+        screen = screen_pitcher_triggers()
+        table = get_pitcher_feature_table()
+        starters = [g.get(side) for g in games for side in ('home_starting_pitcher', 'away_starting_pitcher')]
+        keys = [key for key in (lookup_player_id(table, name) for name in starters if name) if key is not None]
+        print_pitcher_screen(screen.loc[list(dict.fromkeys(keys))])
+        exit(0)
+
+    # Structured output owns stdout; everything else printed goes to stderr.
+    writer = None if args.output == 'text' else GameRecordWriter(args.output)
+    ok = True
+    with contextlib.redirect_stdout(sys.stderr) if writer else contextlib.nullcontext():
+        if len(games) == 1 and not os.path.isdir(args.game_data_file):
+            with profiler.stage('load'):
+                preload_datasets()
+            ok = analyze_game(games[0], writer)
+        else:
+            run_slate(games, workers=args.workers, writer=writer)
+    if writer is not None:
+        writer.close()
+    if not ok:
+        exit(1)
@@ -0,0 +1,352 @@
+import argparse
+import contextlib
+import datetime
+import io
+import json
+import os
+import platform
+import random
+import subprocess
+import sys
+import tempfile
+import time
+
+import numpy as np
+import pandas as pd
+import yaml
+
+HERE = os.path.dirname(os.path.abspath(__file__))
+ANALYZER = os.path.join(HERE, 'mlb_analyzer2.py')
+
+TEAMS = [
+    'ARI', 'ATL', 'BAL', 'BOS', 'CHC', 'CWS', 'CIN', 'CLE', 'COL', 'DET',
+    'HOU', 'KC', 'LAA', 'LAD', 'MIA', 'MIL', 'MIN', 'NYM', 'NYY', 'OAK',
+    'PHI', 'PIT', 'SD', 'SF', 'SEA', 'STL', 'TB', 'TEX', 'TOR', 'WSH',
+]
+
+FIRST_NAMES = [
+    'Aaron', 'Adam', 'Alex', 'Andrés', 'Bobby', 'Brandon', 'Bryce', 'Carlos', 'Chris', 'Corbin',
+    'Dylan', 'Eduardo', 'Elly', 'Eugenio', 'Freddy', 'Gerrit', 'Gunnar', 'Hunter', 'Jacob', 'José',
+    'Juan', 'Julio', 'Justin', 'Kyle', 'Logan', 'Luis', 'Manny', 'Marcus', 'Max', 'Mookie',
+    'Nolan', 'Pete', 'Ronald', 'Shohei', 'Spencer', 'Tarik', 'Tyler', 'Vladimir', 'Yoshinobu', 'Zack',
+]
+LAST_NAMES = [
+    'Acuña Jr.', 'Alcantara', 'Álvarez', 'Betts', 'Bichette', 'Burnes', 'Castillo', 'Cole', 'Cortes', 'De La Cruz',
+    'deGrom', 'Díaz', 'Fried', 'Gallen', 'García', 'Glasnow', 'Guerrero Jr.', 'Harper', 'Henderson', 'Hernández',
+    'Judge', 'Kirby', 'Lindor', "O'Neill", 'Ohtani', 'Peralta', 'Pérez', 'Ramírez', 'Rodríguez', 'Sale',
+    'Seager', 'Skubal', 'Snell', 'Soto', 'Strider', 'Suárez', 'Tatis Jr.', 'Valdez', 'Webb', 'Wheeler',
+    'Witt Jr.', 'Yamamoto', 'Abreu', 'Bellinger', 'Castellanos', 'Contreras', 'Devers', 'Freeman', 'Goldschmidt', 'Gray',
+]
+
+# Classic exports that no getter reads still get a plausible table so the
+# generated directory mirrors a real data drop.
+GENERIC_STAT_COLUMNS = ['G', 'GS', 'IP', 'H', 'R', 'ER', 'HR', 'BB', 'SO', 'ERA', 'WHIP']
+
+
+def player_names(count):
+    names = []
+    for i in range(count):
+        first = FIRST_NAMES[i % len(FIRST_NAMES)]
+        last = LAST_NAMES[(i // len(FIRST_NAMES)) % len(LAST_NAMES)]
+        cycle = i // (len(FIRST_NAMES) * len(LAST_NAMES))
+        names.append(f"{first} {last}" if cycle == 0 else f"{first} {last}{cycle + 1}")
+    return names
+
+
+def last_first(name):
+    first, last = name.split(' ', 1)
+    return f"{last}, {first}"
+
+
+def box_score_ip(rng, low, high, size):
+    return [f"{w}.{f}" for w, f in zip(rng.integers(low, high, size), rng.integers(0, 3, size))]
+
+
+def generate_dataset(out_dir, players=1000, days=180, games=15, seed=0, end_date=None):
+    """Write synthetic versions of every file the analyzer loads.
+
+    Half the players are pitchers; every team gets pitchers and hitters.
+    Daily files (pitch logs, team batting, last three days of pitching)
+    cover `days` days ending on end_date (default: today). Also writes
+    game.yaml (one game) and slate.yaml (`games` games).
+    """
+    sys.path.insert(0, HERE)
+    import mlb_analyzer2
+
+    rng = np.random.default_rng(seed)
+    os.makedirs(out_dir, exist_ok=True)
+    end_date = pd.Timestamp(end_date or datetime.date.today()).normalize()
+    dates = pd.date_range(end=end_date, periods=days)
+
+    season = mlb_analyzer2.VELO_SEASON
+    names = player_names(players)
+    teams = [TEAMS[i % len(TEAMS)] for i in range(players)]
+    pitchers, pitcher_teams = names[: players // 2], teams[: players // 2]
+    hitters, hitter_teams = names[players // 2:], teams[players // 2:]
+    P, H, N = len(pitchers), len(hitters), len(names)
+
+    def uniform(low, high, size):
+        return np.round(rng.uniform(low, high, size), 3)
+
+    def write(fname, frame):
+        frame.to_csv(os.path.join(out_dir, fname), index=False)
+
+    files = {**mlb_analyzer2.classic_csvs, **mlb_analyzer2.advanced_csvs}
+    for key, fname in mlb_analyzer2.classic_csvs.items():
+        team_level = key.startswith('team_')
+        size = len(TEAMS) if team_level else P
+        frame = pd.DataFrame({'Team': TEAMS} if team_level else {'Player': pitchers, 'Team': pitcher_teams})
+        for col in GENERIC_STAT_COLUMNS:
+            frame[col] = box_score_ip(rng, 1, 200, size) if col == 'IP' else uniform(0, 100, size)
+        write(fname, frame)
+
+    write(files['std_pitching'], pd.DataFrame({
+        'Player': pitchers, 'Team': pitcher_teams, 'ERA': uniform(1.5, 7, P), 'WHIP': uniform(0.8, 1.8, P),
+        'IP': box_score_ip(rng, 5, 200, P), 'SO9': uniform(5, 13, P), 'BB9': uniform(1, 5, P), 'HR9': uniform(0.4, 2, P),
+    }))
+    for key in ('pitcher_splits_lhb', 'pitcher_splits_rhb'):
+        write(files[key], pd.DataFrame({
+            'Player': pitchers, 'ERA': uniform(1.5, 7, P), 'WHIP': uniform(0.8, 1.8, P),
+            'OPS': uniform(0.5, 0.95, P), 'SO/9': uniform(5, 13, P), 'HR.1': uniform(0.4, 2, P),
+        }))
+    write(files['homeandawatbatter'], pd.DataFrame({
+        'Player': hitters, 'Team': hitter_teams, 'OPS': uniform(0.55, 1.0, H), 'HR': rng.integers(0, 50, H),
+        'AVG': uniform(0.2, 0.33, H), 'OBP': uniform(0.27, 0.42, H), 'SLG': uniform(0.33, 0.6, H),
+    }))
+    write(files['team_relievers'], pd.DataFrame({'Team': TEAMS, 'ERA': uniform(3, 5.5, 30), 'WHIP': uniform(1.1, 1.5, 30)}))
+
+    write(files['percentile_rankings'], pd.DataFrame({
+        'player_name': [last_first(n) for n in names], 'year': season,
+        **{c: rng.integers(0, 101, N) for c in ['k_percent', 'xwoba', 'brl_percent', 'fb_velocity', 'fb_spin', 'hard_hit_percent', 'xera']},
+    }))
+    write(files['expected_stats'], pd.DataFrame({
+        'last_name, first_name': [last_first(n) for n in names] * 2,
+        'year': [season - 1] * N + [season] * N,
+        'est_woba': uniform(0.25, 0.4, 2 * N), 'xera': uniform(2, 6, 2 * N),
+    }))
+    for key in ('bat_tracking', 'bat_tracking_last30'):
+        write(files[key], pd.DataFrame({'name': [last_first(n) for n in hitters], 'avg_bat_speed': uniform(65, 78, H), 'swing_length': uniform(6, 8, H)}))
+    write(files['swing_take'], pd.DataFrame({
+        'last_name, first_name': [last_first(n) for n in pitchers],
+        **{c: uniform(-15, 15, P) for c in ['runs_all', 'runs_heart', 'runs_shadow', 'runs_chase', 'runs_waste']},
+    }))
+    write(files['pitch_movement'], pd.DataFrame({
+        'last_name, first_name': [last_first(n) for n in pitchers for _ in range(3)],
+        'pitch_type': ['FF', 'SL', 'CH'] * P, 'pitcher_break_z_induced': uniform(5, 20, 3 * P),
+        'pitcher_break_x': uniform(-15, 15, 3 * P), 'pitch_per': uniform(5, 60, 3 * P), 'spin_rate': rng.integers(1800, 2800, 3 * P),
+    }))
+    write(files['pitcher_running_game'], pd.DataFrame({
+        'player_name': [last_first(n) for n in pitchers], 'runs_prevented_on_running_attr': uniform(-3, 3, P),
+        'rate_sbx': uniform(0, 1, P), 'n_sb': rng.integers(0, 20, P), 'n_cs': rng.integers(0, 8, P),
+    }))
+    write(files['active_spin'], pd.DataFrame({
+        'entity_name': [last_first(n) for n in pitchers], 'active_spin_fourseam': uniform(80, 100, P),
+        'active_spin_curve': uniform(60, 90, P), 'active_spin_slider': uniform(20, 60, P),
+    }))
+    write(files['pitcher_arm_angles'], pd.DataFrame({
+        'pitcher_name': [last_first(n) for n in pitchers], 'ball_angle': uniform(20, 60, P), 'release_ball_z': uniform(5, 7, P),
+        'relative_release_ball_x': uniform(-3, 3, P), 'shoulder_z': uniform(4, 6, P), 'relative_shoulder_x': uniform(-2, 2, P),
+    }))
+    write(files['exit_velocity'], pd.DataFrame({
+        'last_name, first_name': [last_first(n) for n in names], 'avg_hit_speed': uniform(85, 95, N),
+        'max_hit_speed': uniform(105, 120, N), 'brl_percent': uniform(2, 15, N),
+    }))
+    for key in ('spin_direction_pitches', 'spin_direction'):
+        write(files[key], pd.DataFrame({
+            'last_name, first_name': [last_first(n) for n in pitchers for _ in range(2)], 'pitch_type': ['FF', 'SL'] * P,
+            'spin_direction': rng.integers(0, 360, 2 * P), 'spin_axis': rng.integers(0, 360, 2 * P),
+        }))
+    write(files['homeruns'], pd.DataFrame({'player': [last_first(n) for n in pitchers], 'no_doubters': rng.integers(0, 10, P)}))
+
+    # Pitch logs: starters every fifth day, relievers every other day, all
+    # labelled with the season the velocity trends read.
+    base_velo = rng.uniform(89, 99, P)
+    rows = {'Player': [], 'Team': [], 'Year': [], 'Date': [], 'FBv': []}
+    for i, name in enumerate(pitchers):
+        step = 5 if i % 3 == 0 else 2
+        appearances = dates[i % step::step]
+        velo = base_velo[i] + rng.normal(0, 0.7, len(appearances))
+        if i % 11 == 0:
+            velo[-3:] -= 1.8
+        rows['Player'] += [name] * len(appearances)
+        rows['Team'] += [pitcher_teams[i]] * len(appearances)
+        rows['Year'] += [season] * len(appearances)
+        rows['Date'] += list(appearances.strftime('%Y-%m-%d'))
+        rows['FBv'] += list(np.round(velo, 1))
+    write(files['pitching_pitches'], pd.DataFrame(rows))
+
+    # Team batting game logs.
+    team_days = len(TEAMS) * days
+    ab = rng.integers(28, 40, team_days)
+    hits = rng.binomial(ab, 0.25)
+    write(files['battingagaisnthomeaway'], pd.DataFrame({
+        'Date': np.repeat(dates.strftime('%Y-%m-%d'), len(TEAMS)), 'Team': TEAMS * days,
+        'AB': ab, 'H': hits, 'BB': rng.integers(0, 6, team_days), 'TB': hits + rng.integers(0, 8, team_days),
+    }))
+
+    # Last three days of pitching lines, with the export's stray header spaces.
+    rows = []
+    for day in dates[-3:]:
+        pitched = rng.uniform(size=P) < 0.35
+        for i in np.flatnonzero(pitched):
+            whole = rng.integers(4, 8) if i % 3 == 0 else rng.integers(0, 3)
+            rows.append((f"{day:%Y-%m-%d} (G1)", pitcher_teams[i], pitchers[i], f"{whole}.{rng.integers(0, 3)}"))
+    pd.DataFrame(rows, columns=[' Date', 'Team', 'Player', 'IP ']).to_csv(os.path.join(out_dir, 'last3dayspitching.csv'), index=False)
+
+    slate = []
+    for g in range(min(games, len(TEAMS) // 2)):
+        home, away = TEAMS[2 * g], TEAMS[2 * g + 1]
+        game = {'home_team': home, 'away_team': away}
+        for side, team in (('home', home), ('away', away)):
+            staff = [p for p, t in zip(pitchers, pitcher_teams) if t == team]
+            lineup = [h for h, t in zip(hitters, hitter_teams) if t == team][:9]
+            game[f"{side}_starting_pitcher"] = staff[0]
+            game[f"{side}_lineup"] = [{'name': h, 'hand': random.Random(h).choice('LR')} for h in lineup]
+        slate.append(game)
+    with open(os.path.join(out_dir, 'game.yaml'), 'w') as f:
+        yaml.safe_dump({'game': slate[0]}, f, allow_unicode=True)
+    with open(os.path.join(out_dir, 'slate.yaml'), 'w') as f:
+        yaml.safe_dump({'games': slate}, f, allow_unicode=True)
+    return slate
+
+
+def timed(fn, items, repeat=1):
+    # Seconds for `repeat` passes over items; report stdout is discarded.
+    with contextlib.redirect_stdout(io.StringIO()):
+        start = time.perf_counter()
+        for _ in range(repeat):
+            for item in items:
+                fn(item)
+        elapsed = time.perf_counter() - start
+    calls = len(items) * repeat
+    return {'calls': calls, 'seconds': elapsed, 'per_call_us': elapsed / calls * 1e6 if calls else None}
+
+
+def run_benchmarks(data_dir, sample=200, seed=0):
+    """Time the analysis hot paths against data_dir; returns a dict of results.
+
+    Runs in the current process, which must not have imported
+    mlb_analyzer2 yet (the data directory is bound at import).
+    """
+    os.environ['MLB_DATA_DIR'] = data_dir
+    os.environ['MLB_CACHE_DIR'] = os.path.join(data_dir, '.mlb_cache')
+    sys.path.insert(0, HERE)
+    start = time.perf_counter()
+    import mlb_analyzer2 as m
+    results = {'import': {'calls': 1, 'seconds': time.perf_counter() - start}}
+
+    with contextlib.redirect_stdout(io.StringIO()):
+        start = time.perf_counter()
+        m.preload_datasets()
+        results['load'] = {'calls': 1, 'seconds': time.perf_counter() - start}
+
+    rng = random.Random(seed)
+    pitchers = list(m.csv_files['std_pitching']['Player'])
+    hitters = list(m.csv_files['homeandawatbatter']['Player'])
+    pitchers = rng.sample(pitchers, min(sample, len(pitchers)))
+    hitters = rng.sample(hitters, min(sample, len(hitters)))
+    df = m.csv_files['percentile_rankings']
+    games = m.load_games(os.path.join(data_dir, 'slate.yaml'))
+
+    results['advanced_csv_lookup'] = timed(lambda n: m.advanced_csv_lookup(n, df, csv_key='percentile_rankings'), pitchers + hitters)
+    results['PitcherAnalysis.analyze'] = timed(lambda n: m.PitcherAnalysis(n, 'X').analyze(), pitchers)
+    results['HitterAnalysis.analyze'] = timed(lambda n: m.HitterAnalysis(n, 'X').analyze(), hitters)
+
+    def bullpen(team):
+        relievers = m.get_recent_relievers_for_team(team, m.csv_files['last3dayspitching'])
+        m.BullpenAnalysis(relievers, team).analyze()
+    results['BullpenAnalysis.analyze'] = timed(bullpen, TEAMS)
+    results['get_recent_team_ops'] = timed(lambda days: m.get_recent_team_ops(days), [3, 7, 14, 30])
+    results['analyze_game'] = timed(m.analyze_game, games)
+    return results
+
+
+def run_cli(args, data_dir, env_extra=None):
+    env = dict(os.environ, MLB_DATA_DIR=data_dir, MLB_CACHE_DIR=os.path.join(data_dir, '.mlb_cache'))
+    env.update(env_extra or {})
+    start = time.perf_counter()
+    proc = subprocess.run([sys.executable, ANALYZER] + args, cwd=data_dir, env=env, capture_output=True, text=True)
+    elapsed = time.perf_counter() - start
+    # A crashed run would otherwise pass for a fast one.
+    if proc.returncode != 0:
+        raise RuntimeError(f"{os.path.basename(ANALYZER)} {' '.join(args)} failed:\n{proc.stderr or proc.stdout}")
+    return {'calls': 1, 'seconds': elapsed}
+
+
+def benchmark_scale(players, days, games=15, sample=200, seed=0, keep_dir=None):
+    # The generated data set is removed afterwards unless keep_dir is given.
+    with contextlib.ExitStack() as stack:
+        data_dir = keep_dir or stack.enter_context(tempfile.TemporaryDirectory(prefix=f"mlb_bench_{players}_{days}_"))
+        start = time.perf_counter()
+        generate_dataset(data_dir, players=players, days=days, games=games, seed=seed)
+        generated = time.perf_counter() - start
+
+        results = {
+            # Full __main__ runs: cold parses every CSV, warm reuses snapshots.
+            'main_game_cold': run_cli([os.path.join(data_dir, 'game.yaml')], data_dir, {'MLB_CACHE_DIR': ''}),
+            'main_game_snapshot_build': run_cli([os.path.join(data_dir, 'game.yaml')], data_dir),
+            'main_game_warm': run_cli([os.path.join(data_dir, 'game.yaml')], data_dir),
+            'main_slate': run_cli([os.path.join(data_dir, 'slate.yaml')], data_dir),
+        }
+        # In-process timings need a fresh interpreter per scale.
+        proc = subprocess.run(
+            [sys.executable, os.path.abspath(__file__), '--in-process', data_dir, '--sample', str(sample), '--seed', str(seed)],
+            capture_output=True, text=True,
+        )
+        if proc.returncode != 0:
+            raise RuntimeError(f"benchmark worker failed:\n{proc.stderr}")
+        results.update(json.loads(proc.stdout))
+    return {
+        'players': players,
+        'days': days,
+        'games': games,
+        'data_dir': data_dir if keep_dir else None,
+        'generate_seconds': generated,
+        'results': results,
+    }
+
+def git_revision():
+    try:
+        return subprocess.run(['git', 'rev-parse', 'HEAD'], cwd=HERE, capture_output=True, text=True, check=True).stdout.strip()
+    except Exception:
+        return None
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Benchmark mlb_analyzer2 on synthetic data at several scales.")
+    parser.add_argument('--players', type=int, nargs='+', default=[500, 1000, 5000], help='Player counts to benchmark.')
+    parser.add_argument('--days', type=int, nargs='+', default=[30, 180], help='Days of daily rows to generate.')
+    parser.add_argument('--games', type=int, default=15, help='Games in the generated slate.')
+    parser.add_argument('--sample', type=int, default=200, help='Players sampled for the per-call timings.')
+    parser.add_argument('--seed', type=int, default=0)
+    parser.add_argument('--output', type=str, default=None, help='Write the JSON results here (default: stdout).')
+    parser.add_argument('--generate-only', type=str, default=None, metavar='DIR', help='Only write a synthetic data set to DIR.')
+    parser.add_argument('--in-process', type=str, default=None, metavar='DIR', help=argparse.SUPPRESS)
+    args = parser.parse_args()
+
+    if args.in_process:
+        print(json.dumps(run_benchmarks(args.in_process, sample=args.sample, seed=args.seed)))
+        sys.exit(0)
+    if args.generate_only:
+        generate_dataset(args.generate_only, players=args.players[0], days=args.days[0], games=args.games, seed=args.seed)
+        sys.exit(0)
+
+    report = {
+        'schema': 1,
+        'created': datetime.datetime.now().isoformat(timespec='seconds'),
+        'revision': git_revision(),
+        'python': platform.python_version(),
+        'pandas': pd.__version__,
+        'numpy': np.__version__,
+        'scales': [],
+    }
+    for players in args.players:
+        for days in args.days:
+            print(f"Benchmarking {players} players x {days} days...", file=sys.stderr)
+            report['scales'].append(benchmark_scale(players, days, games=args.games, sample=args.sample, seed=args.seed))
+    text = json.dumps(report, indent=2)
+    if args.output:
+        with open(args.output, 'w') as f:
+            f.write(text)
+    else:
+        print(text)